@@ -0,0 +1,32 @@
+"""
+Drop duplicate badges and make (user, skill, badge type) unique
+
+Revision ID: add_badges_unique_award
+Revises: add_user_matches
+Create Date: 2025-07-23 09:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_badges_unique_award'
+down_revision = 'add_user_matches'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Keep the oldest copy of each award; NULL skill ids compare equal, like the index below
+    op.execute("""
+        DELETE FROM badges b USING badges d
+        WHERE b.user_id = d.user_id
+          AND b.skill_id IS NOT DISTINCT FROM d.skill_id
+          AND b.badge_type = d.badge_type
+          AND b.id > d.id
+    """)
+    op.create_index(
+        'uq_badges_user_skill_type', 'badges',
+        ['user_id', sa.text('coalesce(skill_id, 0)'), 'badge_type'], unique=True,
+    )
+
+def downgrade():
+    op.drop_index('uq_badges_user_skill_type', table_name='badges')
@@ -0,0 +1,63 @@
+"""
+Add FK, inbox (user, id) and pending-status partial indexes
+
+Revision ID: add_fk_and_inbox_indexes
+Revises: add_purge_jobs
+Create Date: 2025-07-25 09:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_fk_and_inbox_indexes'
+down_revision = 'add_purge_jobs'
+branch_labels = None
+depends_on = None
+
+# name -> definition; must match the Index() entries on the models
+INDEXES = {
+    # Inbox/outbox keyset pages: WHERE receiver_id = ? ORDER BY id DESC LIMIT n, straight off the index
+    "ix_swaps_receiver_id_id": "swaps (receiver_id, id)",
+    "ix_swaps_sender_id_id": "swaps (sender_id, id)",
+    "ix_swaps_receiver_id_id_pending": "swaps (receiver_id, id) WHERE status = 'pending'",
+    "ix_invites_receiver_id_id": "invites (receiver_id, id)",
+    "ix_invites_sender_id_id": "invites (sender_id, id)",
+    "ix_invites_receiver_id_id_pending": "invites (receiver_id, id) WHERE status = 'pending'",
+    "ix_badges_user_id_id": "badges (user_id, id)",
+    "ix_user_skills_user_id_skill_id_type": "user_skills (user_id, skill_id, type)",
+    "ix_skill_requests_user_id": "skill_requests (user_id)",
+    "ix_feedback_to_user": "feedback (to_user)",
+    "ix_feedback_from_user": "feedback (from_user)",
+    "ix_feedback_swap_id": "feedback (swap_id)",
+    "ix_user_matches_match_user_id": "user_matches (match_user_id)",
+    # Browse filters only ever look at public profiles
+    "ix_users_public_location_id": "users (location, id) WHERE is_public",
+    "ix_users_public_availability_id": "users (availability, id) WHERE is_public",
+    # /users/locations: a loose index scan, one probe per distinct location
+    "ix_users_location": "users (location)",
+}
+
+def drop_invalid_index(name):
+    """
+    Drop `name` if it is left INVALID by a failed or cancelled concurrent build.
+    IF NOT EXISTS would otherwise skip it on a rerun, and the planner never uses it.
+    """
+    invalid = op.get_bind().execute(
+        sa.text("SELECT NOT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)"), {"name": name}
+    ).scalar()
+    if invalid:
+        op.execute(f"DROP INDEX CONCURRENTLY {name}")
+
+def upgrade():
+    # CONCURRENTLY: build without blocking writes to these (large, busy) tables
+    with op.get_context().autocommit_block():
+        for name, definition in INDEXES.items():
+            table, rest = definition.split(" ", 1)
+            drop_invalid_index(name)
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} {rest}")
+        op.execute("ANALYZE swaps, invites, badges, user_skills, skill_requests, feedback, user_matches, users")
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name in reversed(list(INDEXES)):
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
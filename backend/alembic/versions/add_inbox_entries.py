@@ -0,0 +1,83 @@
+"""
+Add inbox_entries table (denormalized per-user inbox of swaps and invites)
+
+Revision ID: add_inbox_entries
+Revises: add_fk_and_inbox_indexes
+Create Date: 2025-07-26 09:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_inbox_entries'
+down_revision = 'add_fk_and_inbox_indexes'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        'inbox_entries',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=False),
+        sa.Column('kind', sa.String(), nullable=False),
+        sa.Column('item_id', sa.Integer(), nullable=False),
+        sa.Column('direction', sa.String(), nullable=False),
+        sa.Column('counterpart_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=False),
+        sa.Column('counterpart_name', sa.String(), nullable=False),
+        sa.Column('skill_id', sa.Integer(), nullable=False),
+        sa.Column('skill_name', sa.String(), nullable=False),
+        sa.Column('requested_skill_id', sa.Integer(), nullable=True),
+        sa.Column('requested_skill_name', sa.String(), nullable=True),
+        sa.Column('status', sa.String(), nullable=True),
+        sa.Column('message', sa.String(), nullable=True),
+        sa.Column('scheduled_time', sa.DateTime(), nullable=True),
+        sa.Column('rating', sa.Integer(), nullable=True),
+        sa.Column('feedback', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+    )
+    op.create_index('uq_inbox_entries_user_kind_item_direction', 'inbox_entries',
+                    ['user_id', 'kind', 'item_id', 'direction'], unique=True)
+    op.create_index('ix_inbox_entries_user_id_created_at_id', 'inbox_entries', ['user_id', 'created_at', 'id'])
+    op.create_index('ix_inbox_entries_user_id_kind_created_at_id', 'inbox_entries',
+                    ['user_id', 'kind', 'created_at', 'id'])
+    op.create_index('ix_inbox_entries_user_id_created_at_id_pending', 'inbox_entries', ['user_id', 'created_at', 'id'],
+                    postgresql_where=sa.text("status = 'pending'"))
+    op.create_index('ix_inbox_entries_counterpart_id', 'inbox_entries', ['counterpart_id'])
+    # Entries for the existing swaps and invites, so /inbox is complete once the app starts (the
+    # same rows as services/inbox.backfill_inbox, which app/scripts/backfill_inbox.py runs at any time);
+    # the app keeps it up to date from then on
+    op.execute("""
+        INSERT INTO inbox_entries (user_id, kind, item_id, direction, counterpart_id, counterpart_name,
+                                   skill_id, skill_name, requested_skill_id, requested_skill_name,
+                                   status, message, scheduled_time, rating, feedback, created_at)
+        SELECT side.owner, 'swap', s.id, side.direction, side.other, u.name,
+               s.skill_offered, offered.name, s.skill_requested, requested.name,
+               s.status, s.message, s.scheduled_time, s.rating, s.feedback,
+               COALESCE(s.created_at, timezone('utc', now()))
+        FROM swaps s
+        CROSS JOIN LATERAL (VALUES ('incoming', s.receiver_id, s.sender_id),
+                                   ('outgoing', s.sender_id, s.receiver_id)) AS side (direction, owner, other)
+        JOIN users u ON u.id = side.other
+        JOIN skills offered ON offered.id = s.skill_offered
+        JOIN skills requested ON requested.id = s.skill_requested
+        UNION ALL
+        SELECT side.owner, 'invite', i.id, side.direction, side.other, u.name,
+               i.skill_id, skill.name, NULL, NULL,
+               i.status, i.message, NULL, i.rating, i.feedback,
+               COALESCE(i.created_at, timezone('utc', now()))
+        FROM invites i
+        CROSS JOIN LATERAL (VALUES ('incoming', i.receiver_id, i.sender_id),
+                                   ('outgoing', i.sender_id, i.receiver_id)) AS side (direction, owner, other)
+        JOIN users u ON u.id = side.other
+        JOIN skills skill ON skill.id = i.skill_id
+        ORDER BY 16, 2, 3
+    """)
+
+def downgrade():
+    op.drop_index('ix_inbox_entries_counterpart_id', table_name='inbox_entries')
+    op.drop_index('ix_inbox_entries_user_id_created_at_id_pending', table_name='inbox_entries')
+    op.drop_index('ix_inbox_entries_user_id_kind_created_at_id', table_name='inbox_entries')
+    op.drop_index('ix_inbox_entries_user_id_created_at_id', table_name='inbox_entries')
+    op.drop_index('uq_inbox_entries_user_kind_item_direction', table_name='inbox_entries')
+    op.drop_table('inbox_entries')
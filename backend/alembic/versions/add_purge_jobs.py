@@ -0,0 +1,40 @@
+"""
+Add purge_jobs table for background user purges
+
+Revision ID: add_purge_jobs
+Revises: add_badges_unique_award
+Create Date: 2025-07-24 10:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 'add_purge_jobs'
+down_revision = 'add_badges_unique_award'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        'purge_jobs',
+        sa.Column('id', sa.String(32), primary_key=True),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('step', sa.String(), nullable=True),
+        sa.Column('deleted', postgresql.JSONB(), nullable=False),
+        sa.Column('error', sa.String(), nullable=True),
+        sa.Column('claimed_by', sa.String(32), nullable=True),
+        sa.Column('heartbeat_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index('ix_purge_jobs_user_id', 'purge_jobs', ['user_id'])
+    op.create_index('uq_purge_jobs_user_id_active', 'purge_jobs', ['user_id'], unique=True,
+                    postgresql_where=sa.text("status IN ('queued', 'running')"))
+
+def downgrade():
+    op.drop_index('uq_purge_jobs_user_id_active', table_name='purge_jobs')
+    op.drop_index('ix_purge_jobs_user_id', table_name='purge_jobs')
+    op.drop_table('purge_jobs')
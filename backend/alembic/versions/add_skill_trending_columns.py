@@ -0,0 +1,61 @@
+"""
+Add skills.swap_count / skills.trend_score and backfill the trending counters
+
+Revision ID: add_skill_trending_columns
+Revises: add_user_skills_gin_indexes
+Create Date: 2025-07-22 09:00:00.000000
+"""
+import math
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.config import TRENDING_HALF_LIFE_HOURS
+
+# revision identifiers, used by Alembic.
+revision = 'add_skill_trending_columns'
+down_revision = 'add_user_skills_gin_indexes'
+branch_labels = None
+depends_on = None
+
+# Same landmark, rate and log scale as services/trending.py, with the half-life from
+# the app's config: run the migration with the TRENDING_HALF_LIFE_HOURS the app uses
+# (changing it later means re-seeding trend_score, e.g. with this UPDATE).
+EPOCH = 1735689600
+DECAY_RATE = math.log(2) / (TRENDING_HALF_LIFE_HOURS * 3600)
+NO_SCORE = -1e9
+
+def drop_invalid_index(name):
+    """Drop `name` if a failed concurrent build left it INVALID (IF NOT EXISTS would keep it)."""
+    invalid = op.get_bind().execute(
+        sa.text("SELECT NOT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)"), {"name": name}
+    ).scalar()
+    if invalid:
+        op.execute(f"DROP INDEX CONCURRENTLY {name}")
+
+def upgrade():
+    op.add_column('skills', sa.Column('swap_count', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('skills', sa.Column('trend_score', sa.Float(), nullable=False, server_default=str(NO_SCORE)))
+    # offer_count/request_count were never maintained: recount them from user_skills and swaps,
+    # and seed trend_score with today's weight so the list isn't empty until new activity arrives
+    op.execute("""
+        UPDATE skills SET
+            offer_count = (SELECT count(*) FROM user_skills us WHERE us.skill_id = skills.id AND us.type = 'offered'),
+            request_count = (SELECT count(*) FROM user_skills us WHERE us.skill_id = skills.id AND us.type = 'wanted'),
+            swap_count = (SELECT count(*) FROM swaps s WHERE s.skill_offered = skills.id OR s.skill_requested = skills.id)
+    """)
+    op.execute(f"""
+        UPDATE skills
+        SET trend_score = ln(offer_count + request_count + 2 * swap_count)
+                          + {DECAY_RATE} * (extract(epoch FROM now()) - {EPOCH})
+        WHERE offer_count + request_count + swap_count > 0
+    """)
+    with op.get_context().autocommit_block():
+        drop_invalid_index("ix_skills_trend_score")
+        op.execute("CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_skills_trend_score ON skills (trend_score DESC)")
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_skills_trend_score")
+    op.drop_column('skills', 'trend_score')
+    op.drop_column('skills', 'swap_count')
@@ -0,0 +1,28 @@
+"""
+Add user_matches table for precomputed top-N partners
+
+Revision ID: add_user_matches
+Revises: add_skill_trending_columns
+Create Date: 2025-07-22 14:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_user_matches'
+down_revision = 'add_skill_trending_columns'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        'user_matches',
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('rank', sa.Integer(), primary_key=True),
+        sa.Column('match_user_id', sa.Integer(), sa.ForeignKey('users.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('score', sa.Float(), nullable=False),
+        sa.Column('computed_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+    )
+
+def downgrade():
+    op.drop_table('user_matches')
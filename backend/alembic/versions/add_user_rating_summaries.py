@@ -0,0 +1,27 @@
+"""
+Add user_rating_summaries table
+
+Revision ID: add_user_rating_summaries
+Revises: cf8cb47c2f7f
+Create Date: 2025-07-20 10:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_user_rating_summaries'
+down_revision = 'cf8cb47c2f7f'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table('user_rating_summaries',
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=False),
+        sa.Column('rating_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('rating_sum', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('rating_avg', sa.Float(), nullable=True),
+        sa.PrimaryKeyConstraint('user_id')
+    )
+
+def downgrade():
+    op.drop_table('user_rating_summaries')
@@ -0,0 +1,37 @@
+"""
+Add pg_trgm GIN indexes on users.name and users.email for search
+
+Revision ID: add_user_search_trgm_indexes
+Revises: add_user_rating_summaries
+Create Date: 2025-07-21 10:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_user_search_trgm_indexes'
+down_revision = 'add_user_rating_summaries'
+branch_labels = None
+depends_on = None
+
+def drop_invalid_index(name):
+    """Drop `name` if a failed concurrent build left it INVALID (IF NOT EXISTS would keep it)."""
+    invalid = op.get_bind().execute(
+        sa.text("SELECT NOT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)"), {"name": name}
+    ).scalar()
+    if invalid:
+        op.execute(f"DROP INDEX CONCURRENTLY {name}")
+
+def upgrade():
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # CONCURRENTLY can't run inside a transaction, and must not lock users while it builds
+    with op.get_context().autocommit_block():
+        drop_invalid_index("ix_users_name_trgm")
+        op.execute("CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_users_name_trgm ON users USING gin (name gin_trgm_ops)")
+        drop_invalid_index("ix_users_email_trgm")
+        op.execute("CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_users_email_trgm ON users USING gin (email gin_trgm_ops)")
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_users_email_trgm")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_users_name_trgm")
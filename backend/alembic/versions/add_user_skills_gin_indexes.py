@@ -0,0 +1,36 @@
+"""
+Add GIN indexes on users.skills_offered and users.skills_wanted
+
+Revision ID: add_user_skills_gin_indexes
+Revises: add_user_search_trgm_indexes
+Create Date: 2025-07-21 11:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_user_skills_gin_indexes'
+down_revision = 'add_user_search_trgm_indexes'
+branch_labels = None
+depends_on = None
+
+def drop_invalid_index(name):
+    """Drop `name` if a failed concurrent build left it INVALID (IF NOT EXISTS would keep it)."""
+    invalid = op.get_bind().execute(
+        sa.text("SELECT NOT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)"), {"name": name}
+    ).scalar()
+    if invalid:
+        op.execute(f"DROP INDEX CONCURRENTLY {name}")
+
+def upgrade():
+    # Default jsonb_ops (not jsonb_path_ops): the skill filter uses ?|, which jsonb_path_ops can't serve
+    with op.get_context().autocommit_block():
+        drop_invalid_index("ix_users_skills_offered_gin")
+        op.execute("CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_users_skills_offered_gin ON users USING gin (skills_offered)")
+        drop_invalid_index("ix_users_skills_wanted_gin")
+        op.execute("CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_users_skills_wanted_gin ON users USING gin (skills_wanted)")
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_users_skills_wanted_gin")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_users_skills_offered_gin")
@@ -1,29 +1,120 @@
-# database.py: DB engine and session for PostgreSQL
-from sqlalchemy import create_engine
+# database.py: DB engines and sessions for PostgreSQL (sync psycopg2 + async asyncpg)
+# Nothing connects at import: init_db() creates the engines and checks the schema, once per
+# process. The app calls it from its lifespan; scripts call it at the top of main().
+import logging
+import os
+import re
+import threading
+from typing import Optional
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
-from app.config import DATABASE_URL
-from app.models.user import Base as UserBase
-from app.models.skill import Base as SkillBase
-from app.models.swap import Base as SwapBase
-from app.models.feedback import Base as FeedbackBase
-from app.models.badge import Base as BadgeBase
-from app.models.invite import Base as InviteBase
-
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-
-# Create all tables at startup
-UserBase.metadata.create_all(bind=engine)
-SkillBase.metadata.create_all(bind=engine)
-SwapBase.metadata.create_all(bind=engine)
-FeedbackBase.metadata.create_all(bind=engine)
-BadgeBase.metadata.create_all(bind=engine)
-InviteBase.metadata.create_all(bind=engine)
+from app.config import DATABASE_URL, ASYNC_DATABASE_URL, REPLICA_DATABASE_URLS, ASYNC_REPLICA_DATABASE_URLS
+from app.utils.replicas import ReplicaRouter, token_user_id
+from app.utils.request_metrics import instrument_engine
+
+logger = logging.getLogger(__name__)
+
+ALEMBIC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alembic")
+
+# Bound by init_db()
+engine: Optional[Engine] = None
+SessionLocal = sessionmaker(autocommit=False, autoflush=False)
+
+# Async stack for `async def` routes, so DB waits don't block the event loop.
+# expire_on_commit=False: attribute access after commit must not trigger lazy IO.
+async_engine: Optional[AsyncEngine] = None
+AsyncSessionLocal = async_sessionmaker(autoflush=False, expire_on_commit=False)
+
+# Read replicas (optional), for the read-only sessions of get_read_db / get_async_read_db.
+# The lists are filled in place by init_db(), so importers can hold on to them.
+replica_engines: list = []
+async_replica_engines: list = []
+replica_router = ReplicaRouter(len(REPLICA_DATABASE_URLS))
+
+_init_lock = threading.Lock()
+
+
+def init_db(check_schema: bool = True) -> None:
+    """
+    Create the engines, bind the session factories and (unless
+    check_schema=False) make sure the tables exist. Idempotent; the first
+    call does the work. Blocking: from async code use run_in_threadpool.
+    """
+    global engine, async_engine
+    with _init_lock:
+        if engine is not None:
+            return
+        sync_engine = create_engine(DATABASE_URL)
+        async_engine = create_async_engine(ASYNC_DATABASE_URL)
+        replica_engines[:] = [create_engine(url) for url in REPLICA_DATABASE_URLS]
+        async_replica_engines[:] = [create_async_engine(url) for url in ASYNC_REPLICA_DATABASE_URLS]
+        # Per-request statement count / DB time for Server-Timing and /metrics
+        for target in (sync_engine, async_engine.sync_engine, *replica_engines,
+                       *(e.sync_engine for e in async_replica_engines)):
+            instrument_engine(target)
+        SessionLocal.configure(bind=sync_engine)
+        AsyncSessionLocal.configure(bind=async_engine)
+        if check_schema:
+            ensure_schema(sync_engine)
+        engine = sync_engine
+
+
+_REVISION = re.compile(r"^revision(?:\s*:[^=]+)?\s*=\s*['\"]([^'\"]+)['\"]", re.M)
+_DOWN_REVISION = re.compile(r"^down_revision(?:\s*:[^=]+)?\s*=\s*(.+)$", re.M)
+
+
+def alembic_heads() -> set:
+    """
+    Head revisions of alembic/versions, read from the files' revision /
+    down_revision lines. Importing alembic and the migration modules to ask
+    it costs more than the create_all this check is meant to skip.
+    """
+    revisions, parents = set(), set()
+    for name in os.listdir(os.path.join(ALEMBIC_DIR, "versions")):
+        if not name.endswith(".py"):
+            continue
+        with open(os.path.join(ALEMBIC_DIR, "versions", name)) as fh:
+            source = fh.read()
+        revision, down = _REVISION.search(source), _DOWN_REVISION.search(source)
+        if revision:
+            revisions.add(revision.group(1))
+        if down:
+            parents.update(re.findall(r"['\"]([^'\"]+)['\"]", down.group(1)))
+    return revisions - parents
+
+
+def _alembic_at_head(bind: Engine) -> bool:
+    """True if the database is stamped with every head of alembic/versions."""
+    heads = alembic_heads()
+    with bind.connect() as conn:
+        if conn.execute(text("SELECT to_regclass('alembic_version')")).scalar() is None:
+            return False
+        current = set(conn.execute(text("SELECT version_num FROM alembic_version")).scalars())
+    return bool(heads) and current == heads
+
+
+def ensure_schema(bind: Engine) -> None:
+    """
+    Create missing tables, for databases not managed by Alembic. Skipped
+    when Alembic says the schema is at head. All models share one
+    metadata, so a single create_all covers them.
+    """
+    if _alembic_at_head(bind):
+        return
+    # Every model module, so their tables are on the metadata
+    from app.models import Base, badge, feedback, inbox, invite, match, purge, rating, skill, swap, user  # noqa: F401
+    logger.info("Schema not at the Alembic head; creating missing tables")
+    Base.metadata.create_all(bind=bind)
+
 
 # Dependency for FastAPI to get a DB session
 
-from typing import Generator
+from typing import AsyncGenerator, Generator
+from fastapi import Request
 from sqlalchemy.orm import Session
 
 def get_db() -> Generator[Session, None, None]:
@@ -37,3 +128,45 @@ def get_db() -> Generator[Session, None, None]:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Yields an AsyncSession for `async def` routes and closes it after use.
+    Sync routes keep using get_db (FastAPI runs them in a threadpool).
+    Example usage in FastAPI:
+        db: AsyncSession = Depends(get_async_db)
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def read_session(request: Request) -> Session:
+    """A new Session on the database get_read_db would use for `request`; the caller closes it."""
+    index = replica_router.pick(token_user_id(request.headers.get("authorization")))
+    return SessionLocal() if index is None else SessionLocal(bind=replica_engines[index])
+
+
+def get_read_db(request: Request) -> Generator[Session, None, None]:
+    """
+    Like get_db, but for routes that only read: the session runs on a read
+    replica when one is configured and in sync (see utils/replicas.py),
+    otherwise on the primary. A user who just wrote reads from the primary.
+        db: Session = Depends(get_read_db)
+    """
+    db = read_session(request)
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_read_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """
+    get_read_db for `async def` routes.
+        db: AsyncSession = Depends(get_async_read_db)
+    """
+    index = replica_router.pick(token_user_id(request.headers.get("authorization")))
+    db = AsyncSessionLocal() if index is None else AsyncSessionLocal(bind=async_replica_engines[index])
+    async with db:
+        yield db
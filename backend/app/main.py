@@ -1,13 +1,57 @@
 # main.py — FastAPI entry point
-from typing import List, Dict
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Depends
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import auth, users, skills, swaps, feedback, badges, invites, admin
-import asyncio
+from fastapi.responses import PlainTextResponse
+from app.routers import auth, users, skills, swaps, feedback, badges, invites, inbox, admin
+from app.ws.chat import global_chat
 from app.ws.connection import manager
-from app.utils.jwt import get_current_user_jwt
+from app.ws.pubsub import bus
+from app.database import AsyncSessionLocal, async_replica_engines, init_db, replica_router
+from app.services.purge import purge_worker
+from app.services.trending import trending_cache
+from app.services.recommender import recommender
+from app.utils.hashing import password_hasher
+from app.utils.jwt import get_user_from_token
+from app.utils.principal_cache import principal_cache
+from app.utils.replicas import ReadYourWritesMiddleware
+from app.utils.request_metrics import PROMETHEUS_CONTENT_TYPE, RequestMetricsMiddleware, render_metrics
+from app.utils.response_cache import ResponseCacheMiddleware, response_cache
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Engines and the schema check happen here, not at import
+    await run_in_threadpool(init_db)
+    # Socket delivery goes through the cross-worker bus (PUBSUB_BACKEND)
+    manager.bind(bus)
+    global_chat.bind(bus)
+    recommender.bind(bus)
+    response_cache.bind(bus)
+    principal_cache.bind(bus)
+    replica_router.bind(bus)
+    # Cached responses may be built on a replica: don't store them while one can still be behind
+    response_cache.replica_window = replica_router.window if replica_router.count else 0.0
+    await bus.start()
+    trending_cache.start(AsyncSessionLocal)
+    replica_router.start(async_replica_engines)
+    # Picks up queued purges, and ones a stopped worker left half done
+    purge_worker.start()
+    yield
+    await replica_router.stop()
+    await trending_cache.stop()
+    await bus.stop()
+    password_hasher.shutdown()
+
+
+app = FastAPI(lifespan=lifespan)
+
+# Innermost, so CORS headers are still computed per request on cache hits
+app.add_middleware(ResponseCacheMiddleware)
+# Writers read from the primary for a while (no-op without REPLICA_DATABASE_URLS)
+app.add_middleware(ReadYourWritesMiddleware, router=replica_router)
 
 # Enable CORS for frontend
 app.add_middleware(
@@ -16,7 +60,10 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Server-Timing", "ETag"],
 )
+# Outermost, so Server-Timing and the histograms cover the whole request
+app.add_middleware(RequestMetricsMiddleware)
 
 # Register all routers (modular endpoints)
 app.include_router(auth.router)
@@ -26,43 +73,71 @@ app.include_router(swaps.router)
 app.include_router(feedback.router)
 app.include_router(badges.router)
 app.include_router(invites.router)
+app.include_router(inbox.router)
 app.include_router(admin.router)
 
-# --- Global Chat Room (in-memory, demo) ---
-global_chat_connections: List[WebSocket] = []
-global_chat_history: List[dict] = []
+# Resolve ?token=JWT to a user, or close the socket
+async def _socket_user(websocket: WebSocket, token: str):
+    user = await run_in_threadpool(get_user_from_token, token) if token else None
+    if not user:
+        await websocket.close()
+    return user
+
+# WebSocket: /ws/notifications?token=JWT – personal events and announcements
+@app.websocket("/ws/notifications")
+async def notifications_ws(websocket: WebSocket, token: str = None):
+    user = await _socket_user(websocket, token)
+    if not user:
+        return
+    await manager.connect(websocket, user_id=user.id)
+    try:
+        while True:
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        manager.disconnect(websocket, user_id=user.id)
+
+# --- Global Chat Room (per worker, kept in sync through ws/pubsub.py) ---
 
 # WebSocket: /ws/global-chat?token=JWT
 @app.websocket("/ws/global-chat")
 async def global_chat_ws(websocket: WebSocket, token: str = None):
-    user = None
-    if token:
-        try:
-            user = get_current_user_jwt(token)
-        except Exception:
-            await websocket.close()
-            return
+    user = await _socket_user(websocket, token)
     if not user:
-        await websocket.close()
         return
-    global_chat_connections.append(websocket)
-    # Send chat history
-    await websocket.send_json({"type": "history", "messages": global_chat_history})
+    await websocket.accept()
+    # History and new messages are delivered by the connection's own writer task
+    global_chat.join(websocket)
     try:
         while True:
             data = await websocket.receive_json()
-            msg = {
+            await global_chat.send({
+                "type": "message",
                 "from": user.id,
-                "message": data.get("message", ""),
-                "timestamp": asyncio.get_event_loop().time()
-            }
-    except WebSocketDisconnect:
+                "message": str(data.get("message", "")) if isinstance(data, dict) else "",
+                "timestamp": time.time(),
+            })
+    except (WebSocketDisconnect, ValueError):
         pass
+    finally:
+        await global_chat.leave(websocket)
 
 # Root endpoint for health check
 @app.get("/")
 def read_root():
     return {"message": "Skill Swap API is running!"}
 
+# Prometheus scrape endpoint (this worker's numbers)
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    body = render_metrics(
+        principal_cache=principal_cache.stats(),
+        response_cache=response_cache.stats(),
+        db_replicas=replica_router.stats(),
+        websocket=manager.metrics(),
+    )
+    return PlainTextResponse(body, media_type=PROMETHEUS_CONTENT_TYPE)
+
 
 
@@ -1,7 +1,6 @@
-
 # models/badge.py
 # SQLAlchemy model for Badge
-from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy import Column, Integer, String, ForeignKey, Index, func
 
 from app.models import Base
 
@@ -11,3 +10,11 @@ class Badge(Base):
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     skill_id = Column(Integer, ForeignKey("skills.id"), nullable=True)
     badge_type = Column(String, nullable=False)  # learned, mentor, rated_5star
+
+    __table_args__ = (
+        # One badge per (user, skill, type). coalesce() so skill-less badges can't repeat either
+        # (a plain UNIQUE treats NULLs as distinct); services/badge_engine.py upserts against it.
+        Index("uq_badges_user_skill_type", user_id, func.coalesce(skill_id, 0), badge_type, unique=True),
+        # /badges/user/{id} pages by id
+        Index("ix_badges_user_id_id", user_id, id),
+    )
@@ -1,7 +1,7 @@
 
 # models/feedback.py
 # SQLAlchemy model for Feedback
-from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy import Column, Integer, String, ForeignKey, Index
 
 from app.models import Base
 
@@ -13,3 +13,9 @@ class Feedback(Base):
     to_user = Column(Integer, ForeignKey("users.id"), nullable=False)
     rating = Column(Integer, nullable=False)
     comment = Column(String, nullable=True)
+
+    __table_args__ = (
+        Index("ix_feedback_to_user", to_user),
+        Index("ix_feedback_from_user", from_user),
+        Index("ix_feedback_swap_id", swap_id),
+    )
@@ -0,0 +1,40 @@
+# models/inbox.py
+# SQLAlchemy model for the denormalized per-user inbox of swaps and invites (see services/inbox.py)
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Index, func, text
+
+from app.models import Base
+
+class InboxEntry(Base):
+    __tablename__ = "inbox_entries"
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)  # whose inbox
+    kind = Column(String, nullable=False)  # swap, invite
+    item_id = Column(Integer, nullable=False)  # swaps.id or invites.id
+    direction = Column(String, nullable=False)  # incoming (user_id received it), outgoing
+    counterpart_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    counterpart_name = Column(String, nullable=False)
+    # Skill names never change, so they are copied without an FK; swaps: skill offered / requested
+    skill_id = Column(Integer, nullable=False)
+    skill_name = Column(String, nullable=False)
+    requested_skill_id = Column(Integer, nullable=True)
+    requested_skill_name = Column(String, nullable=True)
+    status = Column(String, nullable=True)
+    message = Column(String, nullable=True)
+    scheduled_time = Column(DateTime, nullable=True)
+    rating = Column(Integer, nullable=True)
+    feedback = Column(String, nullable=True)
+    created_at = Column(DateTime, nullable=False)  # the swap's or invite's
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        # One entry per side of a swap/invite; writers update both sides through it
+        Index("uq_inbox_entries_user_kind_item_direction", user_id, kind, item_id, direction, unique=True),
+        # GET /inbox keyset pages: WHERE user_id = ? ORDER BY created_at DESC, id DESC
+        Index("ix_inbox_entries_user_id_created_at_id", user_id, created_at, id),
+        # ?kind= pages (one per dashboard list, split into incoming/outgoing by the client)
+        Index("ix_inbox_entries_user_id_kind_created_at_id", user_id, kind, created_at, id),
+        Index("ix_inbox_entries_user_id_created_at_id_pending", user_id, created_at, id,
+              postgresql_where=text("status = 'pending'")),
+        # Renames and purges find the entries that show a user as the other party
+        Index("ix_inbox_entries_counterpart_id", counterpart_id),
+    )
@@ -1,7 +1,7 @@
 
 # models/invite.py
 # SQLAlchemy model for Invite
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Index, text
 from datetime import datetime
 
 from app.models import Base
@@ -17,3 +17,10 @@ class Invite(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     rating = Column(Integer, nullable=True)
     feedback = Column(String, nullable=True)
+
+    # Same shape as the swaps indexes (see models/swap.py)
+    __table_args__ = (
+        Index("ix_invites_receiver_id_id", receiver_id, id),
+        Index("ix_invites_sender_id_id", sender_id, id),
+        Index("ix_invites_receiver_id_id_pending", receiver_id, id, postgresql_where=text("status = 'pending'")),
+    )
@@ -0,0 +1,18 @@
+# models/match.py
+# SQLAlchemy model for precomputed top-N match partners (see services/match_batch.py)
+from sqlalchemy import Column, Integer, Float, ForeignKey, DateTime, Index, func
+
+from app.models import Base
+
+class UserMatch(Base):
+    __tablename__ = "user_matches"
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    rank = Column(Integer, primary_key=True)  # 1 = best
+    match_user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    score = Column(Float, nullable=False)
+    computed_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+    # The FK's ON DELETE CASCADE (and user purges) look rows up by match_user_id
+    __table_args__ = (
+        Index("ix_user_matches_match_user_id", match_user_id),
+    )
@@ -0,0 +1,28 @@
+# models/purge.py
+# SQLAlchemy model for background user purges (see services/purge.py)
+from sqlalchemy import Column, Integer, String, DateTime, Index, func, text
+from sqlalchemy.dialects.postgresql import JSONB
+
+from app.models import Base
+
+class PurgeJob(Base):
+    __tablename__ = "purge_jobs"
+    id = Column(String(32), primary_key=True)  # uuid4 hex
+    # No FK: the user row is the last thing the job deletes
+    user_id = Column(Integer, nullable=False, index=True)
+    status = Column(String, nullable=False, default="queued")  # queued, running, done, failed
+    step = Column(String, nullable=True)  # table being purged
+    deleted = Column(JSONB, nullable=False, default=dict)  # table -> rows deleted so far
+    error = Column(String, nullable=True)
+    # The worker running it (a token per claim) and when it last recorded progress
+    claimed_by = Column(String(32), nullable=True)
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now())
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        # At most one queued or running purge per user, so at most one worker purges a user
+        Index("uq_purge_jobs_user_id_active", user_id, unique=True,
+              postgresql_where=text("status IN ('queued', 'running')")),
+    )
@@ -0,0 +1,12 @@
+# models/rating.py
+# SQLAlchemy model for per-user rating summaries (kept up to date on feedback)
+from sqlalchemy import Column, Integer, Float, ForeignKey
+
+from app.models import Base
+
+class UserRatingSummary(Base):
+    __tablename__ = "user_rating_summaries"
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    rating_count = Column(Integer, nullable=False, default=0)
+    rating_sum = Column(Integer, nullable=False, default=0)
+    rating_avg = Column(Float, nullable=True)
@@ -1,7 +1,7 @@
 
 # models/skill.py
 # SQLAlchemy models for skills and related entities
-from sqlalchemy import Column, Integer, String, ForeignKey, Enum, Table
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, Enum, Table, Index
 from sqlalchemy.orm import relationship
 import enum
 from app.models import Base
@@ -28,6 +28,13 @@ class Skill(Base):
     is_flagged = Column(Integer, default=0)
     offer_count = Column(Integer, default=0)
     request_count = Column(Integer, default=0)
+    swap_count = Column(Integer, default=0, nullable=False)
+    # Log of the forward-decayed popularity, see services/trending.py (-1e9 = no activity)
+    trend_score = Column(Float, default=-1e9, nullable=False)
+
+    __table_args__ = (
+        Index("ix_skills_trend_score", trend_score.desc()),
+    )
 
 # Association table for user skills (offered/wanted)
 class UserSkill(Base):
@@ -41,6 +48,11 @@ class UserSkill(Base):
     can_teach_remotely = Column(Integer, default=0)
     proficiency_level = Column(Enum(SkillLevel), default=SkillLevel.beginner)
 
+    # A user's skills, and the duplicate check on add (user_id, skill_id)
+    __table_args__ = (
+        Index("ix_user_skills_user_id_skill_id_type", user_id, skill_id, type),
+    )
+
 # Skill request model (for requesting a skill swap or mentorship)
 class SkillRequest(Base):
     __tablename__ = "skill_requests"
@@ -49,3 +61,7 @@ class SkillRequest(Base):
     skill_id = Column(Integer, ForeignKey("skills.id"), nullable=False)
     message = Column(String, nullable=True)
     is_active = Column(Integer, default=1)  # 1=True, 0=False
+
+    __table_args__ = (
+        Index("ix_skill_requests_user_id", user_id),
+    )
@@ -1,7 +1,7 @@
 
 # models/swap.py
 # SQLAlchemy model for Swap
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Index, text
 from datetime import datetime
 
 from app.models import Base
@@ -19,3 +19,10 @@ class Swap(Base):
     message = Column(String, nullable=True)
     rating = Column(Integer, nullable=True)
     feedback = Column(String, nullable=True)
+
+    # (user, id) serves the inbox/outbox keyset pages (WHERE user = ? ORDER BY id DESC) from the index alone
+    __table_args__ = (
+        Index("ix_swaps_receiver_id_id", receiver_id, id),
+        Index("ix_swaps_sender_id_id", sender_id, id),
+        Index("ix_swaps_receiver_id_id_pending", receiver_id, id, postgresql_where=text("status = 'pending'")),
+    )
@@ -1,7 +1,7 @@
 
 # models/user.py
 # SQLAlchemy model for User
-from sqlalchemy import Column, Integer, String, Boolean
+from sqlalchemy import Column, Integer, String, Boolean, Index, text
 from sqlalchemy.dialects.postgresql import JSONB
 
 from app.models import Base
@@ -18,3 +18,14 @@ class User(Base):
     photo_url = Column(String, nullable=True)
     skills_offered = Column(JSONB, nullable=True, default=list)
     skills_wanted = Column(JSONB, nullable=True, default=list)
+
+    # GIN (jsonb_ops) indexes serve the ?| / @> skill and category filters
+    __table_args__ = (
+        Index("ix_users_skills_offered_gin", "skills_offered", postgresql_using="gin"),
+        Index("ix_users_skills_wanted_gin", "skills_wanted", postgresql_using="gin"),
+        # /users/public?location= / ?availability= keyset pages (public profiles only, ORDER BY id)
+        Index("ix_users_public_location_id", "location", "id", postgresql_where=text("is_public")),
+        Index("ix_users_public_availability_id", "availability", "id", postgresql_where=text("is_public")),
+        # /users/locations walks this one distinct value at a time
+        Index("ix_users_location", "location"),
+    )
@@ -1,37 +1,76 @@
 
 # routers/admin.py
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from typing import List
-from app.database import get_db
+from typing import List, Optional
+from app.database import get_db, get_read_db, read_session
 from app.models.user import User
 from app.models.skill import Skill
 from app.models.swap import Swap
+from app.models.purge import PurgeJob
+from app.utils.export import ExportFormat, stream_export
+from app.utils.pagination import legacy_offset, paginate, set_next_cursor
+from app.services.skill_catalog import invalidate_category_map
+from app.services.purge import job_status, purge_worker
+from app.utils.principal_cache import principal_cache
+from app.utils.response_cache import SKILLS, response_cache
+from app.ws.connection import manager
 
 router = APIRouter()
 
 # GET /admin/users
 @router.get("/admin/users", response_model=List[dict])
-def list_users(db: Session = Depends(get_db)):
-    users = db.query(User).all()
+def list_users(
+    response: Response,
+    db: Session = Depends(get_read_db),
+    cursor: str = Query(None, description="Opaque cursor from the X-Next-Cursor header"),
+    page: Optional[int] = Query(None, ge=1, description="Legacy page number (an OFFSET scan; ignored once a cursor is given)"),
+    page_size: int = Query(100, ge=1, le=500, description="Page size"),
+):
+    users, next_cursor = paginate(db.query(User), [User.id], cursor, page_size,
+                                     offset=legacy_offset(cursor, page, page_size))
+    set_next_cursor(response, next_cursor)
     return [
         {"id": u.id, "name": u.name, "email": u.email, "is_public": u.is_public}
         for u in users
     ]
 
-# DELETE /admin/users/{id}
-@router.delete("/admin/users/{id}")
+# GET /admin/users/export?format=ndjson|csv – Every user, streamed
+@router.get("/admin/users/export")
+def export_users(
+    request: Request,
+    format: ExportFormat = Query("ndjson", description="ndjson (one JSON object per line) or csv"),
+    is_public: Optional[bool] = Query(None, description="Only public (true) or private (false) profiles"),
+):
+    statement = select(
+        User.id, User.name, User.email, User.location, User.availability, User.is_public
+    ).order_by(User.id)
+    if is_public is not None:
+        statement = statement.where(User.is_public == is_public)
+    return stream_export(lambda: read_session(request), statement, format, "users")
+
+# DELETE /admin/users/{id} – Purge the user and everything referencing them, in the background
+@router.delete("/admin/users/{id}", status_code=202)
 def delete_user(id: int, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.id == id).first()
-    if not user:
+    if db.query(User.id).filter(User.id == id).first() is None:
         raise HTTPException(status_code=404, detail="User not found")
-    db.delete(user)
-    db.commit()
-    return {"message": "User deleted"}
+    job = purge_worker.submit(db, id)
+    return {"message": "User purge queued", "job_id": job.id, "status_url": f"/admin/purge-jobs/{job.id}"}
+
+# GET /admin/purge-jobs/{job_id} – Progress of a user purge (rows deleted per table so far)
+@router.get("/admin/purge-jobs/{job_id}")
+def get_purge_job(job_id: str, db: Session = Depends(get_db)):
+    # Primary, not a replica: a job that was just queued must be found
+    job = db.get(PurgeJob, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Purge job not found")
+    return job_status(job)
 
 # GET /admin/skills/pending
 @router.get("/admin/skills/pending", response_model=List[dict])
-def list_pending_skills(db: Session = Depends(get_db)):
+def list_pending_skills(db: Session = Depends(get_read_db)):
     skills = db.query(Skill).filter(Skill.is_approved == 0).all()
     return [
         {"id": s.id, "name": s.name, "category": s.category}
@@ -46,19 +85,73 @@ def delete_skill(id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Skill not found")
     db.delete(skill)
     db.commit()
+    invalidate_category_map()
+    response_cache.invalidate(SKILLS)
     return {"message": "Skill deleted"}
 
+def _swap_filters(status: Optional[str], created_from: Optional[datetime], created_to: Optional[datetime]) -> list:
+    """WHERE conditions shared by the swap list and export; created_to is exclusive."""
+    conditions = []
+    if status:
+        conditions.append(Swap.status == status)
+    if created_from:
+        conditions.append(Swap.created_at >= created_from)
+    if created_to:
+        conditions.append(Swap.created_at < created_to)
+    return conditions
+
 # GET /admin/swaps
 @router.get("/admin/swaps", response_model=List[dict])
-def list_swaps(db: Session = Depends(get_db)):
-    swaps = db.query(Swap).all()
+def list_swaps(
+    response: Response,
+    db: Session = Depends(get_read_db),
+    cursor: str = Query(None, description="Opaque cursor from the X-Next-Cursor header"),
+    page: Optional[int] = Query(None, ge=1, description="Legacy page number (an OFFSET scan; ignored once a cursor is given)"),
+    page_size: int = Query(100, ge=1, le=500, description="Page size"),
+    status: Optional[str] = Query(None, description="Only swaps with this status"),
+    created_from: Optional[datetime] = Query(None, description="Created at or after (ISO 8601)"),
+    created_to: Optional[datetime] = Query(None, description="Created before (ISO 8601)"),
+):
+    query = db.query(Swap).filter(*_swap_filters(status, created_from, created_to))
+    swaps, next_cursor = paginate(
+        query, [Swap.id], cursor, page_size, descending=True, offset=legacy_offset(cursor, page, page_size)
+    )
+    set_next_cursor(response, next_cursor)
     return [
         {"id": s.id, "sender_id": s.sender_id, "receiver_id": s.receiver_id, "status": s.status}
         for s in swaps
     ]
 
+# GET /admin/swaps/export?format=ndjson|csv – Every matching swap, newest first, streamed
+@router.get("/admin/swaps/export")
+def export_swaps(
+    request: Request,
+    format: ExportFormat = Query("ndjson", description="ndjson (one JSON object per line) or csv"),
+    status: Optional[str] = Query(None, description="Only swaps with this status"),
+    created_from: Optional[datetime] = Query(None, description="Created at or after (ISO 8601)"),
+    created_to: Optional[datetime] = Query(None, description="Created before (ISO 8601)"),
+):
+    statement = (
+        select(Swap.id, Swap.sender_id, Swap.receiver_id, Swap.skill_offered, Swap.skill_requested,
+               Swap.status, Swap.scheduled_time, Swap.created_at, Swap.rating)
+        .where(*_swap_filters(status, created_from, created_to))
+        .order_by(Swap.id.desc())
+    )
+    return stream_export(lambda: read_session(request), statement, format, "swaps")
+
+# GET /admin/principal-cache – Hit/miss counters of the authenticated-user cache
+@router.get("/admin/principal-cache")
+def principal_cache_stats():
+    return principal_cache.stats()
+
+# GET /admin/ws-metrics – Socket counts, queue depth and dropped messages
+@router.get("/admin/ws-metrics")
+def ws_metrics():
+    return manager.metrics()
+
 # POST /admin/announcements
 @router.post("/admin/announcements")
-def create_announcement(message: str):
-    # For hackathon, just echo the message
+async def create_announcement(message: str):
+    # Queued for every connected socket; returns without waiting for delivery
+    await manager.broadcast_announcement({"type": "announcement", "message": message})
     return {"message": f"Announcement posted: {message}"}
@@ -1,21 +1,27 @@
-
 # routers/auth.py
 
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app.database import get_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db
 from app.models.user import User
 from app.schemas.user import UserCreate, UserResponse, UserLogin
-from passlib.context import CryptContext
 from jose import jwt
 from app.config import SECRET_KEY
+from app.services.search import index_user
+from app.services.recommender import match_state, recommender
+from app.utils.hashing import HashingBusyError, password_hasher
+from app.utils.principal_cache import principal_cache
+from app.utils.response_cache import USERS, response_cache
 
 router = APIRouter()
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+# 503 instead of queueing forever when a login burst saturates the hashing pool
+busy_exception = HTTPException(
+    status_code=503,
+    detail="Too many concurrent logins, please retry",
+    headers={"Retry-After": "1"},
+)
 
 
 # Explicit OPTIONS handler for CORS preflight
@@ -25,21 +31,28 @@ def options_register():
 
 # POST /auth/register – Register
 @router.post("/auth/register", response_model=UserResponse)
-def register(user: UserCreate, db: Session = Depends(get_db)):
-    existing = db.query(User).filter(User.email == user.email).first()
+async def register(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
+    existing = (await db.execute(select(User.id).where(User.email == user.email))).first()
     if existing:
         raise HTTPException(status_code=400, detail="Email already registered")
+    try:
+        password_hash = await password_hasher.hash(user.password)
+    except HashingBusyError:
+        raise busy_exception
     db_user = User(
         name=user.name,
         email=user.email,
-        password_hash=get_password_hash(user.password),
+        password_hash=password_hash,
         location=user.location,
         availability=user.availability,
         is_public=user.is_public,
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+    response_cache.invalidate(USERS)
+    index_user(db_user)
+    recommender.changed(db_user.id, None, match_state(db_user, []))
     return db_user
 
 
@@ -52,10 +65,18 @@ def options_login():
 
 # POST /auth/login – Login (returns real JWT token)
 @router.post("/auth/login")
-def login(user: UserLogin, db: Session = Depends(get_db)):
-    db_user = db.query(User).filter(User.email == user.email).first()
-    if not db_user or not pwd_context.verify(user.password, db_user.password_hash):
-        raise HTTPException(status_code=401, detail="Invalid credentials")
+async def login(user: UserLogin, db: AsyncSession = Depends(get_async_db)):
+    db_user = (await db.execute(select(User).where(User.email == user.email))).scalars().first()
+    try:
+        if not db_user or not await password_hasher.verify(user.password, db_user.password_hash):
+            raise HTTPException(status_code=401, detail="Invalid credentials")
+        # Upgrade hashes made with an older BCRYPT_ROUNDS while we have the plain password
+        if password_hasher.needs_rehash(db_user.password_hash):
+            db_user.password_hash = await password_hasher.hash(user.password)
+            await db.commit()
+            principal_cache.invalidate(db_user.id)
+    except HashingBusyError:
+        raise busy_exception
     # Return a real JWT token
     from datetime import datetime, timedelta
     payload = {
@@ -1,33 +1,60 @@
 # routers/badges.py
 # FastAPI routes for badges (skeleton)
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from app.database import get_db
+from app.database import get_async_db, get_async_read_db
 from app.models.badge import Badge
 from app.schemas.badge import BadgeCreate, BadgeResponse
+from app.utils.pagination import paginate_async, set_next_cursor
+from app.utils.response_cache import BADGES, response_cache
 
 router = APIRouter()
 
 # GET /badges/ - List all badges
 @router.get("/badges/", response_model=List[BadgeResponse])
-async def list_badges(db: Session = Depends(get_db)):
-    """Get all badges."""
-    return db.query(Badge).all()
+async def list_badges(
+    response: Response,
+    db: AsyncSession = Depends(get_async_read_db),
+    cursor: str = Query(None, description="Opaque cursor from the X-Next-Cursor header"),
+    page_size: int = Query(50, ge=1, le=200, description="Page size"),
+):
+    """Get all badges, one page at a time."""
+    badges, next_cursor = await paginate_async(db, select(Badge), [Badge.id], cursor, page_size)
+    set_next_cursor(response, next_cursor)
+    return badges
+
+response_cache.register("/badges/", BADGES)
 
 # GET /badges/user/{user_id} - List all badges for a user
 @router.get("/badges/user/{user_id}", response_model=List[BadgeResponse])
-async def list_user_badges(user_id: int, db: Session = Depends(get_db)):
-    """Get all badges for a user."""
-    return db.query(Badge).filter(Badge.user_id == user_id).all()
+async def list_user_badges(
+    user_id: int,
+    response: Response,
+    db: AsyncSession = Depends(get_async_read_db),
+    cursor: str = Query(None, description="Opaque cursor from the X-Next-Cursor header"),
+    page_size: int = Query(50, ge=1, le=200, description="Page size"),
+):
+    """Get all badges for a user, one page at a time."""
+    stmt = select(Badge).where(Badge.user_id == user_id)
+    badges, next_cursor = await paginate_async(db, stmt, [Badge.id], cursor, page_size)
+    set_next_cursor(response, next_cursor)
+    return badges
 
 # POST /badges/ - Award a badge to a user
 @router.post("/badges/", response_model=BadgeResponse)
-async def create_badge(badge: BadgeCreate, db: Session = Depends(get_db)):
-    """Award a badge to a user."""
+async def create_badge(badge: BadgeCreate, db: AsyncSession = Depends(get_async_db)):
+    """Award a badge to a user. Each (user, skill, badge type) can be awarded once."""
     db_badge = Badge(**badge.dict())
     db.add(db_badge)
-    db.commit()
-    db.refresh(db_badge)
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="Badge already awarded")
+    await db.refresh(db_badge)
+    response_cache.invalidate(BADGES)
     return db_badge
@@ -0,0 +1,72 @@
+# routers/inbox.py
+# FastAPI route for the unified inbox: swaps and invites, sent and received, in one list
+from fastapi import APIRouter, Depends, Query, Response
+from sqlalchemy.orm import Session
+from typing import List, Optional
+
+from app.database import get_read_db
+from app.models.inbox import InboxEntry
+from app.models.user import User
+from app.schemas.inbox import InboxEntryResponse
+from app.services.inbox import INCOMING, InboxDirection, InboxKind
+from app.utils.jwt import get_current_user_jwt
+from app.utils.pagination import paginate, set_next_cursor
+
+router = APIRouter(tags=["Inbox"])
+
+
+def inbox_entry(entry: InboxEntry, user: User) -> dict:
+    """An entry as the API shows it; the reader's own side comes from the principal, not the row."""
+    me, other = (user.id, user.name), (entry.counterpart_id, entry.counterpart_name)
+    (sender_id, sender_name), (receiver_id, receiver_name) = (other, me) if entry.direction == INCOMING else (me, other)
+    return {
+        "kind": entry.kind,
+        "id": entry.item_id,
+        "direction": entry.direction,
+        "sender_id": sender_id,
+        "sender_name": sender_name,
+        "receiver_id": receiver_id,
+        "receiver_name": receiver_name,
+        "skill_id": entry.skill_id,
+        "skill_name": entry.skill_name,
+        "requested_skill_id": entry.requested_skill_id,
+        "requested_skill_name": entry.requested_skill_name,
+        "status": entry.status,
+        "message": entry.message,
+        "scheduled_time": entry.scheduled_time,
+        "rating": entry.rating,
+        "feedback": entry.feedback,
+        "created_at": entry.created_at,
+        "updated_at": entry.updated_at,
+    }
+
+# GET /inbox – Everything on the dashboard, newest first, in one indexed read
+@router.get("/inbox", response_model=List[InboxEntryResponse])
+def get_inbox(
+    response: Response,
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user_jwt),
+    cursor: str = Query(None, description="Opaque cursor from the X-Next-Cursor header"),
+    page_size: int = Query(50, ge=1, le=200, description="Page size"),
+    kind: Optional[InboxKind] = Query(None, description="Only swaps or only invites"),
+    direction: Optional[InboxDirection] = Query(None, description="Only received (incoming) or sent (outgoing)"),
+    status: Optional[str] = Query(None, description="Only entries with this status, e.g. pending"),
+):
+    """
+    Swaps and invites the current user sent or received, with names and
+    skill names embedded, ordered by creation time (newest first). Served
+    from inbox_entries (kept up to date by the swap and invite writes), so
+    a page is one index range scan and no name lookups.
+    """
+    query = db.query(InboxEntry).filter(InboxEntry.user_id == current_user.id)
+    if kind:
+        query = query.filter(InboxEntry.kind == kind)
+    if direction:
+        query = query.filter(InboxEntry.direction == direction)
+    if status:
+        query = query.filter(InboxEntry.status == status)
+    entries, next_cursor = paginate(
+        query, [InboxEntry.created_at, InboxEntry.id], cursor, page_size, descending=True
+    )
+    set_next_cursor(response, next_cursor)
+    return [inbox_entry(entry, current_user) for entry in entries]
@@ -1,15 +1,17 @@
 # routers/invites.py
 # FastAPI routes for invites (skeleton)
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
 from app.database import get_db
 from app.models.invite import Invite
-from app.models.user import User
-from app.models.skill import Skill
 from app.schemas.invite import InviteCreate, InviteUpdate, InviteResponse
 from app.utils.jwt import get_current_user_jwt
+from app.services.ratings import apply_rating
+from app.services.enrichment import enrich_invite, enrich_invites
+from app.services.inbox import INVITE, add_invite, item_changed
+from app.utils.pagination import legacy_offset, paginate, set_next_cursor
 
 router = APIRouter(prefix="/invites", tags=["Invites"])
 
@@ -17,25 +19,6 @@ def get_current_user(user=Depends(get_current_user_jwt)):
     return user.id
 
 
-# Helper to enrich invite with user/skill names
-def enrich_invite(invite, db):
-    sender = db.query(User).filter_by(id=invite.sender_id).first()
-    receiver = db.query(User).filter_by(id=invite.receiver_id).first()
-    skill = db.query(Skill).filter_by(id=invite.skill_id).first()
-    return {
-        'id': invite.id,
-        'sender_id': invite.sender_id,
-        'receiver_id': invite.receiver_id,
-        'skill_id': invite.skill_id,
-        'sender_name': sender.name if sender else str(invite.sender_id),
-        'receiver_name': receiver.name if receiver else str(invite.receiver_id),
-        'skill_name': skill.name if skill else str(invite.skill_id),
-        'message': getattr(invite, 'message', None),
-        'status': invite.status,
-        'created_at': invite.created_at,
-        'rating': invite.rating,
-        'feedback': invite.feedback
-    }
 # POST /invites/{invite_id}/feedback – Submit feedback/rating for an invite
 from fastapi import Body
 @router.post("/{invite_id}/feedback", response_model=InviteResponse)
@@ -46,8 +29,10 @@ def submit_invite_feedback(invite_id: int, rating: int = Body(...), feedback: st
     # Only the sender can rate the receiver
     if invite.sender_id != current_user:
         raise HTTPException(status_code=403, detail="Only the sender can rate the receiver.")
+    apply_rating(db, invite.receiver_id, rating, previous=invite.rating)
     invite.rating = rating
     invite.feedback = feedback
+    item_changed(db, INVITE, invite)
     db.commit()
     db.refresh(invite)
     return enrich_invite(invite, db)
@@ -62,19 +47,49 @@ def create_invite(invite: InviteCreate, db: Session = Depends(get_db), current_u
         status="pending"
     )
     db.add(db_invite)
+    db.flush()
+    add_invite(db, db_invite)
     db.commit()
     db.refresh(db_invite)
     return enrich_invite(db_invite, db)
 
 @router.get("/incoming", response_model=List[InviteResponse])
-def get_incoming_invites(db: Session = Depends(get_db), current_user: int = Depends(get_current_user)):
-    invites = db.query(Invite).filter(Invite.receiver_id == current_user).all()
-    return [enrich_invite(i, db) for i in invites]
+def get_incoming_invites(
+    response: Response,
+    db: Session = Depends(get_db),
+    current_user: int = Depends(get_current_user),
+    cursor: str = Query(None, description="Opaque cursor from the X-Next-Cursor header"),
+    page: Optional[int] = Query(None, ge=1, description="Legacy page number (an OFFSET scan; ignored once a cursor is given)"),
+    page_size: int = Query(50, ge=1, le=200, description="Page size"),
+    status: Optional[str] = Query(None, description="Only invites with this status, e.g. pending"),
+):
+    query = db.query(Invite).filter(Invite.receiver_id == current_user)
+    if status:
+        query = query.filter(Invite.status == status)
+    invites, next_cursor = paginate(
+        query, [Invite.id], cursor, page_size, descending=True, offset=legacy_offset(cursor, page, page_size)
+    )
+    set_next_cursor(response, next_cursor)
+    return enrich_invites(invites, db)
 
 @router.get("/outgoing", response_model=List[InviteResponse])
-def get_outgoing_invites(db: Session = Depends(get_db), current_user: int = Depends(get_current_user)):
-    invites = db.query(Invite).filter(Invite.sender_id == current_user).all()
-    return [enrich_invite(i, db) for i in invites]
+def get_outgoing_invites(
+    response: Response,
+    db: Session = Depends(get_db),
+    current_user: int = Depends(get_current_user),
+    cursor: str = Query(None, description="Opaque cursor from the X-Next-Cursor header"),
+    page: Optional[int] = Query(None, ge=1, description="Legacy page number (an OFFSET scan; ignored once a cursor is given)"),
+    page_size: int = Query(50, ge=1, le=200, description="Page size"),
+    status: Optional[str] = Query(None, description="Only invites with this status, e.g. pending"),
+):
+    query = db.query(Invite).filter(Invite.sender_id == current_user)
+    if status:
+        query = query.filter(Invite.status == status)
+    invites, next_cursor = paginate(
+        query, [Invite.id], cursor, page_size, descending=True, offset=legacy_offset(cursor, page, page_size)
+    )
+    set_next_cursor(response, next_cursor)
+    return enrich_invites(invites, db)
 
 @router.put("/{invite_id}", response_model=InviteResponse)
 def update_invite_status(invite_id: int, update: InviteUpdate, db: Session = Depends(get_db), current_user: int = Depends(get_current_user)):
@@ -82,6 +97,7 @@ def update_invite_status(invite_id: int, update: InviteUpdate, db: Session = Dep
     if not invite:
         raise HTTPException(status_code=404, detail="Invite not found")
     invite.status = update.status
+    item_changed(db, INVITE, invite)
     db.commit()
     db.refresh(invite)
     return enrich_invite(invite, db)
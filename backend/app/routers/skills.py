@@ -4,112 +4,127 @@ from fastapi import Query
 # routers/skills.py
 # FastAPI routes for skills
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
-from app.database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from app.database import get_async_db, get_async_read_db
 from app.models.skill import Skill, UserSkill
 from app.models.user import User
-from app.schemas.skill import SkillCreate, SkillResponse, UserSkillCreate, UserSkillResponse
-from app.utils.auth import get_current_user
+from app.schemas.skill import SkillCreate, SkillResponse, TrendingSkillResponse, UserSkillCreate, UserSkillResponse
+from app.utils.jwt import get_current_user_jwt
+from app.utils.pagination import legacy_offset, paginate_async, set_next_cursor
+from app.utils.response_cache import SKILLS, response_cache
+from app.services.skill_catalog import invalidate_category_map
+from app.services.trending import trending_cache, user_skill_changed
+from app.services.recommender import match_state, recommender, user_skill_rows
+from app.config import TRENDING_TOP_K
 
 router = APIRouter()
 
 
 # GET /skills/trending - List top trending skills
-@router.get("/skills/trending", response_model=List[SkillResponse])
+@router.get("/skills/trending", response_model=List[TrendingSkillResponse])
 async def get_trending_skills(
-    db: Session = Depends(get_db),
-    limit: int = Query(5, description="Number of trending skills to return")
+    db: AsyncSession = Depends(get_async_read_db),
+    limit: int = Query(5, ge=1, le=TRENDING_TOP_K, description="Number of trending skills to return")
 ):
-    """Get top trending skills based on offer_count + request_count."""
-    trending = (
-        db.query(Skill)
-        .order_by((Skill.offer_count + Skill.request_count).desc())
-        .limit(limit)
-        .all()
-    )
-    return trending
+    """Get top trending skills by time-decayed activity, from the in-process top-K."""
+    skills = trending_cache.get(limit)
+    if skills is None:
+        # Only before the background refresh has loaded it once
+        await trending_cache.refresh(db)
+        skills = trending_cache.get(limit)
+    return skills
 
 
 # GET /skills/categories - List all unique skill categories
 @router.get("/skills/categories", response_model=List[str])
-async def list_skill_categories(db: Session = Depends(get_db)):
+async def list_skill_categories(db: AsyncSession = Depends(get_async_read_db)):
     """Get all unique skill categories."""
-    categories = db.query(Skill.category).distinct().all()
-    return [c[0] for c in categories if c[0]]
+    categories = await db.execute(select(Skill.category).distinct())
+    return [c for c in categories.scalars() if c]
+
+response_cache.register("/skills/categories", SKILLS)
 
 # GET /skills/ - List all skills
 @router.get("/skills/", response_model=List[SkillResponse])
-async def list_skills(db: Session = Depends(get_db)):
-    """Get all skills."""
-    return db.query(Skill).all()
+async def list_skills(
+    response: Response,
+    db: AsyncSession = Depends(get_async_read_db),
+    cursor: str = Query(None, description="Opaque cursor from the X-Next-Cursor header"),
+    page: Optional[int] = Query(None, ge=1, description="Legacy page number (an OFFSET scan; ignored once a cursor is given)"),
+    page_size: int = Query(200, ge=1, le=500, description="Page size"),
+):
+    """Get all skills, one page at a time."""
+    skills, next_cursor = await paginate_async(
+        db, select(Skill), [Skill.id], cursor, page_size, offset=legacy_offset(cursor, page, page_size)
+    )
+    set_next_cursor(response, next_cursor)
+    return skills
+
+response_cache.register("/skills/", SKILLS)
 
 # POST /skills/ - Create a new skill
 @router.post("/skills/", response_model=SkillResponse)
-async def create_skill(skill: SkillCreate, db: Session = Depends(get_db)):
+async def create_skill(skill: SkillCreate, db: AsyncSession = Depends(get_async_db)):
     """Create a new skill."""
-    existing = db.query(Skill).filter(Skill.name.ilike(skill.name)).first()
+    existing = (await db.execute(select(Skill).where(Skill.name.ilike(skill.name)))).scalars().first()
     if existing:
         raise HTTPException(status_code=400, detail="Skill already exists")
     db_skill = Skill(**skill.dict())
     db.add(db_skill)
-    db.commit()
-    db.refresh(db_skill)
+    await db.commit()
+    await db.refresh(db_skill)
+    invalidate_category_map()
+    response_cache.invalidate(SKILLS)
     return db_skill
 
 # POST /users/me/skills - Add a skill to the current user
 @router.post("/users/me/skills", response_model=UserSkillResponse)
 async def add_user_skill(
     user_skill: UserSkillCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_jwt)
 ):
     """Add a skill to the current user."""
-    skill = db.query(Skill).filter(Skill.id == user_skill.skill_id).first()
+    skill = await db.get(Skill, user_skill.skill_id)
     if not skill:
         raise HTTPException(status_code=404, detail="Skill not found")
-    existing = db.query(UserSkill).filter(
+    existing = (await db.execute(select(UserSkill).where(
         UserSkill.user_id == current_user.id,
         UserSkill.skill_id == user_skill.skill_id
-    ).first()
+    ))).scalars().first()
     if existing:
         raise HTTPException(status_code=400, detail="Skill already added")
+    old_state = match_state(current_user, (await db.execute(user_skill_rows(current_user.id))).all())
     db_user_skill = UserSkill(user_id=current_user.id, **user_skill.dict())
     db.add(db_user_skill)
-    db.commit()
-    db.refresh(db_user_skill)
+    await db.execute(user_skill_changed(skill.id, user_skill.type, added=True))
+    await db.commit()
+    await db.refresh(db_user_skill)
+    new_state = match_state(current_user, (await db.execute(user_skill_rows(current_user.id))).all())
+    recommender.changed(current_user.id, old_state, new_state)
     return db_user_skill
 
 # DELETE /users/me/skills/{id} - Remove a skill from the current user
 @router.delete("/users/me/skills/{id}")
 async def remove_user_skill(
     id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_jwt)
 ):
     """Remove a skill from the current user."""
-    user_skill = db.query(UserSkill).filter(
+    user_skill = (await db.execute(select(UserSkill).where(
         UserSkill.id == id,
         UserSkill.user_id == current_user.id
-    ).first()
+    ))).scalars().first()
     if not user_skill:
         raise HTTPException(status_code=404, detail="User skill not found")
-    db.delete(user_skill)
-    db.commit()
+    old_state = match_state(current_user, (await db.execute(user_skill_rows(current_user.id))).all())
+    await db.delete(user_skill)
+    await db.execute(user_skill_changed(user_skill.skill_id, user_skill.type, added=False))
+    await db.commit()
+    new_state = match_state(current_user, (await db.execute(user_skill_rows(current_user.id))).all())
+    recommender.changed(current_user.id, old_state, new_state)
     return {"message": "Skill removed from user"}
-   
-    query = db.query(UserSkill).filter(
-        UserSkill.skill_id.in_(skill_ids),
-        UserSkill.user_id != current_user.id,  # Exclude self
-        UserSkill.is_approved == True
-    )
-    
-    if level:
-        query = query.filter(UserSkill.proficiency_level == level)
-    
-    if remote_only:
-        query = query.filter(UserSkill.can_teach_remotely == True)
-    
-    matches = query.offset(skip).limit(limit).all()
-    return matches
@@ -1,16 +1,21 @@
 
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
 from app.database import get_db
 from app.models.swap import Swap
-from app.models.user import User
-from app.models.skill import Skill
 from app.schemas.swap import SwapCreate, SwapUpdate, SwapResponse, SwapDetailResponse
 from fastapi import Body
 from app.utils.jwt import get_current_user_jwt
+from app.services.ratings import apply_rating
+from app.services.badge_engine import award_swap_badges
+from app.services.trending import swap_created
+from app.services.enrichment import enrich_swap, enrich_swaps
+from app.services.inbox import SWAP, add_swap, item_changed
+from app.utils.pagination import legacy_offset, paginate, set_next_cursor
+from app.utils.response_cache import BADGES, response_cache
 
 router = APIRouter(prefix="/swaps", tags=["Swaps"])
 
@@ -36,57 +41,70 @@ def create_swap(
         message=getattr(swap, "message", None)
     )
     db.add(db_swap)
+    db.execute(swap_created([swap.skill_offered, swap.skill_requested]))
+    db.flush()
+    add_swap(db, db_swap)
     db.commit()
     db.refresh(db_swap)
     return db_swap
 
 
-# Helper to enrich swap with user/skill names
-def enrich_swap(swap, db):
-    sender = db.query(User).filter_by(id=swap.sender_id).first()
-    receiver = db.query(User).filter_by(id=swap.receiver_id).first()
-    skill_offered = db.query(Skill).filter_by(id=swap.skill_offered).first()
-    skill_requested = db.query(Skill).filter_by(id=swap.skill_requested).first()
-    return {
-        'id': swap.id,
-        'sender_id': swap.sender_id,
-        'receiver_id': swap.receiver_id,
-        'sender_name': sender.name if sender else str(swap.sender_id),
-        'receiver_name': receiver.name if receiver else str(swap.receiver_id),
-        'skill_offered': swap.skill_offered,
-        'skill_offered_name': skill_offered.name if skill_offered else str(swap.skill_offered),
-        'skill_requested': swap.skill_requested,
-        'skill_requested_name': skill_requested.name if skill_requested else str(swap.skill_requested),
-        'status': swap.status,
-        'scheduled_time': swap.scheduled_time,
-        'created_at': swap.created_at,
-        'message': getattr(swap, 'message', None),
-        'rating': swap.rating,
-        'feedback': swap.feedback
-    }
 # POST /swaps/{swap_id}/feedback – Submit feedback/rating for a swap
 @router.post("/{swap_id}/feedback", response_model=SwapResponse)
 def submit_swap_feedback(swap_id: int, rating: int = Body(...), feedback: str = Body(""), db: Session = Depends(get_db), current_user: int = Depends(get_current_user)):
     swap = db.query(Swap).filter(Swap.id == swap_id).first()
     if not swap:
         raise HTTPException(status_code=404, detail="Swap not found")
+    apply_rating(db, swap.receiver_id, rating, previous=swap.rating)
     swap.rating = rating
     swap.feedback = feedback
+    item_changed(db, SWAP, swap)
+    awarded = award_swap_badges(db, swap)
     db.commit()
+    if awarded:
+        response_cache.invalidate(BADGES)
     db.refresh(swap)
     return enrich_swap(swap, db)
 
 # GET /swaps/incoming – List incoming swap requests
 @router.get("/incoming", response_model=List[SwapDetailResponse])
-def get_incoming_swaps(db: Session = Depends(get_db), current_user: int = Depends(get_current_user)):
-    swaps = db.query(Swap).filter(Swap.receiver_id == current_user).all()
-    return [enrich_swap(s, db) for s in swaps]
+def get_incoming_swaps(
+    response: Response,
+    db: Session = Depends(get_db),
+    current_user: int = Depends(get_current_user),
+    cursor: str = Query(None, description="Opaque cursor from the X-Next-Cursor header"),
+    page: Optional[int] = Query(None, ge=1, description="Legacy page number (an OFFSET scan; ignored once a cursor is given)"),
+    page_size: int = Query(50, ge=1, le=200, description="Page size"),
+    status: Optional[str] = Query(None, description="Only swaps with this status, e.g. pending"),
+):
+    query = db.query(Swap).filter(Swap.receiver_id == current_user)
+    if status:
+        query = query.filter(Swap.status == status)
+    swaps, next_cursor = paginate(
+        query, [Swap.id], cursor, page_size, descending=True, offset=legacy_offset(cursor, page, page_size)
+    )
+    set_next_cursor(response, next_cursor)
+    return enrich_swaps(swaps, db)
 
 # GET /swaps/outgoing – List outgoing swap requests
 @router.get("/outgoing", response_model=List[SwapDetailResponse])
-def get_outgoing_swaps(db: Session = Depends(get_db), current_user: int = Depends(get_current_user)):
-    swaps = db.query(Swap).filter(Swap.sender_id == current_user).all()
-    return [enrich_swap(s, db) for s in swaps]
+def get_outgoing_swaps(
+    response: Response,
+    db: Session = Depends(get_db),
+    current_user: int = Depends(get_current_user),
+    cursor: str = Query(None, description="Opaque cursor from the X-Next-Cursor header"),
+    page: Optional[int] = Query(None, ge=1, description="Legacy page number (an OFFSET scan; ignored once a cursor is given)"),
+    page_size: int = Query(50, ge=1, le=200, description="Page size"),
+    status: Optional[str] = Query(None, description="Only swaps with this status, e.g. pending"),
+):
+    query = db.query(Swap).filter(Swap.sender_id == current_user)
+    if status:
+        query = query.filter(Swap.status == status)
+    swaps, next_cursor = paginate(
+        query, [Swap.id], cursor, page_size, descending=True, offset=legacy_offset(cursor, page, page_size)
+    )
+    set_next_cursor(response, next_cursor)
+    return enrich_swaps(swaps, db)
 
 # PUT /swaps/{swap_id} – Update swap status
 @router.put("/{swap_id}", response_model=SwapResponse)
@@ -95,6 +113,10 @@ def update_swap_status(swap_id: int, update: SwapUpdate, db: Session = Depends(g
     if not swap:
         raise HTTPException(status_code=404, detail="Swap not found")
     swap.status = update.status
+    item_changed(db, SWAP, swap)
+    awarded = award_swap_badges(db, swap)
     db.commit()
+    if awarded:
+        response_cache.invalidate(BADGES)
     db.refresh(swap)
     return swap
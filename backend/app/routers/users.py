@@ -1,31 +1,52 @@
 
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
 from typing import List
 
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models.user import User
+from app.models.rating import UserRatingSummary
+from app.schemas.skill import SkillLevel
 from app.schemas.user import UserUpdate, UserResponse
+from app.services.inbox import user_renamed
+from app.services.ratings import display_rating
+from app.services.recommender import match_state, recommender, user_skill_rows
+from app.services.search import index_user, search_users
+from app.services.skill_catalog import category_skill_names, has_any_skill
+from app.utils.pagination import decode_cursor, encode_cursor, paginate, set_next_cursor
 from app.utils.jwt import get_current_user_jwt
+from app.utils.principal_cache import principal_cache
+from app.utils.response_cache import USERS, response_cache
 
 # Set a prefix for all user-related endpoints
 router = APIRouter(prefix="/users", tags=["users"])
 
 
-from sqlalchemy import distinct
+from sqlalchemy import func, select
 
 # GET /users/locations – List all unique user locations
 @router.get("/locations", response_model=List[str])
-def list_user_locations(db: Session = Depends(get_db)):
-    """Get all unique user locations."""
-    locations = db.query(distinct(User.location)).all()
-    return [l[0] for l in locations if l[0]]
+def list_user_locations(db: Session = Depends(get_read_db)):
+    """
+    Get all unique user locations. A loose index scan: each step of the
+    recursive CTE jumps to the next location in ix_users_location, so it
+    costs one index probe per distinct location instead of a DISTINCT over
+    every user.
+    """
+    locations = select(func.min(User.location).label("location")).cte("locations", recursive=True)
+    following = select(func.min(User.location)).where(User.location > locations.c.location).scalar_subquery()
+    locations = locations.union_all(select(following).where(locations.c.location.isnot(None)))
+    rows = db.execute(select(locations.c.location).where(locations.c.location.isnot(None))).scalars()
+    return [location for location in rows if location]
+
+response_cache.register("/users/locations", USERS)
 
 # GET /users/public – List public profiles with search, filter, pagination
 @router.get("/public", response_model=List[UserResponse])
 def list_public_profiles(
-    db: Session = Depends(get_db),
+    response: Response,
+    db: Session = Depends(get_read_db),
     search: str = Query(None, description="Search by name/email"),
     availability: str = Query(None, description="Filter by availability"),
     location: str = Query(None, description="Filter by location"),
@@ -33,65 +54,59 @@ def list_public_profiles(
     category: str = Query(None, description="Filter by skill category (offered or wanted)"),
     page: int = Query(1, ge=1, description="Page number"),
     page_size: int = Query(10, ge=1, le=50, description="Page size"),
+    cursor: str = Query(None, description="Opaque cursor from the X-Next-Cursor header (replaces page)"),
 ):
     """
     List public user profiles with optional search, filter, and pagination.
+    When more rows exist the response carries an X-Next-Cursor header;
+    passing it back as `cursor` fetches the next page without an OFFSET scan. Searches are
+    ranked by relevance instead, so they are paged with `page` only.
     Example: /users/public?search=alice&page=2&page_size=5
     """
-    query = db.query(User).filter(User.is_public == True)
-    if search:
-        query = query.filter((User.name.ilike(f"%{search}%")) | (User.email.ilike(f"%{search}%")))
+    query = (
+        db.query(User, UserRatingSummary.rating_avg)
+        .outerjoin(UserRatingSummary, UserRatingSummary.user_id == User.id)
+        .filter(User.is_public == True)
+    )
     if availability:
         query = query.filter(User.availability == availability)
     if location:
         query = query.filter(User.location == location)
     if skill:
         # skills_offered and skills_wanted are arrays of strings (JSONB)
-        query = query.filter(
-            (User.skills_offered != None) & (User.skills_offered.contains([skill])) |
-            (User.skills_wanted != None) & (User.skills_wanted.contains([skill]))
-        )
+        query = query.filter(has_any_skill([skill]))
     if category:
-        from app.models.skill import Skill
-        from sqlalchemy import or_
-        # Get all skill names in this category
-        skill_names = [s.name for s in db.query(Skill).filter(Skill.category == category).all()]
+        # Skill names per category come from an in-process map, not a query per request
+        skill_names = category_skill_names(db, category)
         if skill_names:
-            # For JSONB, use .contains([name]) for each skill name, combine with or_
-            query = query.filter(
-                (User.skills_offered != None) & (
-                    or_(*[User.skills_offered.contains([name]) for name in skill_names])
-                ) |
-                (User.skills_wanted != None) & (
-                    or_(*[User.skills_wanted.contains([name]) for name in skill_names])
-                )
-            )
-    profiles = query.offset((page - 1) * page_size).limit(page_size).all()
-
-    # Calculate average rating for each user from invites and swaps where user is receiver
-    from app.models.invite import Invite
-    from app.models.swap import Swap
+            query = query.filter(has_any_skill(skill_names))
+    if search:
+        query = search_users(db, query, search)
+        rows = query.offset((page - 1) * page_size).limit(page_size).all()
+    else:
+        # Legacy page numbers still work (ignored once a cursor is given), but cost an OFFSET scan
+        offset = 0 if cursor else (page - 1) * page_size
+        rows, next_cursor = paginate(query, [User.id], cursor, page_size, entity=lambda row: row[0], offset=offset)
+        set_next_cursor(response, next_cursor)
+
+    # Average rating comes from the maintained summary row (see services/ratings.py)
     result = []
-    for user in profiles:
-        # Get all ratings where user is receiver
-        invite_ratings = db.query(Invite.rating).filter(Invite.receiver_id == user.id, Invite.rating != None).all()
-        swap_ratings = db.query(Swap.rating).filter(Swap.receiver_id == user.id, Swap.rating != None).all()
-        ratings = [r[0] for r in invite_ratings + swap_ratings if r[0] is not None]
-        user.rating = round(sum(ratings) / len(ratings), 2) if ratings else None
+    for user, rating_avg in rows:
+        user.rating = display_rating(rating_avg)
         result.append(user)
     return result
 
 
-
-
 # Real dependency for current user using JWT
 get_current_user = get_current_user_jwt
 
 
 # GET /users/me – My profile
 @router.get("/me", response_model=UserResponse)
-def get_my_profile(current_user: User = Depends(get_current_user)):
+def get_my_profile(db: Session = Depends(get_read_db), current_user: User = Depends(get_current_user)):
     """Get the current user's profile."""
+    rating_avg = db.query(UserRatingSummary.rating_avg).filter(UserRatingSummary.user_id == current_user.id).scalar()
+    current_user.rating = display_rating(rating_avg)
     return current_user
 
 
@@ -103,18 +118,79 @@ def update_my_profile(
     current_user: User = Depends(get_current_user)
 ):
     """Update the current user's profile."""
+    # The principal may be a cached copy: diff against the row as it is now, locked until commit,
+    # or the recommender would never remove keys another worker's update added
+    fresh = db.query(User).filter(User.id == current_user.id).populate_existing().with_for_update().first()
+    if fresh is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    skill_rows = db.execute(user_skill_rows(current_user.id)).all()
+    old_state = match_state(current_user, skill_rows)
+    old_name = current_user.name
     for field, value in update.dict(exclude_unset=True).items():
         setattr(current_user, field, value)
+    if current_user.name and current_user.name != old_name:
+        user_renamed(db, current_user.id, current_user.name)
     db.commit()
     db.refresh(current_user)
+    principal_cache.invalidate(current_user.id)
+    response_cache.invalidate(USERS)
+    index_user(current_user)
+    recommender.changed(current_user.id, old_state, match_state(current_user, skill_rows))
     return current_user
 
 
+# GET /users/me/matches – Reciprocal skill matches
+@router.get("/me/matches", response_model=List[UserResponse])
+def get_my_matches(
+    response: Response,
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user),
+    level: SkillLevel = Query(None, description="Only partners who offer the skill at this level"),
+    remote_only: bool = Query(False, description="Only partners who can teach remotely"),
+    cursor: str = Query(None, description="Opaque cursor from the X-Next-Cursor header"),
+    page_size: int = Query(20, ge=1, le=100, description="Page size"),
+):
+    """
+    Public users who offer a skill I want and want a skill I offer, by user id.
+    Served from the in-memory index in services/recommender.py; only the
+    returned page is read from the database.
+    """
+    recommender.ensure_loaded(db)
+    state = match_state(current_user, db.execute(user_skill_rows(current_user.id)).all())
+    after = decode_cursor(cursor, [int])[0] if cursor else -1
+    ids, has_more = recommender.matches(
+        state, current_user.id, level=level.value if level else None,
+        remote_only=remote_only, after=after, limit=page_size,
+    )
+    set_next_cursor(response, encode_cursor([ids[-1]]) if has_more else None)
+    if not ids:
+        return []
+    rows = (
+        db.query(User, UserRatingSummary.rating_avg)
+        .outerjoin(UserRatingSummary, UserRatingSummary.user_id == User.id)
+        .filter(User.id.in_(ids))
+        .order_by(User.id)
+        .all()
+    )
+    users = []
+    for user, rating_avg in rows:
+        user.rating = display_rating(rating_avg)
+        users.append(user)
+    return users
+
+
 # GET /users/{id} – View public profile
 @router.get("/{id}", response_model=UserResponse)
-def get_user_profile(id: int, db: Session = Depends(get_db)):
+def get_user_profile(id: int, db: Session = Depends(get_read_db)):
     """Get a public user profile by user ID."""
-    user = db.query(User).filter(User.id == id, User.is_public == True).first()
-    if not user:
+    row = (
+        db.query(User, UserRatingSummary.rating_avg)
+        .outerjoin(UserRatingSummary, UserRatingSummary.user_id == User.id)
+        .filter(User.id == id, User.is_public == True)
+        .first()
+    )
+    if not row:
         raise HTTPException(status_code=404, detail="User not found or not public")
+    user, rating_avg = row
+    user.rating = display_rating(rating_avg)
     return user
@@ -0,0 +1,24 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel
+
+class InboxEntryResponse(BaseModel):
+    kind: str  # swap, invite
+    id: int  # the swap's or invite's id
+    direction: str  # incoming, outgoing
+    sender_id: int
+    sender_name: str
+    receiver_id: int
+    receiver_name: str
+    skill_id: int  # swaps: the skill offered
+    skill_name: str
+    requested_skill_id: Optional[int] = None  # swaps only
+    requested_skill_name: Optional[str] = None
+    status: Optional[str] = None
+    message: Optional[str] = None
+    scheduled_time: Optional[datetime] = None
+    rating: Optional[int] = None
+    feedback: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
@@ -73,3 +73,9 @@ class SkillResponse(SkillBase):
     id: int
     class Config:
         orm_mode = True
+
+class TrendingSkillResponse(SkillResponse):
+    offer_count: int = 0
+    request_count: int = 0
+    swap_count: int = 0
+    score: float = 0.0
@@ -0,0 +1,18 @@
+# Script to award the badges earned by existing swaps (learned, mentor, rated_5star)
+# Run: python backend/app/scripts/backfill_badges.py
+
+from app.database import SessionLocal, init_db
+from app.services.badge_engine import backfill_badges
+
+
+def main():
+    init_db()
+    db = SessionLocal()
+    try:
+        added = backfill_badges(db)
+        print(f"Awarded {added} badges.")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
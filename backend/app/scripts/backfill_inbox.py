@@ -0,0 +1,18 @@
+# Script to (re)build inbox_entries from the existing swaps and invites
+# Run: python backend/app/scripts/backfill_inbox.py
+
+from app.database import SessionLocal, init_db
+from app.services.inbox import backfill_inbox
+
+
+def main():
+    init_db()
+    db = SessionLocal()
+    try:
+        written = backfill_inbox(db)
+        print(f"Wrote {written} inbox entries.")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,18 @@
+# Script to (re)build user_rating_summaries from existing swap/invite ratings
+# Run: python backend/app/scripts/backfill_rating_summaries.py
+
+from app.database import SessionLocal, init_db
+from app.services.ratings import backfill_rating_summaries
+
+
+def main():
+    init_db()
+    db = SessionLocal()
+    try:
+        total = backfill_rating_summaries(db)
+        print(f"Backfilled rating summaries for {total} users.")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
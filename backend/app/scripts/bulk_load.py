@@ -0,0 +1,284 @@
+# Bulk-load a large synthetic dataset for load testing: skills, users, user_skills, swaps, invites,
+# then rating summaries, badges and inbox entries derived from them
+# Run: python backend/app/scripts/bulk_load.py --users 1000000 [--skills 10000] [--seed 42] [--truncate]
+#
+# Skill popularity is Zipfian and user activity (swaps/invites sent and received) follows a power
+# law, so a few skills and users dominate like in real data. The same --seed gives the same data.
+# Everything is generated with numpy and written with COPY (executemany on non-psycopg2 drivers).
+
+import argparse
+import csv
+import io
+import itertools
+import json
+import time
+
+import numpy as np
+from sqlalchemy import insert, text
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal, init_db
+from app.models.invite import Invite
+from app.models.skill import Skill, SkillLevel, UserSkill
+from app.models.swap import Swap
+from app.models.user import User
+from app.seed_data import AVAILABILITY, LOCATIONS, NAMES, PASSWORD, SKILLS
+from app.services.badge_engine import backfill_badges
+from app.services.inbox import backfill_inbox
+from app.services.ratings import backfill_rating_summaries
+from app.services.trending import DECAY_RATE, EPOCH, NO_SCORE, SWAP_WEIGHT, USER_SKILL_WEIGHT
+from app.utils.hashing import hash_password_sync
+
+LEVELS = [level.value for level in SkillLevel]
+SWAP_STATUSES = (["pending", "accepted", "rejected", "completed"], [0.25, 0.2, 0.1, 0.45])
+INVITE_STATUSES = (["pending", "accepted", "rejected"], [0.4, 0.45, 0.15])
+# Ratings skew high, as they do on most platforms
+RATINGS = ([1, 2, 3, 4, 5], [0.03, 0.05, 0.12, 0.35, 0.45])
+
+
+def zipf(n: int, exponent: float) -> np.ndarray:
+    """Probabilities proportional to 1 / rank^exponent."""
+    weights = 1.0 / np.arange(1, n + 1) ** exponent
+    return weights / weights.sum()
+
+
+def user_skill_pairs(rng, n_users: int, per_user: int, popularity: np.ndarray):
+    """1..per_user distinct Zipf-drawn skills per user, as (user index, skill index) sorted by user."""
+    counts = rng.integers(1, per_user + 1, size=n_users)
+    owners = np.repeat(np.arange(n_users, dtype=np.int64), counts)
+    keys = np.unique(owners * len(popularity) + rng.choice(len(popularity), size=len(owners), p=popularity))
+    return keys // len(popularity), keys % len(popularity)
+
+
+def pick_owned(rng, owners: np.ndarray, skills: np.ndarray, n_users: int, who: np.ndarray) -> np.ndarray:
+    """One random skill out of each `who` user's (owners, skills) list."""
+    starts = np.searchsorted(owners, np.arange(n_users))
+    counts = np.bincount(owners, minlength=n_users)
+    return skills[starts[who] + (rng.random(len(who)) * counts[who]).astype(np.int64)]
+
+
+def pairs_by_activity(rng, n: int, activity: np.ndarray):
+    """`n` (sender, receiver) user indexes, both drawn by activity, never the same user."""
+    senders = rng.choice(len(activity), size=n, p=activity)
+    receivers = rng.choice(len(activity), size=n, p=activity)
+    same = senders == receivers
+    receivers[same] = (receivers[same] + 1) % len(activity)
+    return senders, receivers
+
+
+def timestamps(seconds: np.ndarray) -> np.ndarray:
+    """Unix seconds -> ISO strings Postgres accepts, vectorized."""
+    return seconds.astype("datetime64[s]").astype(str)
+
+
+def copy_rows(db: Session, table, columns, rows, batch_size: int) -> int:
+    """
+    Load an iterable of tuples into `table` `batch_size` rows at a time:
+    COPY ... FORMAT csv on psycopg2 (None -> NULL), executemany otherwise.
+    """
+    connection = db.connection()
+    use_copy = connection.dialect.driver == "psycopg2"
+    sql = f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)"
+    total = 0
+    rows = iter(rows)
+    while True:
+        batch = list(itertools.islice(rows, batch_size))
+        if not batch:
+            return total
+        if use_copy:
+            buffer = io.StringIO()
+            csv.writer(buffer).writerows(batch)
+            buffer.seek(0)
+            cursor = connection.connection.cursor()
+            cursor.copy_expert(sql, buffer)
+            cursor.close()
+        else:
+            db.execute(insert(table), [dict(zip(columns, row)) for row in batch])
+        total += len(batch)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-load a synthetic dataset for load testing")
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--skills", type=int, default=5_000)
+    parser.add_argument("--per-user", type=int, default=5, help="max skills offered (and wanted) per user")
+    parser.add_argument("--swaps-per-user", type=float, default=3.0, help="average swaps per user")
+    parser.add_argument("--invites-per-user", type=float, default=1.0, help="average invites per user")
+    parser.add_argument("--skill-exponent", type=float, default=1.0, help="Zipf exponent of skill popularity")
+    parser.add_argument("--activity-exponent", type=float, default=1.5, help="Pareto shape of user activity")
+    parser.add_argument("--days", type=int, default=365, help="spread swaps/invites over this many days")
+    parser.add_argument("--batch-size", type=int, default=50_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--truncate", action="store_true", help="delete all users, skills and their data first")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    init_db()
+    db = SessionLocal()
+    started = time.perf_counter()
+
+    def log(message):
+        print(f"[{time.perf_counter() - started:7.1f}s] {message}", flush=True)
+
+    try:
+        if args.truncate:
+            db.execute(text("TRUNCATE users, skills RESTART IDENTITY CASCADE"))
+            db.commit()
+        # Append after whatever is there: explicit ids, sequences moved past them at the end
+        user_base = db.execute(text("SELECT coalesce(max(id), 0) FROM users")).scalar()
+        skill_base = db.execute(text("SELECT coalesce(max(id), 0) FROM skills")).scalar()
+        n_users, n_skills = args.users, args.skills
+        user_ids = user_base + 1 + np.arange(n_users)
+        skill_ids = skill_base + 1 + np.arange(n_skills)
+        skill_names = [f"{SKILLS[i % len(SKILLS)][0]} {skill_ids[i]}" for i in range(n_skills)]
+        now = time.time()
+
+        # --- Generate ---
+        popularity = zipf(n_skills, args.skill_exponent)
+        offered_owner, offered_skill = user_skill_pairs(rng, n_users, args.per_user, popularity)
+        wanted_owner, wanted_skill = user_skill_pairs(rng, n_users, args.per_user, popularity)
+        activity = rng.pareto(args.activity_exponent, size=n_users) + 1.0
+        activity /= activity.sum()
+
+        n_swaps = int(n_users * args.swaps_per_user)
+        swap_sender, swap_receiver = pairs_by_activity(rng, n_swaps, activity)
+        # The sender teaches one of their offered skills and asks for one the receiver offers
+        swap_offered = pick_owned(rng, offered_owner, offered_skill, n_users, swap_sender)
+        swap_requested = pick_owned(rng, offered_owner, offered_skill, n_users, swap_receiver)
+        swap_status = rng.choice(SWAP_STATUSES[0], size=n_swaps, p=SWAP_STATUSES[1])
+        swap_created = now - np.minimum(rng.exponential(args.days / 4, size=n_swaps), args.days) * 86400
+        swap_rated = (swap_status == "completed") & (rng.random(n_swaps) < 0.7)
+        swap_rating = rng.choice(RATINGS[0], size=n_swaps, p=RATINGS[1])
+        swap_scheduled = swap_created + rng.integers(1, 15, size=n_swaps) * 86400
+
+        n_invites = int(n_users * args.invites_per_user)
+        invite_sender, invite_receiver = pairs_by_activity(rng, n_invites, activity)
+        invite_skill = pick_owned(rng, offered_owner, offered_skill, n_users, invite_receiver)
+        invite_status = rng.choice(INVITE_STATUSES[0], size=n_invites, p=INVITE_STATUSES[1])
+        invite_created = now - np.minimum(rng.exponential(args.days / 4, size=n_invites), args.days) * 86400
+        invite_rated = (invite_status == "accepted") & (rng.random(n_invites) < 0.5)
+        invite_rating = rng.choice(RATINGS[0], size=n_invites, p=RATINGS[1])
+        log(f"Generated {n_users} users, {len(offered_owner) + len(wanted_owner)} user skills, "
+            f"{n_swaps} swaps, {n_invites} invites")
+
+        # Per-row FK trigger checks dominate COPY time. Drop the FKs of the tables being filled and
+        # re-add them at the end, which validates each with one join. All of it is one transaction,
+        # so a failure rolls back to the original constraints.
+        foreign_keys = db.execute(text("""
+            SELECT conrelid::regclass::text, conname, pg_get_constraintdef(oid) FROM pg_constraint
+            WHERE contype = 'f' AND conrelid::regclass::text = ANY(:tables)
+        """), {"tables": [UserSkill.__tablename__, Swap.__tablename__, Invite.__tablename__]}).all()
+        for table, name, _ in foreign_keys:
+            db.execute(text(f'ALTER TABLE {table} DROP CONSTRAINT "{name}"'))
+
+        # --- Skills, with the counters and forward-decayed trend score services/trending.py maintains ---
+        offer_count = np.bincount(offered_skill, minlength=n_skills)
+        request_count = np.bincount(wanted_skill, minlength=n_skills)
+        swap_count = np.bincount(swap_offered, minlength=n_skills) + np.bincount(swap_requested, minlength=n_skills)
+        # Summed relative to now (every weight <= 1, so no overflow), then moved to the stored log scale
+        swap_boost = SWAP_WEIGHT * np.exp(DECAY_RATE * (swap_created - now))
+        activity = (
+            (offer_count + request_count) * USER_SKILL_WEIGHT
+            + np.bincount(swap_offered, weights=swap_boost, minlength=n_skills)
+            + np.bincount(swap_requested, weights=swap_boost, minlength=n_skills)
+        )
+        with np.errstate(divide="ignore"):
+            trend_score = np.where(activity > 0, np.log(activity) + DECAY_RATE * (now - EPOCH), NO_SCORE)
+        copy_rows(db, Skill.__table__, [
+            "id", "name", "category", "is_approved", "is_flagged",
+            "offer_count", "request_count", "swap_count", "trend_score",
+        ], (
+            (int(skill_ids[i]), skill_names[i], SKILLS[i % len(SKILLS)][1], 1, 0,
+             int(offer_count[i]), int(request_count[i]), int(swap_count[i]), float(trend_score[i]))
+            for i in range(n_skills)
+        ), args.batch_size)
+        log(f"Loaded {n_skills} skills")
+
+        # --- Users: one bcrypt hash shared by everyone; skills_* arrays mirror user_skills ---
+        password_hash = hash_password_sync(PASSWORD)
+        offered_starts = np.searchsorted(offered_owner, np.arange(n_users + 1))
+        wanted_starts = np.searchsorted(wanted_owner, np.arange(n_users + 1))
+        is_public = rng.random(n_users) < 0.9
+        name_picks = rng.integers(0, len(NAMES), size=n_users)
+        location_picks = rng.integers(0, len(LOCATIONS), size=n_users)
+        availability_picks = rng.integers(0, len(AVAILABILITY), size=n_users)
+
+        def user_rows():
+            for i in range(n_users):
+                user_id = int(user_ids[i])
+                offered = [skill_names[s] for s in offered_skill[offered_starts[i]:offered_starts[i + 1]]]
+                wanted = [skill_names[s] for s in wanted_skill[wanted_starts[i]:wanted_starts[i + 1]]]
+                yield (
+                    user_id, f"{NAMES[name_picks[i]]}{user_id}", f"user{user_id}@load.example.com", password_hash,
+                    LOCATIONS[location_picks[i]], AVAILABILITY[availability_picks[i]], bool(is_public[i]),
+                    json.dumps(offered), json.dumps(wanted),
+                )
+
+        copy_rows(db, User.__table__, [
+            "id", "name", "email", "password_hash", "location", "availability", "is_public",
+            "skills_offered", "skills_wanted",
+        ], user_rows(), args.batch_size)
+        log(f"Loaded {n_users} users")
+
+        n_offered, n_wanted = len(offered_owner), len(wanted_owner)
+        owners = np.concatenate([offered_owner, wanted_owner])
+        skills = np.concatenate([offered_skill, wanted_skill])
+        levels = rng.integers(0, len(LEVELS), size=len(owners))
+        remote = (rng.random(len(owners)) < 0.5).astype(int)
+        copy_rows(db, UserSkill.__table__, [
+            "user_id", "skill_id", "type", "level", "proficiency_level", "is_approved", "can_teach_remotely",
+        ], (
+            (int(user_ids[owners[i]]), int(skill_ids[skills[i]]), "offered" if i < n_offered else "wanted",
+             LEVELS[levels[i]], LEVELS[levels[i]], 1, int(remote[i]))
+            for i in range(n_offered + n_wanted)
+        ), args.batch_size)
+        log(f"Loaded {n_offered + n_wanted} user skills")
+
+        # --- Swaps and invites ---
+        created, scheduled = timestamps(swap_created), timestamps(swap_scheduled)
+        copy_rows(db, Swap.__table__, [
+            "sender_id", "receiver_id", "skill_offered", "skill_requested", "status",
+            "scheduled_time", "created_at", "message", "rating", "feedback",
+        ], (
+            (int(user_ids[swap_sender[i]]), int(user_ids[swap_receiver[i]]),
+             int(skill_ids[swap_offered[i]]), int(skill_ids[swap_requested[i]]), swap_status[i],
+             scheduled[i] if swap_status[i] in ("accepted", "completed") else None, created[i],
+             "Happy to swap skills!", int(swap_rating[i]) if swap_rated[i] else None,
+             "Great session" if swap_rated[i] else None)
+            for i in range(n_swaps)
+        ), args.batch_size)
+        log(f"Loaded {n_swaps} swaps")
+
+        created = timestamps(invite_created)
+        copy_rows(db, Invite.__table__, [
+            "sender_id", "receiver_id", "skill_id", "message", "status", "created_at", "rating", "feedback",
+        ], (
+            (int(user_ids[invite_sender[i]]), int(user_ids[invite_receiver[i]]),
+             int(skill_ids[invite_skill[i]]), "Would you teach me?", invite_status[i], created[i],
+             int(invite_rating[i]) if invite_rated[i] else None,
+             "Very helpful" if invite_rated[i] else None)
+            for i in range(n_invites)
+        ), args.batch_size)
+        log(f"Loaded {n_invites} invites")
+
+        for table, name, definition in foreign_keys:
+            db.execute(text(f'ALTER TABLE {table} ADD CONSTRAINT "{name}" {definition}'))
+        log(f"Restored {len(foreign_keys)} foreign keys")
+        for table in ("users", "skills", "user_skills", "swaps", "invites", "badges"):
+            db.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), coalesce(max(id), 0) + 1, false) FROM {table}"
+            ))
+        db.commit()
+
+        # --- Derived tables, rebuilt set-based by the same code the app uses ---
+        log(f"Built rating summaries for {backfill_rating_summaries(db)} users")
+        log(f"Awarded {backfill_badges(db)} badges")
+        log(f"Wrote {backfill_inbox(db)} inbox entries")
+        db.execute(text("ANALYZE"))
+        db.commit()
+        log("Done. Restart running app workers so in-memory indexes and caches reload.")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+# Nightly job: precompute the top-N match partners of every user into user_matches
+# Run: python backend/app/scripts/precompute_matches.py [--top-n 20] [--workers 16]
+
+import argparse
+import time
+
+from app.database import SessionLocal, init_db
+from app.services.match_batch import compute_top_matches, load_inputs, write_matches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute top-N reciprocal matches per user")
+    parser.add_argument("--top-n", type=int, default=20)
+    parser.add_argument("--candidates-per-skill", type=int, default=1000)
+    parser.add_argument("--chunk-users", type=int, default=256)
+    parser.add_argument("--workers", type=int, default=None, help="default: one per CPU")
+    args = parser.parse_args()
+
+    init_db()
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        offered, wanted, weight = load_inputs(db)
+        print(f"Loaded {offered.nnz} offered / {wanted.nnz} wanted skills for {offered.shape[0]} user ids "
+              f"in {time.perf_counter() - started:.1f}s.")
+        chunks = compute_top_matches(
+            offered, wanted, weight, top_n=args.top_n, candidates_per_skill=args.candidates_per_skill,
+            chunk_users=args.chunk_users, workers=args.workers,
+        )
+        total = write_matches(db, chunks)
+        print(f"Wrote {total} matches in {time.perf_counter() - started:.1f}s.")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -3,7 +3,7 @@
 
 import random
 from sqlalchemy.orm import Session
-from app.database import SessionLocal
+from app.database import SessionLocal, init_db
 from app.models.user import User
 from app.models.skill import Skill, UserSkill, SkillLevel
 from app.models.badge import Badge
@@ -17,6 +17,7 @@ EXAMPLE_SKILLS = [
 
 
 def main():
+    init_db()
     db: Session = SessionLocal()
     users = db.query(User).all()
     skills = db.query(Skill).all()
@@ -42,11 +43,11 @@ def main():
         for s in wanted:
             if not db.query(UserSkill).filter_by(user_id=user.id, skill_id=s.id, type="wanted").first():
                 db.add(UserSkill(user_id=user.id, skill_id=s.id, type="wanted", level=SkillLevel.beginner))
-        # Assign random badges
-        for _ in range(random.randint(1, 3)):
-            badge_type = random.choice(BADGE_TYPES)
-            skill = random.choice(skills)
-            db.add(Badge(user_id=user.id, skill_id=skill.id, badge_type=badge_type))
+        # Assign random badges (distinct: badges are unique per user, skill and type)
+        picks = {(random.choice(BADGE_TYPES), random.choice(skills).id) for _ in range(random.randint(1, 3))}
+        for badge_type, skill_id in picks:
+            if not db.query(Badge).filter_by(user_id=user.id, skill_id=skill_id, badge_type=badge_type).first():
+                db.add(Badge(user_id=user.id, skill_id=skill_id, badge_type=badge_type))
     db.commit()
     print(f"Seeded random badges and skills for {len(users)} users.")
 
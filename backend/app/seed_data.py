@@ -2,11 +2,11 @@
 # Script to populate the database with lots of users, skills, and user skills for testing
 # Run: python backend/app/seed_data.py
 
-from app.database import SessionLocal
+from app.database import SessionLocal, init_db
 from app.models.user import User
 from app.models.skill import Skill, UserSkill, SkillLevel
 from sqlalchemy.exc import IntegrityError
-from passlib.hash import bcrypt
+from app.utils.hashing import hash_password_sync
 import random
 
 # Sample data
@@ -33,10 +33,8 @@ PASSWORD = "test123"  # Easy password for all users
 
 random.seed(42)
 
-def hash_pw(pw):
-    return bcrypt.hash(pw)
-
 def main():
+    init_db()
     db = SessionLocal()
     # Add skills (avoid duplicates)
     for name, category in SKILLS:
@@ -46,6 +44,8 @@ def main():
             db.add(skill)
     db.commit()
     skills = db.query(Skill).all()
+    # Every demo user shares the same password, so bcrypt only needs to run once
+    password_hash = hash_password_sync(PASSWORD)
     # Add users
     for i in range(50):
         name = random.choice(NAMES) + str(i)
@@ -55,7 +55,7 @@ def main():
         user = User(
             name=name,
             email=email,
-            password_hash=hash_pw(PASSWORD),
+            password_hash=password_hash,
             location=location,
             availability=availability,
             is_public=True,
@@ -1,2 +1,76 @@
 # services/badge_engine.py
-# Business logic for badges (skeleton)
+# Badges earned through swaps: awarded as swaps complete / get rated, rebuilt in bulk by backfill_badges()
+from typing import List
+
+from sqlalchemy import func, literal, literal_column, select, union_all
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.models.badge import Badge
+from app.models.swap import Swap
+
+LEARNED = "learned"          # completed a swap as the learner of a skill
+MENTOR = "mentor"            # completed a swap as the teacher of a skill
+RATED_5STAR = "rated_5star"  # received a 5-star rating for a skill taught
+
+# Matches the uq_badges_user_skill_type unique index (inline 0: a bound parameter would not match it)
+_BADGE_KEY = [Badge.user_id, func.coalesce(Badge.skill_id, literal_column("0")), Badge.badge_type]
+
+
+def _award(values):
+    """INSERT badges, skipping any the user already holds (no read-before-write)."""
+    return insert(Badge).values(values).on_conflict_do_nothing(index_elements=_BADGE_KEY)
+
+
+def swap_badges(swap: Swap) -> List[dict]:
+    """
+    Badges one swap earns in its current state. The sender teaches
+    skill_offered and learns skill_requested; the receiver the reverse.
+    Ratings go to the receiver (see services/ratings.py), for the skill
+    they taught.
+    """
+    badges = []
+    if swap.status == "completed":
+        badges += [
+            {"user_id": swap.sender_id, "skill_id": swap.skill_offered, "badge_type": MENTOR},
+            {"user_id": swap.sender_id, "skill_id": swap.skill_requested, "badge_type": LEARNED},
+            {"user_id": swap.receiver_id, "skill_id": swap.skill_requested, "badge_type": MENTOR},
+            {"user_id": swap.receiver_id, "skill_id": swap.skill_offered, "badge_type": LEARNED},
+        ]
+    if swap.rating == 5:
+        badges.append({"user_id": swap.receiver_id, "skill_id": swap.skill_requested, "badge_type": RATED_5STAR})
+    return badges
+
+
+def award_swap_badges(db: Session, swap: Swap) -> bool:
+    """
+    Award whatever `swap` has earned, inside the caller's transaction.
+    Only this swap is looked at, and re-awarding is a no-op, so it is
+    safe to call on every status change or rating. Returns whether any
+    badge may have been added.
+    """
+    badges = swap_badges(swap)
+    if badges:
+        db.execute(_award(badges))
+    return bool(badges)
+
+
+def backfill_badges(db: Session) -> int:
+    """
+    Award every badge earned by existing swaps in one INSERT ... SELECT.
+    Badges granted by hand are kept. Returns the number of badges added.
+    """
+    completed = Swap.status == "completed"
+    earned = union_all(
+        select(Swap.sender_id, Swap.skill_offered, literal(MENTOR)).where(completed),
+        select(Swap.sender_id, Swap.skill_requested, literal(LEARNED)).where(completed),
+        select(Swap.receiver_id, Swap.skill_requested, literal(MENTOR)).where(completed),
+        select(Swap.receiver_id, Swap.skill_offered, literal(LEARNED)).where(completed),
+        select(Swap.receiver_id, Swap.skill_requested, literal(RATED_5STAR)).where(Swap.rating == 5),
+    ).subquery()
+    stmt = insert(Badge).from_select(
+        ["user_id", "skill_id", "badge_type"], select(earned).distinct()
+    ).on_conflict_do_nothing(index_elements=_BADGE_KEY)
+    added = db.execute(stmt).rowcount
+    db.commit()
+    return added
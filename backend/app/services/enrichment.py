@@ -0,0 +1,119 @@
+# services/enrichment.py
+# Batched user/skill name lookups for swap and invite listings
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.models.user import User
+from app.models.skill import Skill
+
+_CACHE_KEY = "name_cache"
+
+
+class NameCache:
+    """
+    Identity cache of user and skill names, stored on the Session.
+    get_db hands out one Session per request, so the cache lives exactly as
+    long as the request. Ids that don't exist are cached as None so they
+    aren't looked up again.
+    """
+    def __init__(self):
+        self.users: Dict[int, Optional[str]] = {}
+        self.skills: Dict[int, Optional[str]] = {}
+
+    def user_name(self, user_id: int) -> str:
+        name = self.users.get(user_id)
+        return name if name is not None else str(user_id)
+
+    def skill_name(self, skill_id: int) -> str:
+        name = self.skills.get(skill_id)
+        return name if name is not None else str(skill_id)
+
+
+def get_name_cache(db: Session) -> NameCache:
+    """Return the request-scoped name cache for this session."""
+    cache = db.info.get(_CACHE_KEY)
+    if cache is None:
+        cache = db.info[_CACHE_KEY] = NameCache()
+    return cache
+
+
+def load_names(db: Session, user_ids: Iterable[int], skill_ids: Iterable[int]) -> NameCache:
+    """
+    Make sure every given id is in the name cache.
+    At most one `IN (...)` query for users and one for skills, whatever
+    the number of ids.
+    """
+    cache = get_name_cache(db)
+    missing_users = set(user_ids) - cache.users.keys()
+    if missing_users:
+        cache.users.update(dict.fromkeys(missing_users))
+        cache.users.update(db.query(User.id, User.name).filter(User.id.in_(missing_users)).all())
+    missing_skills = set(skill_ids) - cache.skills.keys()
+    if missing_skills:
+        cache.skills.update(dict.fromkeys(missing_skills))
+        cache.skills.update(db.query(Skill.id, Skill.name).filter(Skill.id.in_(missing_skills)).all())
+    return cache
+
+
+def enrich_swaps(swaps: List, db: Session) -> List[dict]:
+    """Attach sender/receiver and skill names to a list of swaps."""
+    names = load_names(
+        db,
+        [uid for s in swaps for uid in (s.sender_id, s.receiver_id)],
+        [sid for s in swaps for sid in (s.skill_offered, s.skill_requested)],
+    )
+    return [
+        {
+            'id': swap.id,
+            'sender_id': swap.sender_id,
+            'receiver_id': swap.receiver_id,
+            'sender_name': names.user_name(swap.sender_id),
+            'receiver_name': names.user_name(swap.receiver_id),
+            'skill_offered': swap.skill_offered,
+            'skill_offered_name': names.skill_name(swap.skill_offered),
+            'skill_requested': swap.skill_requested,
+            'skill_requested_name': names.skill_name(swap.skill_requested),
+            'status': swap.status,
+            'scheduled_time': swap.scheduled_time,
+            'created_at': swap.created_at,
+            'message': getattr(swap, 'message', None),
+            'rating': swap.rating,
+            'feedback': swap.feedback
+        }
+        for swap in swaps
+    ]
+
+
+def enrich_invites(invites: List, db: Session) -> List[dict]:
+    """Attach sender/receiver and skill names to a list of invites."""
+    names = load_names(
+        db,
+        [uid for i in invites for uid in (i.sender_id, i.receiver_id)],
+        [i.skill_id for i in invites],
+    )
+    return [
+        {
+            'id': invite.id,
+            'sender_id': invite.sender_id,
+            'receiver_id': invite.receiver_id,
+            'skill_id': invite.skill_id,
+            'sender_name': names.user_name(invite.sender_id),
+            'receiver_name': names.user_name(invite.receiver_id),
+            'skill_name': names.skill_name(invite.skill_id),
+            'message': getattr(invite, 'message', None),
+            'status': invite.status,
+            'created_at': invite.created_at,
+            'rating': invite.rating,
+            'feedback': invite.feedback
+        }
+        for invite in invites
+    ]
+
+
+def enrich_swap(swap, db: Session) -> dict:
+    return enrich_swaps([swap], db)[0]
+
+
+def enrich_invite(invite, db: Session) -> dict:
+    return enrich_invites([invite], db)[0]
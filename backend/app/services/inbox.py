@@ -0,0 +1,148 @@
+# services/inbox.py
+# Denormalized per-user inbox of swaps and invites, maintained in the writers' transactions
+from typing import List, Literal
+
+from sqlalchemy import DateTime, Integer, String, cast, func, literal, null, select, union_all, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session, aliased
+
+from app.models.inbox import InboxEntry
+from app.models.invite import Invite
+from app.models.skill import Skill
+from app.models.swap import Swap
+from app.models.user import User
+from app.services.enrichment import load_names
+
+InboxKind = Literal["swap", "invite"]
+InboxDirection = Literal["incoming", "outgoing"]
+
+SWAP, INVITE = "swap", "invite"
+INCOMING, OUTGOING = "incoming", "outgoing"
+
+_KEY = [InboxEntry.user_id, InboxEntry.kind, InboxEntry.item_id, InboxEntry.direction]
+# Columns the writers below keep in sync after the entry is created
+_MUTABLE = ("status", "rating", "feedback")
+
+
+def _entries(kind: str, item, names, skill_id: int, requested_skill_id=None) -> List[dict]:
+    """The receiver's (incoming) and sender's (outgoing) entry for one swap or invite."""
+    shared = {
+        "kind": kind,
+        "item_id": item.id,
+        "skill_id": skill_id,
+        "skill_name": names.skill_name(skill_id),
+        "requested_skill_id": requested_skill_id,
+        "requested_skill_name": names.skill_name(requested_skill_id) if requested_skill_id is not None else None,
+        "status": item.status,
+        "message": item.message,
+        "scheduled_time": getattr(item, "scheduled_time", None),
+        "rating": item.rating,
+        "feedback": item.feedback,
+        "created_at": item.created_at,
+    }
+    return [
+        {**shared, "user_id": item.receiver_id, "direction": INCOMING,
+         "counterpart_id": item.sender_id, "counterpart_name": names.user_name(item.sender_id)},
+        {**shared, "user_id": item.sender_id, "direction": OUTGOING,
+         "counterpart_id": item.receiver_id, "counterpart_name": names.user_name(item.receiver_id)},
+    ]
+
+
+def _insert(db: Session, rows: List[dict]) -> None:
+    db.execute(insert(InboxEntry).on_conflict_do_nothing(index_elements=_KEY), rows)
+
+
+def add_swap(db: Session, swap: Swap) -> None:
+    """
+    Add a new swap to both parties' inboxes. Call after a flush (the swap
+    needs its id), inside the transaction that creates it. The names come
+    from the request's name cache, so the response can reuse them.
+    """
+    names = load_names(db, (swap.sender_id, swap.receiver_id), (swap.skill_offered, swap.skill_requested))
+    _insert(db, _entries(SWAP, swap, names, swap.skill_offered, swap.skill_requested))
+
+
+def add_invite(db: Session, invite: Invite) -> None:
+    """Same as add_swap, for an invite."""
+    names = load_names(db, (invite.sender_id, invite.receiver_id), (invite.skill_id,))
+    _insert(db, _entries(INVITE, invite, names, invite.skill_id))
+
+
+def item_changed(db: Session, kind: InboxKind, item) -> None:
+    """
+    Copy a swap's or invite's status, rating and feedback to both of its
+    entries, inside the caller's transaction. Found through the unique
+    (user_id, kind, item_id, direction) index.
+    """
+    db.execute(
+        update(InboxEntry)
+        .where(InboxEntry.user_id.in_((item.sender_id, item.receiver_id)),
+               InboxEntry.kind == kind, InboxEntry.item_id == item.id)
+        .values({name: getattr(item, name) for name in _MUTABLE})
+        .execution_options(synchronize_session=False)
+    )
+
+
+def user_renamed(db: Session, user_id: int, name: str) -> None:
+    """Show a user's new name in every inbox they appear in as the other party."""
+    db.execute(
+        update(InboxEntry)
+        .where(InboxEntry.counterpart_id == user_id, InboxEntry.counterpart_name != name)
+        .values(counterpart_name=name)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _sides(kind: str, model, skill_column, requested_column=None) -> list:
+    """SELECTs producing the incoming and outgoing entries of every row of `model`."""
+    counterpart, skill, requested = aliased(User), aliased(Skill), aliased(Skill)
+    selects = []
+    for direction, owner, other in ((INCOMING, model.receiver_id, model.sender_id),
+                                    (OUTGOING, model.sender_id, model.receiver_id)):
+        stmt = (
+            select(
+                owner.label("user_id"),
+                literal(kind, String).label("kind"),
+                model.id.label("item_id"),
+                literal(direction, String).label("direction"),
+                other.label("counterpart_id"),
+                counterpart.name.label("counterpart_name"),
+                skill_column.label("skill_id"),
+                skill.name.label("skill_name"),
+                (requested_column if requested_column is not None else cast(null(), Integer)).label("requested_skill_id"),
+                (requested.name if requested_column is not None else cast(null(), String)).label("requested_skill_name"),
+                model.status.label("status"),
+                model.message.label("message"),
+                getattr(model, "scheduled_time", cast(null(), DateTime)).label("scheduled_time"),
+                model.rating.label("rating"),
+                model.feedback.label("feedback"),
+                func.coalesce(model.created_at, func.timezone("utc", func.now())).label("created_at"),
+            )
+            .join(counterpart, counterpart.id == other)
+            .join(skill, skill.id == skill_column)
+        )
+        if requested_column is not None:
+            stmt = stmt.join(requested, requested.id == requested_column)
+        selects.append(stmt)
+    return selects
+
+
+def backfill_inbox(db: Session) -> int:
+    """
+    (Re)build every inbox entry from the swaps and invites in one
+    INSERT ... SELECT; existing entries get their names, status, rating
+    and feedback refreshed. Returns the number of entries written.
+    """
+    items = union_all(
+        *_sides(SWAP, Swap, Swap.skill_offered, Swap.skill_requested),
+        *_sides(INVITE, Invite, Invite.skill_id),
+    ).subquery()
+    rows = select(*items.c).order_by(items.c.created_at, items.c.kind, items.c.item_id)
+    stmt = insert(InboxEntry).from_select([c.name for c in items.c], rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=_KEY,
+        set_={name: stmt.excluded[name] for name in ("counterpart_name", "message", "scheduled_time", *_MUTABLE)},
+    )
+    written = db.execute(stmt).rowcount
+    db.commit()
+    return written
@@ -0,0 +1,251 @@
+# services/match_batch.py
+# Nightly "top-N partners for every user" precompute with sparse matrix products
+import io
+import multiprocessing as mp
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+from sqlalchemy import delete, insert, text
+from sqlalchemy.orm import Session
+
+from app.models.match import UserMatch
+
+# Bayesian prior for the rating weight: unrated users count as PRIOR_MEAN over PRIOR_WEIGHT ratings
+PRIOR_MEAN = 3.0
+PRIOR_WEIGHT = 5.0
+
+# One chunk of results: (user ids, match user ids, scores, ranks starting at 1)
+Chunk = Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+
+# Every (user, skill, offered?) pair: user_skills rows plus the skills_* JSONB arrays
+_PAIRS_SQL = """
+    SELECT us.user_id, us.skill_id, us.type = 'offered'
+    FROM user_skills us WHERE us.is_approved = 1
+    UNION ALL
+    SELECT u.id, s.id, true
+    FROM users u CROSS JOIN LATERAL jsonb_array_elements_text(u.skills_offered) AS e(name)
+    JOIN skills s ON lower(s.name) = lower(e.name)
+    WHERE jsonb_typeof(u.skills_offered) = 'array'
+    UNION ALL
+    SELECT u.id, s.id, false
+    FROM users u CROSS JOIN LATERAL jsonb_array_elements_text(u.skills_wanted) AS e(name)
+    JOIN skills s ON lower(s.name) = lower(e.name)
+    WHERE jsonb_typeof(u.skills_wanted) = 'array'
+"""
+
+_USERS_SQL = """
+    SELECT u.id, u.is_public, coalesce(r.rating_sum, 0), coalesce(r.rating_count, 0)
+    FROM users u LEFT JOIN user_rating_summaries r ON r.user_id = u.id
+"""
+
+
+def skill_matrix(users: np.ndarray, skills: np.ndarray, shape: Tuple[int, int]) -> sparse.csr_matrix:
+    """0/1 user x skill CSR matrix (rows are user ids); duplicate pairs count once."""
+    matrix = sparse.csr_matrix(
+        (np.ones(len(users), dtype=np.float32), (users, skills)), shape=shape
+    )
+    matrix.sum_duplicates()
+    matrix.data[:] = 1.0
+    return matrix
+
+
+def rating_weights(n_rows: int, user_ids, is_public, rating_sum, rating_count) -> np.ndarray:
+    """
+    Per-user score multiplier in [0, 1]: the Bayesian average rating / 5.
+    It is 0 for missing and private users, so they are never suggested.
+    """
+    weight = np.zeros(n_rows, dtype=np.float32)
+    avg = (np.asarray(rating_sum, dtype=np.float64) + PRIOR_MEAN * PRIOR_WEIGHT) / (
+        np.asarray(rating_count, dtype=np.float64) + PRIOR_WEIGHT
+    )
+    weight[user_ids] = np.where(np.asarray(is_public, dtype=bool), avg / 5.0, 0.0)
+    return weight
+
+
+def cap_columns(matrix: sparse.csr_matrix, priority: np.ndarray, k: int) -> sparse.csr_matrix:
+    """
+    Keep at most `k` users per skill column: the ones with the highest
+    priority, and never a user with priority <= 0. This bounds how many
+    candidates a popular skill can contribute.
+    """
+    csc = matrix.tocsc()
+    rows, cols = [], []
+    for col in range(csc.shape[1]):
+        members = csc.indices[csc.indptr[col]:csc.indptr[col + 1]]
+        members = members[priority[members] > 0]
+        if len(members) > k:
+            members = members[np.argpartition(-priority[members], k)[:k]]
+        rows.append(members)
+        cols.append(np.full(len(members), col, dtype=np.int32))
+    rows = np.concatenate(rows) if rows else np.empty(0, dtype=np.int32)
+    cols = np.concatenate(cols) if cols else np.empty(0, dtype=np.int32)
+    return sparse.csr_matrix((np.ones(len(rows), dtype=np.float32), (rows, cols)), shape=matrix.shape)
+
+
+# Worker state, set once per process by _init_worker (inherited, not pickled, under fork)
+_state: dict = {}
+
+
+def _init_worker(offered, wanted, offered_capped, wanted_capped, weight, top_n) -> None:
+    _state.update(
+        offered=offered, wanted=wanted, offered_t=offered_capped.T.tocsr(),
+        wanted_t=wanted_capped.T.tocsr(), weight=weight, top_n=top_n,
+    )
+
+
+def score_chunk(start: int, stop: int) -> Chunk:
+    """
+    Top-N reciprocal partners for users start..stop-1.
+    Candidates are users who offer (in the capped lists) a skill the user
+    wants, or want a skill the user offers. For each candidate pair:
+      score = |my wanted & their offered| * |my offered & their wanted| * weight[them]
+    The score is exact, and zero unless the match goes both ways.
+    """
+    offered, wanted, weight, top_n = _state["offered"], _state["wanted"], _state["weight"], _state["top_n"]
+    my_offered, my_wanted = offered[start:stop], wanted[start:stop]
+    candidates = (my_wanted @ _state["offered_t"] + my_offered @ _state["wanted_t"]).tocoo()
+    rows, cols = candidates.row, candidates.col
+    keep = cols != rows + start
+    rows, cols = rows[keep], cols[keep]
+    if not len(rows):
+        return _empty()
+    they_offer = np.asarray(my_wanted[rows].multiply(offered[cols]).sum(axis=1)).ravel()
+    they_want = np.asarray(my_offered[rows].multiply(wanted[cols]).sum(axis=1)).ravel()
+    scores = they_offer * they_want * weight[cols]
+    keep = scores > 0
+    rows, cols, scores = rows[keep], cols[keep], scores[keep]
+    if not len(rows):
+        return _empty()
+    # Sort by user, best score first (ties: lower id first), then cut each user's run at top_n
+    order = np.lexsort((cols, -scores, rows))
+    rows, cols, scores = rows[order], cols[order], scores[order]
+    firsts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]])
+    ranks = np.arange(len(rows)) - np.repeat(firsts, np.diff(np.r_[firsts, len(rows)]))
+    keep = ranks < top_n
+    return (rows[keep] + start).astype(np.int32), cols[keep].astype(np.int32), scores[keep], (ranks[keep] + 1).astype(np.int32)
+
+
+def _empty() -> Chunk:
+    empty = np.empty(0, dtype=np.int32)
+    return empty, empty, np.empty(0, dtype=np.float32), empty
+
+
+def compute_top_matches(
+    offered: sparse.csr_matrix,
+    wanted: sparse.csr_matrix,
+    weight: np.ndarray,
+    top_n: int = 20,
+    candidates_per_skill: int = 1000,
+    chunk_users: int = 256,
+    workers: Optional[int] = None,
+    seed: int = 0,
+) -> Iterator[Chunk]:
+    """
+    Yield top-N results chunk by chunk, in no particular order.
+    Rows are scored `chunk_users` at a time across a process pool, and at
+    most 2 x workers chunks are in flight. Memory is therefore bounded by
+    chunk_users x skills per user x candidates_per_skill pairs per worker,
+    whatever the number of users.
+    """
+    # Tiny jitter so equally rated users take turns in the capped lists instead of the lowest ids
+    priority = weight + np.random.default_rng(seed).random(len(weight), dtype=np.float32) * 1e-3
+    priority[weight <= 0] = 0
+    init_args = (
+        offered, wanted, cap_columns(offered, priority, candidates_per_skill),
+        cap_columns(wanted, priority, candidates_per_skill), weight, top_n,
+    )
+    bounds = [(start, min(start + chunk_users, offered.shape[0])) for start in range(0, offered.shape[0], chunk_users)]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        _init_worker(*init_args)
+        for start, stop in bounds:
+            yield score_chunk(start, stop)
+        return
+    method = "fork" if "fork" in mp.get_all_start_methods() else "spawn"
+    with ProcessPoolExecutor(workers, mp_context=mp.get_context(method),
+                             initializer=_init_worker, initargs=init_args) as pool:
+        pending, queue = set(), iter(bounds)
+        while True:
+            for start, stop in queue:
+                pending.add(pool.submit(score_chunk, start, stop))
+                if len(pending) >= workers * 2:
+                    break
+            if not pending:
+                return
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
+
+# --- Database side ---
+def load_inputs(db: Session):
+    """Read skills, ratings and visibility into (offered, wanted, weight) for compute_top_matches()."""
+    users = np.array(db.execute(text(_USERS_SQL)).all(), dtype=np.int64).reshape(-1, 4)
+    pair_chunks = []
+    result = db.execute(text(_PAIRS_SQL).execution_options(stream_results=True, yield_per=100_000))
+    for part in result.partitions():
+        pair_chunks.append(np.array(part, dtype=np.int64).reshape(-1, 3))
+    pairs = np.concatenate(pair_chunks) if pair_chunks else np.empty((0, 3), dtype=np.int64)
+    n_rows = int(max(users[:, 0].max(initial=0), pairs[:, 0].max(initial=0))) + 1
+    n_skills = int(pairs[:, 1].max(initial=0)) + 1
+    is_offer = pairs[:, 2].astype(bool)
+    offered = skill_matrix(pairs[is_offer, 0], pairs[is_offer, 1], (n_rows, n_skills))
+    wanted = skill_matrix(pairs[~is_offer, 0], pairs[~is_offer, 1], (n_rows, n_skills))
+    weight = rating_weights(n_rows, users[:, 0], users[:, 1], users[:, 2], users[:, 3])
+    return offered, wanted, weight
+
+
+_COPY_HEADER = b"PGCOPY\n\xff\r\n\x00" + b"\x00" * 8
+_COPY_TRAILER = b"\xff\xff"
+# Binary COPY tuple: field count, then (length, value) per field, all big-endian
+_COPY_ROW = np.dtype([
+    ("fields", ">i2"),
+    ("len_user", ">i4"), ("user_id", ">i4"),
+    ("len_rank", ">i4"), ("rank", ">i4"),
+    ("len_match", ">i4"), ("match_user_id", ">i4"),
+    ("len_score", ">i4"), ("score", ">f8"),
+])
+
+
+def _copy_payload(chunk: Chunk) -> bytes:
+    users, matches, scores, ranks = chunk
+    rows = np.empty(len(users), dtype=_COPY_ROW)
+    rows["fields"] = 4
+    rows["len_user"] = rows["len_rank"] = rows["len_match"] = 4
+    rows["len_score"] = 8
+    rows["user_id"], rows["rank"], rows["match_user_id"], rows["score"] = users, ranks, matches, scores
+    return _COPY_HEADER + rows.tobytes() + _COPY_TRAILER
+
+
+def write_matches(db: Session, chunks: Iterable[Chunk]) -> int:
+    """
+    Replace user_matches with `chunks` in one transaction, so readers keep
+    seeing the previous night's rows until it commits. On psycopg2 each
+    chunk goes in with one binary COPY; other drivers use executemany.
+    """
+    db.execute(delete(UserMatch))
+    connection = db.connection()
+    use_copy = connection.dialect.driver == "psycopg2"
+    total = 0
+    for chunk in chunks:
+        if not len(chunk[0]):
+            continue
+        if use_copy:
+            cursor = connection.connection.cursor()
+            cursor.copy_expert(
+                "COPY user_matches (user_id, rank, match_user_id, score) FROM STDIN WITH (FORMAT binary)",
+                io.BytesIO(_copy_payload(chunk)),
+            )
+            cursor.close()
+        else:
+            users, matches, scores, ranks = chunk
+            db.execute(insert(UserMatch), [
+                {"user_id": int(u), "rank": int(r), "match_user_id": int(m), "score": float(s)}
+                for u, m, s, r in zip(users, matches, scores, ranks)
+            ])
+        total += len(chunk[0])
+    db.commit()
+    return total
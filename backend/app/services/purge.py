@@ -0,0 +1,280 @@
+# services/purge.py
+# Background purge of a user and every row that references them, in small set-based batches
+import logging
+import threading
+import time
+import uuid
+from datetime import timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, func, or_, select, text, tuple_, update
+from sqlalchemy.exc import IntegrityError, OperationalError
+from sqlalchemy.orm import Session
+
+from app.config import (
+    PURGE_BATCH_PAUSE_SECONDS, PURGE_BATCH_ROWS, PURGE_LEASE_SECONDS, PURGE_LOCK_RETRIES, PURGE_LOCK_TIMEOUT_MS,
+    PURGE_POLL_SECONDS,
+)
+from app.database import SessionLocal
+from app.models.badge import Badge
+from app.models.feedback import Feedback
+from app.models.inbox import InboxEntry
+from app.models.invite import Invite
+from app.models.match import UserMatch
+from app.models.purge import PurgeJob
+from app.models.rating import UserRatingSummary
+from app.models.skill import SkillRequest, UserSkill
+from app.models.swap import Swap
+from app.models.user import User
+from app.services.ratings import remove_ratings
+from app.services.recommender import match_state, recommender, user_skill_rows
+from app.services.search import unindex_user
+from app.services.trending import user_skills_removed
+from app.utils.principal_cache import principal_cache
+from app.utils.response_cache import BADGES, SKILLS, USERS, response_cache
+
+logger = logging.getLogger(__name__)
+
+LOCK_NOT_AVAILABLE = "55P03"  # SQLSTATE of a lock_timeout
+PASSES = 3  # full runs of the steps, for rows that reference the user while the job runs
+ACTIVE = ("queued", "running")
+
+# (name, table, rows to delete, columns to return, callback(db, user_id, returned rows))
+Step = Tuple[str, object, object, tuple, Optional[Callable]]
+
+
+def _unrate(db: Session, user_id: int, rows) -> None:
+    # Ratings the purged user gave others come out of their summaries; their own summary goes whole
+    remove_ratings(db, [(receiver_id, rating) for receiver_id, rating in rows if receiver_id != user_id])
+
+
+def _unskill(db: Session, user_id: int, rows) -> None:
+    for statement in user_skills_removed(rows):
+        db.execute(statement)
+
+
+def purge_steps(user_id: int) -> List[Step]:
+    """Tables in FK order: every step deletes rows only later steps' rows point to."""
+    own_swaps = select(Swap.id).where(or_(Swap.sender_id == user_id, Swap.receiver_id == user_id))
+    return [
+        ("inbox_entries", InboxEntry.__table__,
+         or_(InboxEntry.user_id == user_id, InboxEntry.counterpart_id == user_id), (), None),
+        ("feedback", Feedback.__table__,
+         or_(Feedback.from_user == user_id, Feedback.to_user == user_id, Feedback.swap_id.in_(own_swaps)), (), None),
+        ("swaps", Swap.__table__, or_(Swap.sender_id == user_id, Swap.receiver_id == user_id),
+         (Swap.receiver_id, Swap.rating), _unrate),
+        ("invites", Invite.__table__, or_(Invite.sender_id == user_id, Invite.receiver_id == user_id),
+         (Invite.receiver_id, Invite.rating), _unrate),
+        ("badges", Badge.__table__, Badge.user_id == user_id, (), None),
+        ("user_skills", UserSkill.__table__, UserSkill.user_id == user_id, (UserSkill.skill_id, UserSkill.type), _unskill),
+        ("skill_requests", SkillRequest.__table__, SkillRequest.user_id == user_id, (), None),
+        ("user_matches", UserMatch.__table__,
+         or_(UserMatch.user_id == user_id, UserMatch.match_user_id == user_id), (), None),
+        ("user_rating_summaries", UserRatingSummary.__table__, UserRatingSummary.user_id == user_id, (), None),
+        ("users", User.__table__, User.id == user_id, (), None),
+    ]
+
+
+def batch_delete(table, condition, returning: tuple, limit: int):
+    """DELETE of at most `limit` rows matching `condition`, picked by primary key, RETURNING `returning`."""
+    pk = list(table.primary_key.columns)
+    key = pk[0] if len(pk) == 1 else tuple_(*pk)
+    return delete(table).where(key.in_(select(*pk).where(condition).limit(limit))).returning(*(returning or pk))
+
+
+def job_status(job: PurgeJob) -> dict:
+    return {
+        "job_id": job.id,
+        "user_id": job.user_id,
+        "status": job.status,
+        "step": job.step,
+        "deleted": job.deleted or {},
+        "error": job.error,
+        "created_at": job.created_at,
+        "updated_at": job.updated_at,
+        "finished_at": job.finished_at,
+    }
+
+
+class ClaimLost(Exception):
+    """Another worker took the job over (this one stalled past the lease)."""
+
+
+class PurgeWorker:
+    """
+    Runs user purges on a daemon thread, so the request that asks for one
+    returns at once with a job id. Each batch is its own short transaction:
+    it deletes at most `batch_rows` rows of one table (RETURNING what the
+    rating summaries and skill counters need to be corrected in the same
+    transaction), records progress on the purge_jobs row and commits. So
+    no lock outlives a batch, and a batch waits at most lock_timeout_ms
+    for a row lock before it backs off and retries rather than queueing
+    behind a long transaction.
+
+    The queue is the purge_jobs table itself. Workers (in any process)
+    claim a queued job, or a running one whose worker hasn't recorded
+    progress for `lease_seconds` (it died or restarted), with SELECT ...
+    FOR UPDATE SKIP LOCKED, so a job cut short by a restart is resumed by
+    whichever worker comes next. Every progress update checks the claim,
+    and a worker that lost it stops. A user has at most one queued or
+    running job (unique index), so only one worker purges a user. Every
+    step is idempotent, so resuming simply runs the steps again.
+    """
+    def __init__(self, batch_rows: int = PURGE_BATCH_ROWS, lock_timeout_ms: int = PURGE_LOCK_TIMEOUT_MS,
+                 lock_retries: int = PURGE_LOCK_RETRIES, pause: float = PURGE_BATCH_PAUSE_SECONDS,
+                 lease_seconds: float = PURGE_LEASE_SECONDS, poll_seconds: float = PURGE_POLL_SECONDS):
+        self.batch_rows = batch_rows
+        self.lock_timeout_ms = lock_timeout_ms
+        self.lock_retries = lock_retries
+        self.pause = pause
+        self.lease_seconds = lease_seconds
+        self.poll_seconds = poll_seconds
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start the worker thread (from the lifespan, so interrupted jobs resume at startup)."""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="purge-worker", daemon=True)
+                self._thread.start()
+
+    def submit(self, db: Session, user_id: int) -> PurgeJob:
+        """Queue a purge of `user_id`, or return the one already queued or running (in any process)."""
+        job = db.scalar(select(PurgeJob).where(PurgeJob.user_id == user_id, PurgeJob.status.in_(ACTIVE)))
+        if job is None:
+            job = PurgeJob(id=uuid.uuid4().hex, user_id=user_id, status="queued", deleted={})
+            db.add(job)
+            try:
+                db.commit()
+            except IntegrityError:
+                # Queued by a concurrent request
+                db.rollback()
+                job = db.scalar(select(PurgeJob).where(PurgeJob.user_id == user_id, PurgeJob.status.in_(ACTIVE)))
+        self.start()
+        self._wake.set()
+        return job
+
+    def _loop(self) -> None:
+        while True:
+            try:
+                claimed = self.claim()
+            except Exception:
+                logger.exception("Claiming a purge job failed")
+                claimed = None
+            if claimed is None:
+                self._wake.wait(self.poll_seconds)
+                self._wake.clear()
+                continue
+            try:
+                self.run(*claimed)
+            except Exception:
+                # Keep the thread alive; the job's lease runs out and a worker takes it over
+                logger.exception("Purge job %s crashed", claimed[0])
+                self._wake.wait(self.poll_seconds)
+                self._wake.clear()
+
+    def claim(self) -> Optional[Tuple[str, int, str, Dict[str, int]]]:
+        """
+        Take the oldest queued job, or a running one past its lease, for this
+        worker: (job id, user id, claim token, rows deleted so far), or None.
+        """
+        stale = func.now() - timedelta(seconds=self.lease_seconds)
+        with SessionLocal() as db:
+            job = db.scalar(
+                select(PurgeJob)
+                .where(or_(PurgeJob.status == "queued",
+                           (PurgeJob.status == "running") & or_(PurgeJob.heartbeat_at.is_(None),
+                                                                PurgeJob.heartbeat_at < stale)))
+                .order_by(PurgeJob.created_at)
+                .limit(1)
+                .with_for_update(skip_locked=True)
+            )
+            if job is None:
+                return None
+            if job.status == "running":
+                logger.warning("Resuming purge job %s of user %d (worker %s stopped)", job.id, job.user_id, job.claimed_by)
+            token = uuid.uuid4().hex
+            job.status, job.claimed_by, job.heartbeat_at = "running", token, func.now()
+            claimed = (job.id, job.user_id, token, dict(job.deleted or {}))
+            db.commit()
+            return claimed
+
+    def run(self, job_id: str, user_id: int, token: str, deleted: Dict[str, int]) -> None:
+        db = SessionLocal()
+        mine = (PurgeJob.id == job_id) & (PurgeJob.claimed_by == token)
+        try:
+            self._start(db, user_id)
+            for attempt in range(PASSES):
+                try:
+                    for name, table, condition, returning, callback in purge_steps(user_id):
+                        statement = batch_delete(table, condition, returning, self.batch_rows)
+                        while self._batch(db, mine, user_id, name, statement, callback, deleted) == self.batch_rows:
+                            if self.pause:
+                                time.sleep(self.pause)
+                    break
+                except IntegrityError:
+                    # Something referencing the user was written meanwhile: go round again
+                    db.rollback()
+                    if attempt == PASSES - 1:
+                        raise
+            db.execute(update(PurgeJob).where(mine)
+                       .values(status="done", step=None, heartbeat_at=None, finished_at=func.now()))
+            db.commit()
+            response_cache.invalidate(USERS, BADGES, SKILLS)
+        except ClaimLost:
+            db.rollback()
+            logger.warning("Purge job %s of user %d was taken over by another worker", job_id, user_id)
+        except Exception as exc:
+            logger.exception("Purge of user %d failed", user_id)
+            try:
+                db.rollback()
+                db.execute(update(PurgeJob).where(mine)
+                           .values(status="failed", error=str(exc)[:1000], heartbeat_at=None, finished_at=func.now()))
+                db.commit()
+            except Exception:
+                # Database unreachable: leave the job running, to be retried once its lease runs out
+                logger.exception("Could not mark purge job %s failed", job_id)
+        finally:
+            db.close()
+
+    def _start(self, db: Session, user_id: int) -> None:
+        """Take the user out of listings, matches, search and the auth cache before the slow part."""
+        user = db.get(User, user_id)
+        old_state = match_state(user, db.execute(user_skill_rows(user_id)).all()) if user else None
+        if user is not None:
+            user.is_public = False
+        db.commit()
+        principal_cache.invalidate(user_id)
+        response_cache.invalidate(USERS)
+        unindex_user(user_id)
+        if old_state is not None:
+            recommender.changed(user_id, old_state, None)
+
+    def _batch(self, db: Session, mine, user_id: int, step: str, statement,
+               callback: Optional[Callable], deleted: Dict[str, int]) -> int:
+        """One batch in its own transaction, committed only while the claim holds; returns rows deleted."""
+        for attempt in range(self.lock_retries + 1):
+            try:
+                db.execute(text(f"SET LOCAL lock_timeout = {int(self.lock_timeout_ms)}"))
+                rows = db.execute(statement).all()
+                if callback is not None and rows:
+                    callback(db, user_id, rows)
+                progress = {**deleted, step: deleted.get(step, 0) + len(rows)}
+                claimed = db.execute(update(PurgeJob).where(mine)
+                                     .values(step=step, deleted=progress, heartbeat_at=func.now())).rowcount
+                if not claimed:
+                    raise ClaimLost()
+                db.commit()
+                deleted.update(progress)
+                return len(rows)
+            except OperationalError as exc:
+                db.rollback()
+                if getattr(exc.orig, "pgcode", None) != LOCK_NOT_AVAILABLE or attempt == self.lock_retries:
+                    raise
+                time.sleep(min(0.1 * 2 ** attempt, 5.0))
+        return 0
+
+
+purge_worker = PurgeWorker()
@@ -0,0 +1,102 @@
+# services/ratings.py
+# Incrementally maintained rating summaries (count, sum, average) per user
+from collections import defaultdict
+from typing import Iterable, Optional, Tuple
+
+from sqlalchemy import Float, Integer, cast, column, func, literal, select, union_all, update, values
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.models.invite import Invite
+from app.models.rating import UserRatingSummary
+from app.models.swap import Swap
+
+
+def apply_rating(db: Session, user_id: int, rating: int, previous: Optional[int] = None) -> None:
+    """
+    Fold a submitted rating into the receiver's summary row.
+    Runs inside the caller's transaction, so the summary commits together
+    with the swap/invite it belongs to. If the row was already rated,
+    `previous` is swapped out instead of counting the rating twice.
+    """
+    count_delta = 0 if previous is not None else 1
+    sum_delta = rating - (previous or 0)
+    new_count = UserRatingSummary.rating_count + count_delta
+    new_sum = UserRatingSummary.rating_sum + sum_delta
+    stmt = insert(UserRatingSummary).values(
+        user_id=user_id,
+        rating_count=count_delta,
+        rating_sum=sum_delta,
+        rating_avg=float(sum_delta) / count_delta if count_delta else None,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[UserRatingSummary.user_id],
+        set_={
+            "rating_count": new_count,
+            "rating_sum": new_sum,
+            "rating_avg": cast(new_sum, Float) / func.nullif(new_count, 0),
+        },
+    )
+    db.execute(stmt)
+
+
+def remove_ratings(db: Session, ratings: Iterable[Tuple[int, Optional[int]]]) -> None:
+    """
+    Take deleted ratings, as (receiver id, rating) pairs, back out of their
+    receivers' summaries in one UPDATE. Unrated pairs are ignored. Runs
+    inside the caller's transaction, like apply_rating().
+    """
+    totals = defaultdict(lambda: [0, 0])
+    for user_id, rating in ratings:
+        if rating is not None:
+            totals[user_id][0] += 1
+            totals[user_id][1] += rating
+    if not totals:
+        return
+    removed = values(
+        column("user_id", Integer), column("count", Integer), column("total", Integer), name="removed"
+    ).data([(user_id, count, total) for user_id, (count, total) in totals.items()])
+    new_count = UserRatingSummary.rating_count - removed.c.count
+    new_sum = UserRatingSummary.rating_sum - removed.c.total
+    db.execute(
+        update(UserRatingSummary)
+        .where(UserRatingSummary.user_id == removed.c.user_id)
+        .values(rating_count=new_count, rating_sum=new_sum,
+                rating_avg=cast(new_sum, Float) / func.nullif(new_count, 0))
+    )
+
+
+def display_rating(rating_avg: Optional[float]) -> Optional[float]:
+    """Round a stored average the way the API has always returned it."""
+    return round(rating_avg, 2) if rating_avg is not None else None
+
+
+def backfill_rating_summaries(db: Session) -> int:
+    """
+    Rebuild every summary from the rated swaps and invites in one statement.
+    Returns the number of users that have a summary row afterwards.
+    """
+    ratings = union_all(
+        select(Swap.receiver_id.label("user_id"), Swap.rating.label("rating")).where(Swap.rating != None),
+        select(Invite.receiver_id.label("user_id"), Invite.rating.label("rating")).where(Invite.rating != None),
+    ).subquery()
+    totals = select(
+        ratings.c.user_id,
+        func.count(literal(1)),
+        func.sum(ratings.c.rating),
+        cast(func.avg(ratings.c.rating), Float),
+    ).group_by(ratings.c.user_id)
+    stmt = insert(UserRatingSummary).from_select(
+        ["user_id", "rating_count", "rating_sum", "rating_avg"], totals
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[UserRatingSummary.user_id],
+        set_={
+            "rating_count": stmt.excluded.rating_count,
+            "rating_sum": stmt.excluded.rating_sum,
+            "rating_avg": stmt.excluded.rating_avg,
+        },
+    )
+    db.execute(stmt)
+    db.commit()
+    return db.query(func.count(UserRatingSummary.user_id)).scalar()
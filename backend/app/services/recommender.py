@@ -1,2 +1,361 @@
 # services/recommender.py
-# Business logic for skill matching (skeleton)
+# Reciprocal skill matching: users who offer what I want and want what I offer
+import re
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.skill import Skill, UserSkill
+from app.models.user import User
+
+RECOMMENDER_CHANNEL = "recommender"
+
+# A posting list becomes a bitmap at DENSE_AT members and a set again below SPARSE_AT.
+# A 1M-user bitmap is 125 KB, about the size of a 2k-member set.
+DENSE_AT = 2048
+SPARSE_AT = 1024
+
+_NONZERO = re.compile(rb"[^\x00]")
+
+# Posting keys: ("o", skill) offered, ("w", skill) wanted,
+# ("l", skill, level) offered at a level, ("r", skill) offered and teachable remotely
+Key = Tuple[str, ...]
+
+
+def _norm(name: str) -> str:
+    return name.strip().lower()
+
+
+def _bytes(bits: int) -> bytes:
+    return bits.to_bytes((bits.bit_length() + 7) // 8, "little")
+
+
+def _has(data: bytes, i: int) -> bool:
+    """O(1) bit test on a bitmap converted with _bytes()."""
+    byte = i >> 3
+    return byte < len(data) and bool(data[byte] >> (i & 7) & 1)
+
+
+def _bitmap(ids: Iterable[int]) -> int:
+    """Build a bitmap int in one pass (setting bits one by one is O(width) each)."""
+    ids = list(ids)
+    if not ids:
+        return 0
+    data = bytearray(max(ids) // 8 + 1)
+    for i in ids:
+        data[i >> 3] |= 1 << (i & 7)
+    return int.from_bytes(data, "little")
+
+
+def iter_bits(bits: int, after: int = -1) -> Iterator[int]:
+    """Set bit positions above `after`, ascending. Skips zero bytes in C."""
+    start = after + 1
+    bits >>= start
+    data = _bytes(bits)
+    for match in _NONZERO.finditer(data):
+        byte = match.start()
+        value = data[byte]
+        for bit in range(8):
+            if value >> bit & 1:
+                yield start + byte * 8 + bit
+
+
+class Posting:
+    """User ids for one key: a set while sparse, an int bitmap once dense."""
+    __slots__ = ("ids", "bits", "count")
+
+    def __init__(self, ids: Iterable[int] = ()):
+        ids = set(ids)
+        if len(ids) >= DENSE_AT:
+            self.ids, self.bits, self.count = None, _bitmap(ids), len(ids)
+        else:
+            self.ids, self.bits, self.count = ids, 0, len(ids)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def add(self, i: int) -> None:
+        if self.ids is not None:
+            self.ids.add(i)
+            self.count = len(self.ids)
+            if self.count >= DENSE_AT:
+                self.bits, self.ids = _bitmap(self.ids), None
+        elif not self.bits >> i & 1:
+            self.bits |= 1 << i
+            self.count += 1
+
+    def discard(self, i: int) -> None:
+        if self.ids is not None:
+            self.ids.discard(i)
+            self.count = len(self.ids)
+        elif self.bits >> i & 1:
+            self.bits ^= 1 << i
+            self.count -= 1
+            if self.count < SPARSE_AT:
+                self.ids, self.bits = set(iter_bits(self.bits)), 0
+
+
+class _Union:
+    """Accumulates postings as (bitmap of the dense ones, set of the sparse ones)."""
+    __slots__ = ("bits", "ids", "_data")
+
+    def __init__(self):
+        self.bits = 0
+        self.ids: Set[int] = set()
+        self._data: Optional[bytes] = None
+
+    def add(self, posting: Optional[Posting]) -> None:
+        if posting is None:
+            return
+        if posting.ids is None:
+            self.bits |= posting.bits
+        else:
+            self.ids |= posting.ids
+
+    def add_both(self, a: Optional[Posting], b: Optional[Posting]) -> None:
+        """Add the intersection of two postings."""
+        if a is None or b is None:
+            return
+        if a.ids is None and b.ids is None:
+            self.bits |= a.bits & b.bits
+        elif a.ids is not None and b.ids is not None:
+            self.ids |= a.ids & b.ids
+        else:
+            sparse, dense = (a, b) if a.ids is not None else (b, a)
+            data = _bytes(dense.bits)
+            self.ids.update(i for i in sparse.ids if _has(data, i))
+
+    def __contains__(self, i: int) -> bool:
+        if i in self.ids:
+            return True
+        if self._data is None:
+            self._data = _bytes(self.bits)
+        return _has(self._data, i)
+
+
+def user_skill_rows(user_id: int):
+    """SELECT of a user's approved skills as (name, type, level, remote); works for Session and AsyncSession."""
+    return (
+        select(Skill.name, UserSkill.type, UserSkill.level, UserSkill.can_teach_remotely)
+        .join(Skill, Skill.id == UserSkill.skill_id)
+        .where(UserSkill.user_id == user_id, UserSkill.is_approved == 1)
+    )
+
+
+def match_state(user: User, skill_rows: Sequence[Sequence]) -> dict:
+    """
+    Everything the index stores for one user, as plain JSON: public flag
+    plus posting keys from the skills_* arrays and the UserSkill rows.
+    """
+    keys: Set[Key] = set()
+    for name in user.skills_offered or []:
+        keys.add(("o", _norm(name)))
+    for name in user.skills_wanted or []:
+        keys.add(("w", _norm(name)))
+    for name, skill_type, level, remote in skill_rows:
+        name = _norm(name)
+        if skill_type == "wanted":
+            keys.add(("w", name))
+            continue
+        keys.add(("o", name))
+        if level is not None:
+            keys.add(("l", name, getattr(level, "value", level)))
+        if remote:
+            keys.add(("r", name))
+    return {"public": bool(user.is_public), "keys": sorted(keys)}
+
+
+class Recommender:
+    """
+    In-memory inverted index from skill to the ids of users who offer or
+    want it, for reciprocal matching.
+    A match is a public user who offers at least one skill I want AND
+    wants at least one skill I offer. With dense skills held as int
+    bitmaps, that is a few ORs and one AND over ints, whatever the
+    number of users. The index is loaded from the database on first use.
+    After that, each change is applied as a diff of the user's old and
+    new match_state(). Changes go through the pub/sub bus, so every
+    worker's copy stays current.
+    """
+    def __init__(self):
+        self._postings: Dict[Key, Posting] = {}
+        self._public = 0
+        self._loaded = False
+        self._pending: Optional[List[dict]] = None
+        self._lock = threading.RLock()
+        self._load_lock = threading.Lock()
+        self.pubsub = None
+
+    def bind(self, pubsub) -> None:
+        self.pubsub = pubsub
+        pubsub.subscribe(RECOMMENDER_CHANNEL, self.apply)
+
+    # --- Writes ---
+    def changed(self, user_id: int, old: Optional[dict], new: Optional[dict]) -> None:
+        """Record a change to one user (old/new from match_state(); None = absent)."""
+        event = {"user_id": user_id, "old": old, "new": new}
+        if self.pubsub is None:
+            self.apply(event)
+        else:
+            self.pubsub.publish_nowait(RECOMMENDER_CHANNEL, event)
+
+    def apply(self, event: dict) -> None:
+        with self._lock:
+            if self._pending is not None:
+                # A load is in progress: replay once it is done
+                self._pending.append(event)
+                return
+            if not self._loaded:
+                return
+            self._apply(event)
+
+    def _apply(self, event: dict) -> None:
+        user_id, old, new = event["user_id"], event.get("old") or {}, event.get("new") or {}
+        old_keys = {tuple(k) for k in old.get("keys", ())}
+        new_keys = {tuple(k) for k in new.get("keys", ())}
+        for key in old_keys - new_keys:
+            posting = self._postings.get(key)
+            if posting is not None:
+                posting.discard(user_id)
+                if not posting:
+                    del self._postings[key]
+        for key in new_keys - old_keys:
+            posting = self._postings.get(key)
+            if posting is None:
+                posting = self._postings[key] = Posting()
+            posting.add(user_id)
+        if new.get("public"):
+            self._public |= 1 << user_id
+        elif self._public >> user_id & 1:
+            self._public ^= 1 << user_id
+
+    # --- Load ---
+    def ensure_loaded(self, db: Session) -> None:
+        """Build the index from the database unless it is already built."""
+        if self._loaded:
+            return
+        with self._load_lock:
+            if self._loaded:
+                return
+            self.load(
+                db.query(User.id, User.is_public, User.skills_offered, User.skills_wanted).yield_per(10000),
+                db.execute(
+                    select(UserSkill.user_id, Skill.name, UserSkill.type, UserSkill.level, UserSkill.can_teach_remotely)
+                    .join(Skill, Skill.id == UserSkill.skill_id)
+                    .where(UserSkill.is_approved == 1)
+                    .execution_options(yield_per=10000)
+                ),
+            )
+
+    def load(self, users: Iterable[Sequence], user_skills: Iterable[Sequence]) -> None:
+        """
+        Replace the index in bulk. `users` yields (id, is_public, skills_offered,
+        skills_wanted) and `user_skills` yields (user_id, skill name, type,
+        level, can_teach_remotely). Changes that arrive meanwhile are
+        replayed afterwards.
+        """
+        with self._lock:
+            self._pending = []
+        try:
+            members: Dict[Key, List[int]] = {}
+            public: List[int] = []
+            for user_id, is_public, offered, wanted in users:
+                if is_public:
+                    public.append(user_id)
+                for name in offered or []:
+                    members.setdefault(("o", _norm(name)), []).append(user_id)
+                for name in wanted or []:
+                    members.setdefault(("w", _norm(name)), []).append(user_id)
+            for user_id, name, skill_type, level, remote in user_skills:
+                name = _norm(name)
+                if skill_type == "wanted":
+                    members.setdefault(("w", name), []).append(user_id)
+                    continue
+                members.setdefault(("o", name), []).append(user_id)
+                if level is not None:
+                    members.setdefault(("l", name, getattr(level, "value", level)), []).append(user_id)
+                if remote:
+                    members.setdefault(("r", name), []).append(user_id)
+            postings = {key: Posting(ids) for key, ids in members.items()}
+        except BaseException:
+            with self._lock:
+                self._pending = None
+            raise
+        with self._lock:
+            self._postings = postings
+            self._public = _bitmap(public)
+            self._loaded = True
+            pending, self._pending = self._pending, None
+            for event in pending:
+                self._apply(event)
+
+    # --- Reads ---
+    def matches(
+        self,
+        state: dict,
+        user_id: int,
+        level: Optional[str] = None,
+        remote_only: bool = False,
+        after: int = -1,
+        limit: int = 20,
+    ) -> Tuple[List[int], bool]:
+        """
+        Up to `limit` ids of reciprocal matches for a user with match_state()
+        `state`, ascending, starting after `after`, plus whether more follow.
+        `level` / `remote_only` restrict
+        the partner's side: the skill they offer me must be at that level
+        and/or teachable remotely (only UserSkill rows carry those).
+        """
+        keys = [tuple(k) for k in state["keys"]]
+        wanted = {k[1] for k in keys if k[0] == "w"}
+        offered = {k[1] for k in keys if k[0] == "o"}
+        with self._lock:
+            they_offer, they_want = _Union(), _Union()
+            for name in wanted:
+                if level and remote_only:
+                    they_offer.add_both(self._postings.get(("l", name, level)), self._postings.get(("r", name)))
+                elif level:
+                    they_offer.add(self._postings.get(("l", name, level)))
+                elif remote_only:
+                    they_offer.add(self._postings.get(("r", name)))
+                else:
+                    they_offer.add(self._postings.get(("o", name)))
+            for name in offered:
+                they_want.add(self._postings.get(("w", name)))
+            public = self._public
+
+        # Dense part: pure int ops. Sparse ids are checked one by one against both sides.
+        both = they_offer.bits & they_want.bits & public
+        public_data = _bytes(public)
+        sparse = sorted(
+            i for i in they_offer.ids | they_want.ids
+            if i > after and i in they_offer and i in they_want and _has(public_data, i)
+        )
+        result: List[int] = []
+        dense = iter_bits(both, after)
+        next_dense = next(dense, None)
+        pos = 0
+        while len(result) <= limit:
+            next_sparse = sparse[pos] if pos < len(sparse) else None
+            if next_dense is None and next_sparse is None:
+                break
+            if next_sparse is None or (next_dense is not None and next_dense < next_sparse):
+                candidate, next_dense = next_dense, next(dense, None)
+            else:
+                candidate = next_sparse
+                pos += 1
+                if candidate == next_dense:
+                    next_dense = next(dense, None)
+            if candidate != user_id and (not result or result[-1] != candidate):
+                result.append(candidate)
+        return result[:limit], len(result) > limit
+
+    def stats(self) -> dict:
+        with self._lock:
+            dense = sum(1 for p in self._postings.values() if p.ids is None)
+            return {"loaded": self._loaded, "postings": len(self._postings), "dense_postings": dense}
+
+
+recommender = Recommender()
@@ -0,0 +1,211 @@
+# services/search.py
+# User search: pg_trgm-ranked on PostgreSQL, pure-Python n-gram index elsewhere
+import re
+import threading
+import time
+from array import array
+from collections import Counter
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import case, func, or_, text
+from sqlalchemy.orm import Query, Session
+
+from app.models.user import User
+
+# Same default as pg_trgm.similarity_threshold, so both backends agree on "fuzzy"
+SIMILARITY_THRESHOLD = 0.3
+
+_WORD_RE = re.compile(r"[^\W_]+", re.UNICODE)
+
+
+def trigrams(value: str) -> Set[str]:
+    """
+    Split a string into trigrams the way pg_trgm does: lower-case each
+    word, pad it with two leading spaces and one trailing space.
+    """
+    grams = set()
+    for word in _WORD_RE.findall(value.lower()):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class NgramIndex:
+    """
+    In-memory trigram index for the search box, used when the database is not PostgreSQL (e.g. SQLite test runs).
+    Each document has a fixed number of text fields (name, email). Every
+    field is scored on its own and the best field wins, like
+    greatest(similarity(name, q), similarity(email, q)) in SQL. A match is a
+    substring hit (ILIKE semantics) or a similarity of at least
+    SIMILARITY_THRESHOLD. Postings are compact unsigned-int arrays of
+    `doc_id * fields + field`, which keeps 1M users in a few hundred MB.
+    Removing a document doesn't scan its postings (a common trigram has
+    hundreds of thousands of entries at 1M users): its entries become
+    tombstones, skipped by searches, revived if the same document gets
+    the same trigram back, and swept out once they are half an array.
+    """
+    def __init__(self, fields: int = 2):
+        self.fields = fields
+        self._postings: Dict[str, array] = {}
+        # gram -> entries in its postings array that are no longer live
+        self._tombstones: Dict[str, Set[int]] = {}
+        # doc_id -> (lower-cased field values, trigram count per field)
+        self._docs: Dict[int, Tuple[Tuple[str, ...], Tuple[int, ...]]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def add(self, doc_id: int, *values: Optional[str]) -> None:
+        """Index (or re-index) a document; missing fields count as empty."""
+        values = tuple((v or "").lower() for v in values[:self.fields])
+        values += ("",) * (self.fields - len(values))
+        grams = [trigrams(v) for v in values]
+        with self._lock:
+            self._drop(doc_id)
+            self._docs[doc_id] = (values, tuple(len(g) for g in grams))
+            for field, field_grams in enumerate(grams):
+                entry = doc_id * self.fields + field
+                for gram in field_grams:
+                    tombstones = self._tombstones.get(gram)
+                    if tombstones and entry in tombstones:
+                        # Still in the array from before the re-index: live again
+                        tombstones.discard(entry)
+                        continue
+                    postings = self._postings.get(gram)
+                    if postings is None:
+                        postings = self._postings[gram] = array("I")
+                    postings.append(entry)
+
+    def remove(self, doc_id: int) -> None:
+        with self._lock:
+            self._drop(doc_id)
+
+    def _drop(self, doc_id: int) -> None:
+        old = self._docs.pop(doc_id, None)
+        if old is None:
+            return
+        for field, value in enumerate(old[0]):
+            entry = doc_id * self.fields + field
+            for gram in trigrams(value):
+                postings = self._postings.get(gram)
+                if postings is None:
+                    continue
+                tombstones = self._tombstones.setdefault(gram, set())
+                tombstones.add(entry)
+                if len(tombstones) * 2 >= len(postings):
+                    self._compact(gram)
+
+    def _compact(self, gram: str) -> None:
+        """Rewrite one postings array without its tombstones (amortised: only when half of it is dead)."""
+        tombstones = self._tombstones.pop(gram, set())
+        live = array("I", (entry for entry in self._postings[gram] if entry not in tombstones))
+        if live:
+            self._postings[gram] = live
+        else:
+            del self._postings[gram]
+
+    def _live(self, gram: str):
+        postings = self._postings.get(gram, ())
+        tombstones = self._tombstones.get(gram)
+        return (entry for entry in postings if entry not in tombstones) if tombstones else postings
+
+    def search(self, term: str, limit: Optional[int] = None) -> List[Tuple[int, float]]:
+        """Return (doc_id, score) pairs, best match first."""
+        needle = term.lower().strip()
+        if not needle:
+            return []
+        query_grams = trigrams(needle)
+        best: Dict[int, float] = {}
+        with self._lock:
+            hits = Counter()
+            for gram in query_grams:
+                hits.update(self._live(gram))
+            for entry, shared in hits.items():
+                doc_id, field = divmod(entry, self.fields)
+                values, counts = self._docs[doc_id]
+                union = len(query_grams) + counts[field] - shared
+                score = shared / union if union else 0.0
+                if score >= SIMILARITY_THRESHOLD or needle in values[field]:
+                    if score > best.get(doc_id, -1.0):
+                        best[doc_id] = score
+            if len(needle) < 3:
+                # Too short to produce a selective trigram; fall back to a substring scan
+                for doc_id, (values, _) in self._docs.items():
+                    if doc_id not in best and any(needle in v for v in values):
+                        best[doc_id] = 0.0
+        results = sorted(best.items(), key=lambda r: (-r[1], r[0]))
+        return results[:limit] if limit else results
+
+
+# --- Backend selection ---
+_fallback_index: Optional[NgramIndex] = None
+_fallback_lock = threading.Lock()
+TRGM_RECHECK_SECONDS = 60.0
+# database URL -> (pg_trgm installed, time.monotonic() of the check)
+_trgm_available: Dict[str, Tuple[bool, float]] = {}
+
+
+def _has_pg_trgm(db: Session) -> bool:
+    """
+    Whether the pg_trgm extension is installed, per database URL. "Yes" is
+    cached for good; "no" is checked again after TRGM_RECHECK_SECONDS, so
+    installing the extension takes effect without a restart.
+    """
+    url = str(db.get_bind().url)
+    cached = _trgm_available.get(url)
+    if cached is not None and (cached[0] or time.monotonic() - cached[1] < TRGM_RECHECK_SECONDS):
+        return cached[0]
+    installed = bool(db.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")).scalar())
+    _trgm_available[url] = (installed, time.monotonic())
+    return installed
+
+
+def _get_fallback_index(db: Session) -> NgramIndex:
+    global _fallback_index
+    with _fallback_lock:
+        if _fallback_index is None:
+            index = NgramIndex()
+            for user_id, name, email in db.query(User.id, User.name, User.email).yield_per(10000):
+                index.add(user_id, name, email)
+            _fallback_index = index
+    return _fallback_index
+
+
+def index_user(user: User) -> None:
+    """Keep the fallback index current after a user is created or edited."""
+    if _fallback_index is not None:
+        _fallback_index.add(user.id, user.name, user.email)
+
+
+def unindex_user(user_id: int) -> None:
+    if _fallback_index is not None:
+        _fallback_index.remove(user_id)
+
+
+def search_users(db: Session, query: Query, term: str) -> Query:
+    """
+    Restrict a User query to matches for `term`, best matches first.
+    - PostgreSQL with pg_trgm: ILIKE plus the `%` similarity operator, both
+      served by the GIN trigram indexes, ordered by similarity().
+    - PostgreSQL without pg_trgm: plain ILIKE, ordered by id (old behaviour).
+    - Anything else: ids come from the in-process NgramIndex.
+    """
+    pattern = f"%{term}%"
+    if db.get_bind().dialect.name == "postgresql":
+        if not _has_pg_trgm(db):
+            return query.filter(or_(User.name.ilike(pattern), User.email.ilike(pattern))).order_by(User.id)
+        score = func.greatest(func.similarity(User.name, term), func.similarity(User.email, term))
+        return query.filter(
+            or_(
+                User.name.ilike(pattern),
+                User.email.ilike(pattern),
+                User.name.op("%")(term),
+                User.email.op("%")(term),
+            )
+        ).order_by(score.desc(), User.id)
+    ranked = [doc_id for doc_id, _ in _get_fallback_index(db).search(term)]
+    if not ranked:
+        return query.filter(False)
+    order = case({doc_id: rank for rank, doc_id in enumerate(ranked)}, value=User.id)
+    return query.filter(User.id.in_(ranked)).order_by(order)
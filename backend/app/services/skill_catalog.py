@@ -0,0 +1,53 @@
+# services/skill_catalog.py
+# Cached category -> skill names map and the JSONB skill filter built on it
+import threading
+import time
+from typing import Dict, List, Optional
+
+from sqlalchemy import String, literal, or_
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Session
+
+from app.models.skill import Skill
+from app.models.user import User
+
+# Other workers only learn about new/deleted skills when their copy expires
+CATEGORY_MAP_TTL_SECONDS = 300
+
+_category_map: Optional[Dict[str, List[str]]] = None
+_loaded_at = 0.0
+_lock = threading.Lock()
+
+
+def category_skill_names(db: Session, category: str) -> List[str]:
+    """
+    Return the names of all skills in `category`.
+    The whole map is loaded with one query and kept in process until
+    invalidate_category_map() runs or the TTL expires.
+    """
+    global _category_map, _loaded_at
+    with _lock:
+        if _category_map is None or time.monotonic() - _loaded_at > CATEGORY_MAP_TTL_SECONDS:
+            category_map: Dict[str, List[str]] = {}
+            for skill_category, name in db.query(Skill.category, Skill.name).all():
+                category_map.setdefault(skill_category, []).append(name)
+            _category_map, _loaded_at = category_map, time.monotonic()
+        return _category_map.get(category, [])
+
+
+def invalidate_category_map() -> None:
+    """Drop the cached map; call after a skill is created or deleted."""
+    global _category_map
+    with _lock:
+        _category_map = None
+
+
+def has_any_skill(names: List[str]):
+    """
+    Filter users who offer or want any of `names`.
+    Each side is a single `?|` test against one array parameter, so the SQL
+    stays the same size however many names there are, and both sides can
+    use the GIN indexes on users.skills_offered / users.skills_wanted.
+    """
+    names_param = literal(list(names), ARRAY(String))
+    return or_(User.skills_offered.has_any(names_param), User.skills_wanted.has_any(names_param))
@@ -0,0 +1,169 @@
+# services/trending.py
+# Time-decayed skill popularity and the in-process top-K served by /skills/trending
+import asyncio
+import math
+import time
+from collections import Counter
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy import Integer, case, column, func, select, update, values
+
+from app.config import TRENDING_HALF_LIFE_HOURS, TRENDING_REFRESH_SECONDS, TRENDING_TOP_K
+from app.models.skill import Skill
+
+# Score added per event
+USER_SKILL_WEIGHT = 1.0
+SWAP_WEIGHT = 2.0
+
+# Forward decay from a fixed landmark (2025-01-01 UTC): an event at t is
+# worth weight * e^(rate * (t - EPOCH)), so an old event is never rewritten;
+# every later event is simply worth more. Ordering by the sum is the same as
+# ordering by the decayed score at any moment, so a plain b-tree on
+# skills.trend_score serves the top-K.
+# The sum itself leaves float range within months at a short half-life
+# (e^709 is the limit: ~16 months at 12h), so trend_score holds its natural
+# log, which grows linearly with time instead: ln(weight) + rate * (t - EPOCH)
+# per event, combined with log-sum-exp.
+EPOCH = 1735689600.0
+DECAY_RATE = math.log(2) / (TRENDING_HALF_LIFE_HOURS * 3600.0)
+# trend_score of a skill with no activity (ln 0); finite so it sorts, serializes and subtracts
+NO_SCORE = -1e9
+# Postgres raises on exp() underflow instead of returning 0; e^-700 is already nothing
+_EXP_FLOOR = -700.0
+# A removal leaving less than this fraction of the score empties it (ln(0) is an error)
+_EMPTY_FRACTION = 1e-9
+
+
+def log_weight(weight: float, now: Optional[float] = None) -> float:
+    """Stored (log) weight of an event of `weight` happening at `now`."""
+    return math.log(weight) + DECAY_RATE * ((now or time.time()) - EPOCH)
+
+
+def decayed(stored: float, now: Optional[float] = None) -> float:
+    """Stored trend_score -> score as of `now` (one user-skill event now = 1.0)."""
+    if stored is None or stored <= NO_SCORE:
+        return 0.0
+    return math.exp(stored - log_weight(USER_SKILL_WEIGHT, now))
+
+
+def _log_add(stored, added):
+    """SQL ln(e^stored + e^added), without leaving float range."""
+    return func.greatest(stored, added) + func.ln(1 + func.exp(func.greatest(-func.abs(stored - added), _EXP_FLOOR)))
+
+
+def _log_sub(stored, removed):
+    """SQL ln(e^stored - e^removed), or NO_SCORE once nothing is left."""
+    return case(
+        (stored - removed > _EMPTY_FRACTION,
+         stored + func.ln(1 - func.exp(func.greatest(removed - stored, _EXP_FLOOR)))),
+        else_=NO_SCORE,
+    )
+
+
+def user_skill_changed(skill_id: int, skill_type: str, added: bool):
+    """
+    UPDATE for one user skill being added or removed. Removal undoes one
+    add at today's weight, never going below zero.
+    """
+    column = Skill.offer_count if skill_type == "offered" else Skill.request_count
+    weight = log_weight(USER_SKILL_WEIGHT)
+    if added:
+        values = {column: column + 1, Skill.trend_score: _log_add(Skill.trend_score, weight)}
+    else:
+        values = {
+            column: func.greatest(column - 1, 0),
+            Skill.trend_score: _log_sub(Skill.trend_score, weight),
+        }
+    return update(Skill).where(Skill.id == skill_id).values(values).execution_options(synchronize_session=False)
+
+
+def user_skills_removed(rows: Iterable[Tuple[int, str]]) -> list:
+    """
+    UPDATEs for many user skills removed at once, as (skill id, type) pairs:
+    user_skill_changed(..., added=False) for each, one statement per type.
+    """
+    counts = Counter(rows)
+    weight = log_weight(USER_SKILL_WEIGHT)
+    statements = []
+    for skill_type, column_ in (("offered", Skill.offer_count), ("wanted", Skill.request_count)):
+        data = [(skill_id, n) for (skill_id, kind), n in counts.items() if kind == skill_type]
+        if not data:
+            continue
+        removed = values(column("skill_id", Integer), column("n", Integer), name="removed").data(data)
+        statements.append(
+            update(Skill)
+            .where(Skill.id == removed.c.skill_id)
+            .values({
+                column_: func.greatest(column_ - removed.c.n, 0),
+                Skill.trend_score: _log_sub(Skill.trend_score, func.ln(removed.c.n) + weight),
+            })
+            .execution_options(synchronize_session=False)
+        )
+    return statements
+
+
+def swap_created(skill_ids: Iterable[int]):
+    """UPDATE for a new swap involving `skill_ids` (offered and requested)."""
+    return (
+        update(Skill)
+        .where(Skill.id.in_(set(skill_ids)))
+        .values({
+            Skill.swap_count: Skill.swap_count + 1,
+            Skill.trend_score: _log_add(Skill.trend_score, log_weight(SWAP_WEIGHT)),
+        })
+        .execution_options(synchronize_session=False)
+    )
+
+
+class TrendingCache:
+    """
+    Top-K skills by trend_score, refreshed by a background task every
+    TRENDING_REFRESH_SECONDS, so requests never hit the DB. Each worker
+    keeps its own copy; writes show up at the next refresh.
+    """
+    def __init__(self, top_k: int = TRENDING_TOP_K, refresh_seconds: float = TRENDING_REFRESH_SECONDS):
+        self.top_k = top_k
+        self.refresh_seconds = refresh_seconds
+        self.skills: Optional[List[dict]] = None
+        self.refreshed_at = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def get(self, limit: int) -> Optional[List[dict]]:
+        """Top `limit` skills with their current decayed score; None before the first load."""
+        if self.skills is None:
+            return None
+        now = time.time()
+        return [dict(skill, score=round(decayed(skill["trend_score"], now), 4)) for skill in self.skills[:limit]]
+
+    async def refresh(self, db) -> None:
+        result = await db.execute(
+            select(Skill.id, Skill.name, Skill.category, Skill.offer_count, Skill.request_count,
+                   Skill.swap_count, Skill.trend_score)
+            .where(Skill.is_approved == 1)
+            .order_by(Skill.trend_score.desc())
+            .limit(self.top_k)
+        )
+        self.skills = [dict(row._mapping) for row in result]
+        self.refreshed_at = time.time()
+
+    def start(self, session_factory) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(session_factory))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self, session_factory) -> None:
+        while True:
+            try:
+                async with session_factory() as db:
+                    await self.refresh(db)
+            except Exception:
+                # Keep serving the last good list; try again next round
+                pass
+            await asyncio.sleep(self.refresh_seconds)
+
+
+trending_cache = TrendingCache()
@@ -1,2 +1,99 @@
 # utils/hashing.py
-# Password hashing helpers (skeleton)
+# Password hashing helpers: bcrypt runs in a process pool, off the event loop
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Optional
+
+from passlib.context import CryptContext
+
+from app.config import BCRYPT_ROUNDS, HASHING_WORKERS, HASHING_MAX_PENDING, HASHING_QUEUE_TIMEOUT_SECONDS
+
+
+class HashingBusyError(Exception):
+    """Raised when the hashing queue is full; the caller should answer 503."""
+
+
+@lru_cache(maxsize=None)
+def _context(rounds: int) -> CryptContext:
+    return CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=rounds)
+
+
+def hash_password_sync(password: str, rounds: int = BCRYPT_ROUNDS) -> str:
+    """Hash a password in the current process (scripts, pool workers)."""
+    return _context(rounds).hash(password)
+
+
+def verify_password_sync(password: str, hashed: str, rounds: int = BCRYPT_ROUNDS) -> bool:
+    """Check a password against a stored hash in the current process."""
+    return _context(rounds).verify(password, hashed)
+
+
+class PasswordHasher:
+    """
+    Async-friendly bcrypt service.
+    Each hash/verify runs in a ProcessPoolExecutor, so a login burst
+    neither blocks the event loop nor holds the GIL of the worker serving
+    other requests. At most `max_pending` operations may be queued or
+    running. Beyond that, callers wait up to `queue_timeout` seconds and
+    then get HashingBusyError, instead of piling up behind a backlog
+    that would time out anyway.
+    Example:
+        password_hash = await password_hasher.hash("secret")
+        ok = await password_hasher.verify("secret", password_hash)
+    """
+    def __init__(self, rounds: int, workers: Optional[int], max_pending: int, queue_timeout: float):
+        self.rounds = rounds
+        self.workers = workers
+        self.max_pending = max_pending
+        self.queue_timeout = queue_timeout
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn, not fork: the server process has running threads (threadpool, DB pools)
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    async def _run(self, fn, *args):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_pending)
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise HashingBusyError("password hashing queue is full")
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            self._slots.release()
+
+    async def hash(self, password: str) -> str:
+        return await self._run(hash_password_sync, password, self.rounds)
+
+    async def verify(self, password: str, hashed: str) -> bool:
+        return await self._run(verify_password_sync, password, hashed, self.rounds)
+
+    def needs_rehash(self, hashed: str) -> bool:
+        """True if `hashed` was made with a different cost than the configured one (cheap, in-process)."""
+        return _context(self.rounds).needs_update(hashed)
+
+    def shutdown(self) -> None:
+        """Stop the worker processes (from the lifespan); the next hash starts a new pool."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        # Bound to the loop that is shutting down
+        self._slots = None
+
+
+password_hasher = PasswordHasher(
+    rounds=BCRYPT_ROUNDS,
+    workers=HASHING_WORKERS,
+    max_pending=HASHING_MAX_PENDING,
+    queue_timeout=HASHING_QUEUE_TIMEOUT_SECONDS,
+)
@@ -1,10 +1,12 @@
+from typing import Optional
 from fastapi import Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
 from sqlalchemy.orm import Session
 from app.models.user import User
-from app.database import get_db
+from app.database import SessionLocal, get_db
 from app.config import SECRET_KEY
+from app.utils.principal_cache import principal_cache
 
 ALGORITHM = "HS256"
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
@@ -20,9 +22,32 @@ def get_current_user_jwt(db: Session = Depends(get_db), token: str = Depends(oau
         user_id = payload.get("sub")
         if user_id is None:
             raise credentials_exception
-        user = db.query(User).filter(User.id == int(user_id)).first()
-        if not user:
-            raise credentials_exception
-        return user
+        user_id = int(user_id)
+        user = principal_cache.get(user_id)
+        if user is None:
+            user = db.query(User).filter(User.id == user_id).first()
+            if not user:
+                raise credentials_exception
+            # Keep a detached copy in the cache; the request gets its own attached copy below
+            db.expunge(user)
+            principal_cache.put(user_id, user)
+        return db.merge(user, load=False)
     except JWTError:
         raise credentials_exception
+
+
+def get_user_from_token(token: str) -> Optional[User]:
+    """
+    Resolve a JWT outside of a request (e.g. a WebSocket query-string token).
+    Returns a detached User, or None if the token is invalid. Blocking:
+    call it through run_in_threadpool from async code.
+    """
+    db = SessionLocal()
+    try:
+        user = get_current_user_jwt(db=db, token=token)
+        db.expunge(user)
+        return user
+    except HTTPException:
+        return None
+    finally:
+        db.close()
@@ -0,0 +1,141 @@
+# utils/pagination.py
+# Keyset (cursor) pagination helpers shared by the list endpoints
+import base64
+import json
+from datetime import datetime
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Response
+from sqlalchemy import Select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Query
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict) and "dt" in value:
+        return datetime.fromisoformat(value["dt"])
+    return value
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Pack the sort-key values of the last row into an opaque token."""
+    raw = json.dumps([_encode_value(v) for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _python_type(key) -> type:
+    try:
+        return key.type.python_type
+    except NotImplementedError:
+        return object
+
+
+def _matches(value: Any, expected: type) -> bool:
+    if isinstance(value, bool):  # JSON true/false would pass as an int
+        return expected is bool
+    if expected is float:
+        return isinstance(value, (int, float))
+    return isinstance(value, expected)
+
+
+def decode_cursor(cursor: str, types: Sequence[type]) -> List[Any]:
+    """
+    Unpack a token made by encode_cursor, one value per entry of `types`
+    (the Python types of the sort keys); 400 if it was tampered with, so a
+    bad value never reaches the database as a DataError.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != len(types):
+            raise ValueError("wrong cursor size")
+        values = [_decode_value(v) for v in values]
+        if not all(_matches(value, expected) for value, expected in zip(values, types)):
+            raise ValueError("wrong cursor value type")
+        return values
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _page_query(query, keys, cursor, limit, descending, offset):
+    """Add the keyset predicate, ORDER BY and LIMIT (works on Query and Select)."""
+    if cursor:
+        values = decode_cursor(cursor, [_python_type(k) for k in keys])
+        key_tuple, value_tuple = tuple_(*keys), tuple_(*values)
+        query = query.filter(key_tuple < value_tuple if descending else key_tuple > value_tuple)
+    query = query.order_by(*[k.desc() if descending else k.asc() for k in keys])
+    if offset:
+        query = query.offset(offset)
+    return query.limit(limit + 1)
+
+
+def _page_result(rows, keys, limit, entity) -> Tuple[list, Optional[str]]:
+    """Trim the look-ahead row and build the next cursor from the last row kept."""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = entity(rows[-1])
+    return rows, encode_cursor([getattr(last, k.key) for k in keys])
+
+
+def paginate(
+    query: Query,
+    keys: Sequence,
+    cursor: Optional[str],
+    limit: int,
+    descending: bool = False,
+    entity: Callable[[Any], Any] = lambda row: row,
+    offset: int = 0,
+) -> Tuple[list, Optional[str]]:
+    """
+    Return one page of `query` ordered by `keys` plus the cursor for the next page.
+    `keys` must be unique together (end with the primary key) so the order is
+    stable. Pages are found with a `(keys) > (cursor)` predicate instead of
+    OFFSET, so page 1000 costs the same as page 1. `entity` picks the ORM
+    object out of a row when the query selects extra columns; `offset` only
+    exists for legacy page-number callers.
+    Example:
+        items, next_cursor = paginate(db.query(Swap), [Swap.id], cursor, 50, descending=True)
+    """
+    rows = _page_query(query, keys, cursor, limit, descending, offset).all()
+    return _page_result(rows, keys, limit, entity)
+
+
+async def paginate_async(
+    db: AsyncSession,
+    stmt: Select,
+    keys: Sequence,
+    cursor: Optional[str],
+    limit: int,
+    descending: bool = False,
+    offset: int = 0,
+) -> Tuple[list, Optional[str]]:
+    """
+    Async version of paginate for a single-entity select().
+    Example:
+        items, next_cursor = await paginate_async(db, select(Badge), [Badge.id], cursor, 50)
+    """
+    result = await db.execute(_page_query(stmt, keys, cursor, limit, descending, offset))
+    return _page_result(result.scalars().all(), keys, limit, lambda row: row)
+
+
+def legacy_offset(cursor: Optional[str], page: Optional[int], page_size: int) -> int:
+    """
+    OFFSET for an old `page=N` caller. Page numbers still work (at the cost
+    of an OFFSET scan), but are ignored once a cursor is given.
+    """
+    return 0 if cursor or not page else (page - 1) * page_size
+
+
+def set_next_cursor(response: Response, next_cursor: Optional[str]) -> None:
+    """Expose the next-page token; list bodies stay plain JSON arrays."""
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
@@ -0,0 +1,87 @@
+# utils/principal_cache.py
+# Bounded LRU + TTL cache of authenticated users, keyed by user id
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from app.config import PRINCIPAL_CACHE_SIZE, PRINCIPAL_CACHE_TTL_SECONDS
+from app.models.user import User
+
+PRINCIPAL_CACHE_CHANNEL = "principal_cache"
+
+
+class PrincipalCache:
+    """
+    Keeps recently authenticated users so a request doesn't have to load them again.
+    Entries are detached User instances. Callers must not hand them to a
+    route directly; they attach a private copy with
+    `db.merge(user, load=False)`, which costs no SQL. The cache is
+    per-process; invalidate() reaches every worker through the pub/sub
+    bus, and TTL bounds how stale a copy can get if a message is lost.
+    """
+    def __init__(self, maxsize: int = 10000, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()
+        self.pubsub = None
+        self._lock = threading.Lock()
+
+    def bind(self, pubsub) -> None:
+        self.pubsub = pubsub
+        pubsub.subscribe(PRINCIPAL_CACHE_CHANNEL, self._apply)
+
+    def get(self, user_id: int) -> Optional[User]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[user_id]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, user_id: int, user: User) -> None:
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + self.ttl, user)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int) -> None:
+        """Forget a user in every worker; call after their row changes or is deleted."""
+        event = {"user_id": user_id}
+        if self.pubsub is None:
+            self._apply(event)
+        else:
+            self.pubsub.publish_nowait(PRINCIPAL_CACHE_CHANNEL, event)
+
+    def _apply(self, event: dict) -> None:
+        user_id = event.get("user_id")
+        if user_id is None:
+            return
+        with self._lock:
+            self._entries.pop(int(user_id), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+principal_cache = PrincipalCache(maxsize=PRINCIPAL_CACHE_SIZE, ttl=PRINCIPAL_CACHE_TTL_SECONDS)
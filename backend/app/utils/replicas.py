@@ -0,0 +1,185 @@
+# utils/replicas.py
+# Round-robin routing of read-only sessions across Postgres streaming replicas, with lag-aware fallback
+import asyncio
+import itertools
+import logging
+import threading
+import time
+from typing import Dict, List, Optional
+
+from jose import JWTError, jwt
+from sqlalchemy import text
+
+from app.config import REPLICA_CHECK_SECONDS, REPLICA_MAX_LAG_SECONDS, SECRET_KEY
+
+logger = logging.getLogger(__name__)
+
+REPLICA_CHANNEL = "replicas"
+_ALGORITHM = "HS256"  # same as utils/jwt.ALGORITHM (importing it here would be circular)
+
+# Seconds this server is behind its primary. A replica that has replayed everything it
+# received is not behind, however old its last replayed transaction is (idle primary).
+# On a primary (e.g. a replica promoted after failover) it is 0.
+_LAG_SQL = text(
+    "SELECT CASE WHEN NOT pg_is_in_recovery() "
+    "OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+def token_user_id(authorization: Optional[str]) -> Optional[int]:
+    """User id from an `Authorization: Bearer <JWT>` header, or None. Only routing depends on it."""
+    if not authorization or not authorization.lower().startswith("bearer "):
+        return None
+    try:
+        sub = jwt.decode(authorization[7:].strip(), SECRET_KEY, algorithms=[_ALGORITHM]).get("sub")
+        return int(sub) if sub is not None else None
+    except (JWTError, ValueError):
+        return None
+
+
+class ReplicaRouter:
+    """
+    Picks where a read-only session runs: one of `count` replicas in
+    round-robin order, or None for the primary. A background task measures
+    every replica's replay lag every `check_seconds` (start()/stop() from
+    the lifespan); a replica that can't be reached or is more than
+    `max_lag` seconds behind gets no reads until a later check passes.
+    Until the first check, and when no replica is usable, reads go to
+    the primary.
+
+    Read-your-writes: wrote(user_id) keeps that user's reads on the
+    primary for max_lag + check_seconds, the longest a usable replica can
+    be behind. It is shared with every worker through the pub/sub bus.
+    """
+    def __init__(self, count: int, max_lag: float = REPLICA_MAX_LAG_SECONDS,
+                 check_seconds: float = REPLICA_CHECK_SECONDS):
+        self.count = count
+        self.max_lag = max_lag
+        self.check_seconds = check_seconds
+        self.pubsub = None
+        # Last measured lag per replica; None = unknown or unreachable
+        self.lag: List[Optional[float]] = [None] * count
+        self.replica_reads = [0] * count
+        self.primary_reads = 0      # no usable replica
+        self.sticky_reads = 0       # the reader wrote recently
+        self._next = itertools.count()
+        self._writers: Dict[int, float] = {}  # user id -> monotonic deadline
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def window(self) -> float:
+        return self.max_lag + self.check_seconds
+
+    def bind(self, pubsub) -> None:
+        self.pubsub = pubsub
+        pubsub.subscribe(REPLICA_CHANNEL, self._apply)
+
+    # --- Routing ---
+    def usable(self, index: int) -> bool:
+        lag = self.lag[index]
+        return lag is not None and lag <= self.max_lag
+
+    def pick(self, user_id: Optional[int] = None) -> Optional[int]:
+        """Replica index for the next read-only session, or None for the primary."""
+        if not self.count:
+            return None
+        if user_id is not None and self._writers.get(user_id, 0.0) > time.monotonic():
+            self.sticky_reads += 1
+            return None
+        usable = [i for i in range(self.count) if self.usable(i)]
+        if not usable:
+            self.primary_reads += 1
+            return None
+        index = usable[next(self._next) % len(usable)]
+        self.replica_reads[index] += 1
+        return index
+
+    # --- Read-your-writes ---
+    def wrote(self, user_id: int) -> None:
+        if not self.count:
+            return
+        event = {"user_id": user_id}
+        if self.pubsub is None:
+            self._apply(event)
+        else:
+            self.pubsub.publish_nowait(REPLICA_CHANNEL, event)
+
+    def _apply(self, event: dict) -> None:
+        user_id = event.get("user_id")
+        if user_id is None:
+            return
+        now = time.monotonic()
+        with self._lock:
+            self._writers[int(user_id)] = now + self.window
+            if len(self._writers) > 10000:
+                self._writers = {uid: until for uid, until in self._writers.items() if until > now}
+
+    # --- Health / lag checks ---
+    def start(self, engines) -> None:
+        """Check `engines` (async, one per replica, in the same order) in the background."""
+        if self.count and self._task is None:
+            self._task = asyncio.create_task(self._run(engines))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    @staticmethod
+    async def _measure(engine) -> float:
+        async with engine.connect() as conn:
+            return float(await conn.scalar(_LAG_SQL))
+
+    async def check(self, engines) -> None:
+        for index, engine in enumerate(engines):
+            try:
+                # A replica that hangs counts as down, and doesn't hold up the others
+                lag = await asyncio.wait_for(self._measure(engine), max(self.check_seconds, 1.0))
+            except Exception:
+                lag = None
+            was_usable = self.usable(index)
+            self.lag[index] = lag
+            if was_usable and not self.usable(index):
+                logger.warning("Replica %d taken out of rotation (lag: %s)", index, lag)
+            elif self.usable(index) and not was_usable:
+                logger.info("Replica %d in rotation (lag: %.2fs)", index, lag)
+
+    async def _run(self, engines) -> None:
+        while True:
+            await self.check(engines)
+            await asyncio.sleep(self.check_seconds)
+
+    def stats(self) -> dict:
+        stats = {
+            "replicas": self.count,
+            "usable": sum(self.usable(i) for i in range(self.count)),
+            "primary_reads": self.primary_reads,
+            "sticky_reads": self.sticky_reads,
+            "sticky_users": sum(until > time.monotonic() for until in list(self._writers.values())),
+        }
+        for index in range(self.count):
+            stats[f"replica{index}_reads"] = self.replica_reads[index]
+            stats[f"replica{index}_lag_seconds"] = -1 if self.lag[index] is None else round(self.lag[index], 3)
+        return stats
+
+
+class ReadYourWritesMiddleware:
+    """
+    Pure ASGI middleware: an authenticated request with a write method
+    marks its user as a recent writer before the handler runs, so any
+    read that follows the response goes to the primary.
+    """
+    WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+    def __init__(self, app, router: ReplicaRouter):
+        self.app = app
+        self.router = router
+
+    async def __call__(self, scope, receive, send):
+        if self.router.count and scope["type"] == "http" and scope["method"] in self.WRITE_METHODS:
+            user_id = token_user_id(dict(scope["headers"]).get(b"authorization", b"").decode("latin-1"))
+            if user_id is not None:
+                self.router.wrote(user_id)
+        await self.app(scope, receive, send)
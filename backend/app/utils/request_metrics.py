@@ -0,0 +1,208 @@
+# utils/request_metrics.py
+# Per-request SQL accounting (Server-Timing), per-route Prometheus histograms and an N+1 detector
+import contextvars
+import logging
+import re
+import time
+from collections import Counter
+from typing import Dict, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.config import METRICS_N_PLUS_ONE_THRESHOLD, METRICS_SLOW_STATEMENT_MS
+
+logger = logging.getLogger(__name__)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Bound parameters in either driver's style, and the lists an expanding IN renders
+_PARAM = re.compile(r"%\(\w+\)s|\$\d+|\b\d+\b")
+_PARAM_LIST = re.compile(r"\?(\s*,\s*\?)+")
+
+
+def statement_shape(statement: str) -> str:
+    """SQL with parameters and IN-list lengths erased, so repeats of one query compare equal."""
+    return _PARAM_LIST.sub("?", _PARAM.sub("?", " ".join(statement.split())))
+
+
+class RequestStats:
+    """SQL done on behalf of one request. Shared by reference with the threadpool copies of its context."""
+    __slots__ = ("statements", "db_seconds", "slowest_seconds", "slowest_statement", "shapes")
+
+    def __init__(self):
+        self.statements = 0
+        self.db_seconds = 0.0
+        self.slowest_seconds = 0.0
+        self.slowest_statement: Optional[str] = None
+        self.shapes: Counter = Counter()
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.statements += 1
+        self.db_seconds += seconds
+        if seconds > self.slowest_seconds:
+            self.slowest_seconds, self.slowest_statement = seconds, statement
+        self.shapes[statement_shape(statement)] += 1
+
+    def repeated(self, threshold: int) -> Dict[str, int]:
+        """Statement shapes run more than `threshold` times: likely N+1 loops."""
+        return {shape: n for shape, n in self.shapes.items() if n > threshold}
+
+
+_current: contextvars.ContextVar[Optional[RequestStats]] = contextvars.ContextVar("request_stats", default=None)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Time every statement on `engine` into the current request's RequestStats (for async engines pass .sync_engine)."""
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._metrics_started = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _stop(conn, cursor, statement, parameters, context, executemany):
+        stats = _current.get()
+        started = getattr(context, "_metrics_started", None)
+        if stats is not None and started is not None:
+            stats.record(statement, time.perf_counter() - started)
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense, one series per label tuple."""
+    def __init__(self, name: str, help_text: str, labels: Sequence[str], buckets: Sequence[float]):
+        self.name, self.help_text, self.labels, self.buckets = name, help_text, tuple(labels), tuple(buckets)
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, labels: Tuple[str, ...], value: float) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            # [bucket counts..., +Inf count, sum]
+            series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[i] += 1
+        series[-2] += 1
+        series[-1] += value
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for labels, series in sorted(self._series.items()):
+            base = ",".join(f'{k}="{_escape(v)}"' for k, v in zip(self.labels, labels))
+            sep = "," if base else ""
+            for bound, count in zip(self.buckets, series):
+                lines.append(f'{self.name}_bucket{{{base}{sep}le="{bound:g}"}} {count}')
+            lines.append(f'{self.name}_bucket{{{base}{sep}le="+Inf"}} {series[-2]}')
+            lines.append(f"{self.name}_sum{{{base}}} {series[-1]:.6f}")
+            lines.append(f"{self.name}_count{{{base}}} {series[-2]}")
+        return lines
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+ROUTE_LABELS = ("method", "route")
+request_seconds = Histogram(
+    "http_request_duration_seconds", "Time to the end of the response, per route.", ROUTE_LABELS,
+    (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+db_seconds = Histogram(
+    "http_request_db_seconds", "Total SQL time of a request, per route.", ROUTE_LABELS,
+    (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+db_statements = Histogram(
+    "http_request_db_statements", "SQL statements run by a request, per route.", ROUTE_LABELS,
+    (0, 1, 2, 3, 5, 10, 20, 50, 100),
+)
+n_plus_one_total: Counter = Counter()  # (method, route) -> requests flagged by the N+1 detector
+responses_total: Counter = Counter()   # (method, route, status) -> responses
+
+
+def _route(scope) -> str:
+    # The route template, not the raw path, so ids don't explode the label set
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+def _server_timing(stats: RequestStats, total_seconds: float) -> bytes:
+    return (
+        f'db;desc="{stats.statements} queries";dur={stats.db_seconds * 1000:.2f}, '
+        f"db-slowest;dur={stats.slowest_seconds * 1000:.2f}, "
+        f"app;dur={total_seconds * 1000:.2f}"
+    ).encode()
+
+
+class RequestMetricsMiddleware:
+    """
+    Pure ASGI middleware: opens a RequestStats for each HTTP request, adds
+    a Server-Timing header (statement count, DB time, slowest statement,
+    time to headers), and afterwards feeds the per-route histograms.
+    Requests whose statements repeat more than
+    METRICS_N_PLUS_ONE_THRESHOLD times are logged as likely N+1.
+    Numbers are per worker process.
+    """
+    def __init__(self, app, n_plus_one_threshold: int = METRICS_N_PLUS_ONE_THRESHOLD,
+                 slow_statement_ms: float = METRICS_SLOW_STATEMENT_MS):
+        self.app = app
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.slow_statement_ms = slow_statement_ms
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        stats = RequestStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+        status = [500]
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                headers = [*message.get("headers", []),
+                           (b"server-timing", _server_timing(stats, time.perf_counter() - started))]
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            self._observe(scope, stats, time.perf_counter() - started, status[0])
+
+    def _observe(self, scope, stats: RequestStats, seconds: float, status: int) -> None:
+        labels = (scope["method"], _route(scope))
+        request_seconds.observe(labels, seconds)
+        db_seconds.observe(labels, stats.db_seconds)
+        db_statements.observe(labels, stats.statements)
+        responses_total[(*labels, str(status))] += 1
+        repeated = stats.repeated(self.n_plus_one_threshold)
+        if repeated:
+            n_plus_one_total[labels] += 1
+            for shape, count in repeated.items():
+                logger.warning("Possible N+1 in %s %s: %d x %s", *labels, count, shape[:300])
+        if stats.slowest_seconds * 1000 >= self.slow_statement_ms:
+            logger.warning("Slow SQL in %s %s (%.0f ms): %s", *labels, stats.slowest_seconds * 1000,
+                           " ".join((stats.slowest_statement or "").split())[:300])
+
+
+def render_metrics(**gauges: dict) -> str:
+    """
+    Everything above in Prometheus text format. Each keyword adds the numeric
+    values of a stats dict as gauges named skillswap_<keyword>_<key>.
+    """
+    lines = []
+    for histogram in (request_seconds, db_seconds, db_statements):
+        lines += histogram.render()
+    lines += ["# HELP http_responses_total Responses sent, per route and status.", "# TYPE http_responses_total counter"]
+    for (method, route, status), count in sorted(responses_total.items()):
+        lines.append(f'http_responses_total{{method="{method}",route="{_escape(route)}",status="{status}"}} {count}')
+    lines += ["# HELP http_n_plus_one_requests_total Requests flagged by the N+1 detector.",
+              "# TYPE http_n_plus_one_requests_total counter"]
+    for (method, route), count in sorted(n_plus_one_total.items()):
+        lines.append(f'http_n_plus_one_requests_total{{method="{method}",route="{_escape(route)}"}} {count}')
+    for group, values in gauges.items():
+        for key, value in (values or {}).items():
+            if isinstance(value, (int, float)):
+                value = int(value) if isinstance(value, bool) else value
+                lines += [f"# TYPE skillswap_{group}_{key} gauge", f"skillswap_{group}_{key} {value}"]
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,196 @@
+# utils/response_cache.py
+# In-process TTL cache of whole GET responses for read-mostly endpoints, with strong ETags and 304s
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from app.config import RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_TTL_SECONDS
+
+RESPONSE_CACHE_CHANNEL = "response_cache"
+
+# Tags: one per kind of data a cached response is built from
+SKILLS = "skills"        # /skills/, /skills/categories
+USERS = "users"          # /users/locations
+BADGES = "badges"        # /badges/
+
+# Browsers and proxies may store the body but must revalidate (If-None-Match) before reusing it
+_CACHE_CONTROL = (b"cache-control", b"no-cache")
+
+
+def _etag(body: bytes) -> bytes:
+    return b'"' + hashlib.sha256(body).hexdigest()[:32].encode() + b'"'
+
+
+def _matches(if_none_match: Optional[bytes], etag: bytes) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [c.strip() for c in if_none_match.split(b",")]
+    return b"*" in candidates or etag in candidates
+
+
+class ResponseCache:
+    """
+    Whole-response cache for registered GET paths, keyed by path + query
+    string and tagged by the data the response is built from. Entries
+    expire after `ttl`. invalidate(tag) drops a tag's entries at once, and
+    through the pub/sub bus in every worker. Responses get a strong ETag
+    (hash of the body), and a matching If-None-Match gets a 304 without
+    a body, whether the entry came from the cache or was just built.
+    Only use it for responses that are the same for every caller.
+
+    Responses may be built on a read replica that hasn't replayed the
+    write behind an invalidation yet. So for `replica_window` seconds
+    after a tag is invalidated (the longest a usable replica can be
+    behind, set from the replica router) its responses are served but
+    not stored; otherwise stale data would be cached for a whole TTL.
+    """
+    def __init__(self, ttl: float = 60.0, maxsize: int = 1000, replica_window: float = 0.0):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.replica_window = replica_window
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.invalidations = 0
+        self.pubsub = None
+        self._paths: Dict[str, str] = {}
+        # (path, query) -> (expires, tag, status, headers, body, etag)
+        self._entries: "OrderedDict[Tuple[str, bytes], tuple]" = OrderedDict()
+        # Bumped by invalidate(): a response built across an invalidation is not stored
+        self._generations: Dict[str, int] = {}
+        # tag -> time.monotonic() of its last invalidation
+        self._invalidated_at: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def register(self, path: str, tag: str) -> None:
+        """Cache GET responses of `path` (exact match) under `tag`."""
+        self._paths[path] = tag
+
+    def bind(self, pubsub) -> None:
+        self.pubsub = pubsub
+        pubsub.subscribe(RESPONSE_CACHE_CHANNEL, self._apply)
+
+    # --- Invalidation ---
+    def invalidate(self, *tags: str) -> None:
+        """Drop every entry under `tags`; call after the commit that changed the data."""
+        event = {"tags": list(tags)}
+        if self.pubsub is None:
+            self._apply(event)
+        else:
+            self.pubsub.publish_nowait(RESPONSE_CACHE_CHANNEL, event)
+
+    def _apply(self, event: dict) -> None:
+        tags = set(event.get("tags") or ())
+        now = time.monotonic()
+        with self._lock:
+            for tag in tags:
+                self._generations[tag] = self._generations.get(tag, 0) + 1
+                self._invalidated_at[tag] = now
+            for key in [k for k, entry in self._entries.items() if entry[1] in tags]:
+                del self._entries[key]
+            self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    # --- Lookup / store ---
+    def _get(self, key) -> Optional[tuple]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def _put(self, key, tag: str, generation: int, started: float,
+             status: int, headers: list, body: bytes, etag: bytes) -> None:
+        """Store a response built from `started` on, unless it may predate an invalidation of `tag`."""
+        with self._lock:
+            if self._generations.get(tag, 0) != generation:
+                return
+            invalidated_at = self._invalidated_at.get(tag)
+            if invalidated_at is not None and started - invalidated_at < self.replica_window:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, tag, status, headers, body, etag)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "not_modified": self.not_modified,
+                "invalidations": self.invalidations,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+class ResponseCacheMiddleware:
+    """Pure ASGI side of ResponseCache: serves hits, records misses, answers If-None-Match."""
+    def __init__(self, app, cache: Optional[ResponseCache] = None):
+        self.app = app
+        self.cache = cache or response_cache
+
+    async def __call__(self, scope, receive, send):
+        cache = self.cache
+        tag = cache._paths.get(scope.get("path")) if scope["type"] == "http" and scope["method"] == "GET" else None
+        if tag is None:
+            return await self.app(scope, receive, send)
+        if_none_match = dict(scope["headers"]).get(b"if-none-match")
+        key = (scope["path"], scope.get("query_string", b""))
+
+        entry = cache._get(key)
+        if entry is not None:
+            _, _, status, headers, body, etag = entry
+            return await self._respond(send, status, headers, body, etag, if_none_match)
+
+        with cache._lock:
+            generation = cache._generations.get(tag, 0)
+        started = time.monotonic()
+        start, chunks = {}, []
+
+        async def capture(message):
+            if message["type"] == "http.response.start":
+                start.update(message)
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+
+        await self.app(scope, receive, capture)
+        body = b"".join(chunks)
+        status = start.get("status", 500)
+        # Content-Length is recomputed; ETag/Cache-Control are ours
+        headers = [(k, v) for k, v in start.get("headers", [])
+                   if k.lower() not in (b"content-length", b"etag", b"cache-control")]
+        etag = _etag(body)
+        if status == 200:
+            cache._put(key, tag, generation, started, status, headers, body, etag)
+        await self._respond(send, status, headers, body, etag if status == 200 else None, if_none_match)
+
+    async def _respond(self, send, status, headers, body, etag, if_none_match):
+        if etag is not None and _matches(if_none_match, etag):
+            self.cache.not_modified += 1
+            headers = [(k, v) for k, v in headers if k.lower() != b"content-type"]
+            await send({"type": "http.response.start", "status": 304,
+                        "headers": [*headers, (b"etag", etag), _CACHE_CONTROL]})
+            await send({"type": "http.response.body", "body": b""})
+            return
+        extra = [(b"etag", etag), _CACHE_CONTROL] if etag is not None else []
+        await send({"type": "http.response.start", "status": status,
+                    "headers": [*headers, *extra, (b"content-length", str(len(body)).encode())]})
+        await send({"type": "http.response.body", "body": body})
+
+
+response_cache = ResponseCache(ttl=RESPONSE_CACHE_TTL_SECONDS, maxsize=RESPONSE_CACHE_MAX_ENTRIES)
@@ -0,0 +1,81 @@
+# ws/chat.py
+# Global chat room: bounded history + concurrent fan-out through SocketWriters
+import json
+from collections import deque
+from typing import Dict, Optional
+
+from fastapi import WebSocket
+
+from app.ws.pubsub import PubSub
+from app.ws.writer import SocketWriter
+
+CHAT_CHANNEL = "ws_chat"
+
+
+class ChatRoom:
+    """
+    In-memory chat room for one worker.
+    History is a fixed-size ring buffer (deque with maxlen). publish() is
+    synchronous and O(connections): it encodes the message once and
+    offer()s it to every writer without awaiting any send. A client whose
+    queue is full is a slow consumer. It gets disconnected, so it can't
+    hold back delivery to everyone else.
+    Once bind() attaches a PubSub, send() publishes through it, so every
+    worker's room (and history) sees every message.
+    """
+    def __init__(self, history_size: int = 200, queue_size: int = 256, send_timeout: float = 10.0):
+        self.history: deque = deque(maxlen=history_size)
+        self.queue_size = queue_size
+        self.send_timeout = send_timeout
+        self.dropped_clients = 0
+        self._writers: Dict[WebSocket, SocketWriter] = {}
+        self.pubsub: Optional[PubSub] = None
+
+    def bind(self, pubsub: PubSub) -> None:
+        self.pubsub = pubsub
+        pubsub.subscribe(CHAT_CHANNEL, self.publish)
+
+    def __len__(self) -> int:
+        return len(self._writers)
+
+    def join(self, websocket: WebSocket) -> SocketWriter:
+        """Register an accepted socket and queue the current history for it."""
+        writer = SocketWriter(
+            websocket, max_queue=self.queue_size, send_timeout=self.send_timeout, on_close=self._forget
+        )
+        self._writers[websocket] = writer
+        writer.offer(json.dumps({"type": "history", "messages": list(self.history)}))
+        return writer
+
+    async def leave(self, websocket: WebSocket) -> None:
+        writer = self._writers.pop(websocket, None)
+        if writer is not None:
+            await writer.close()
+
+    async def send(self, message: dict) -> None:
+        """Publish a message to the room on every worker."""
+        if self.pubsub is None:
+            self.publish(message)
+        else:
+            await self.pubsub.publish(CHAT_CHANNEL, message)
+
+    def publish(self, message: dict) -> None:
+        """Store a message in history and fan it out to every connection."""
+        self.history.append(message)
+        payload = json.dumps(message)
+        for writer in list(self._writers.values()):
+            if not writer.offer(payload):
+                self._drop(writer)
+
+    def _drop(self, writer: SocketWriter) -> None:
+        if self._writers.pop(writer.websocket, None) is not None:
+            self.dropped_clients += 1
+            writer.abort()
+
+    def _forget(self, writer: SocketWriter) -> None:
+        # Writer task ended on its own (send error/timeout): prune the dead socket
+        if self._writers.get(writer.websocket) is writer:
+            del self._writers[writer.websocket]
+
+
+global_chat = ChatRoom()
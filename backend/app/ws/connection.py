@@ -1,44 +1,126 @@
 # ws/connection.py
 # FastAPI WebSocket manager for real-time events
+import json
 from fastapi import WebSocket
-from typing import Dict, List
+from typing import Dict, Iterable, Optional
+
+from app.ws.pubsub import PubSub
+from app.ws.writer import SocketWriter
+
+EVENTS_CHANNEL = "ws_events"
+
 
 class ConnectionManager:
-    def __init__(self):
-        self.active_connections: Dict[int, List[WebSocket]] = {}
-        self.admin_connections: List[WebSocket] = []
+    """
+    Tracks user and admin sockets and fans messages out to them.
+    Every socket gets a SocketWriter (bounded queue + writer task), so a
+    broadcast encodes the message once and only enqueues it: delivery is
+    concurrent and a slow socket never blocks the caller. When a socket's
+    queue is full the message is skipped for that socket and counted in
+    `dropped_messages`. A socket whose send fails or stalls is pruned
+    automatically. Connections are kept in dicts keyed by WebSocket, so
+    registering and removing are O(1).
+
+    Once bind() attaches a PubSub, every send is published as an envelope
+    ({"to": "user"|"admins"|"all", "user_id", "message"}). Every worker
+    delivers it to the matching sockets it holds, so send_personal_message
+    reaches a user no matter which worker their socket is on.
+    """
+    def __init__(self, queue_size: int = 100, send_timeout: float = 10.0):
+        self.queue_size = queue_size
+        self.send_timeout = send_timeout
+        self.active_connections: Dict[int, Dict[WebSocket, SocketWriter]] = {}
+        self.admin_connections: Dict[WebSocket, SocketWriter] = {}
+        self.delivered_messages = 0
+        self.dropped_messages = 0
+        self.pruned_sockets = 0
+        self.pubsub: Optional[PubSub] = None
+
+    def bind(self, pubsub: PubSub) -> None:
+        self.pubsub = pubsub
+        pubsub.subscribe(EVENTS_CHANNEL, self._deliver)
 
     async def connect(self, websocket: WebSocket, user_id: int = None, is_admin: bool = False):
         await websocket.accept()
         if is_admin:
-            self.admin_connections.append(websocket)
+            self.admin_connections[websocket] = self._writer(websocket, None, True)
         elif user_id is not None:
-            self.active_connections.setdefault(user_id, []).append(websocket)
+            self.active_connections.setdefault(user_id, {})[websocket] = self._writer(websocket, user_id, False)
 
     def disconnect(self, websocket: WebSocket, user_id: int = None, is_admin: bool = False):
-        if is_admin:
-            if websocket in self.admin_connections:
-                self.admin_connections.remove(websocket)
-        elif user_id is not None:
-            if user_id in self.active_connections and websocket in self.active_connections[user_id]:
-                self.active_connections[user_id].remove(websocket)
-                if not self.active_connections[user_id]:
-                    del self.active_connections[user_id]
+        writer = self._remove(websocket, user_id, is_admin)
+        if writer is not None:
+            writer.abort(code=1000)
 
     async def send_personal_message(self, message: dict, user_id: int):
-        for ws in self.active_connections.get(user_id, []):
-            await ws.send_json(message)
+        await self._route({"to": "user", "user_id": user_id, "message": message})
 
     async def broadcast_admin(self, message: dict):
-        for ws in self.admin_connections:
-            await ws.send_json(message)
+        await self._route({"to": "admins", "message": message})
 
     async def broadcast_announcement(self, message: dict):
         # Broadcast to all users and admins
-        for ws_list in self.active_connections.values():
-            for ws in ws_list:
-                await ws.send_json(message)
-        for ws in self.admin_connections:
-            await ws.send_json(message)
+        await self._route({"to": "all", "message": message})
+
+    def metrics(self) -> dict:
+        """Connection counts, queue depth and delivery counters (for /admin/ws-metrics)."""
+        writers = [w for sockets in self.active_connections.values() for w in sockets.values()]
+        writers += list(self.admin_connections.values())
+        depths = [w.depth for w in writers]
+        return {
+            "users": len(self.active_connections),
+            "user_sockets": len(writers) - len(self.admin_connections),
+            "admin_sockets": len(self.admin_connections),
+            "queue_depth_total": sum(depths),
+            "queue_depth_max": max(depths, default=0),
+            "delivered_messages": self.delivered_messages,
+            "dropped_messages": self.dropped_messages,
+            "pruned_sockets": self.pruned_sockets,
+            "pubsub": self.pubsub.stats() if self.pubsub is not None else None,
+        }
+
+    async def _route(self, envelope: dict):
+        if self.pubsub is None:
+            self._deliver(envelope)
+        else:
+            await self.pubsub.publish(EVENTS_CHANNEL, envelope)
+
+    def _deliver(self, envelope: dict):
+        """Hand an envelope to the sockets this worker holds (O(1) lookup for one user)."""
+        target = envelope.get("to")
+        if target == "user":
+            sockets = self.active_connections.get(envelope.get("user_id"))
+            if sockets:
+                self._fan_out(json.dumps(envelope["message"]), sockets.values())
+            return
+        payload = json.dumps(envelope["message"])
+        if target == "all":
+            for sockets in list(self.active_connections.values()):
+                self._fan_out(payload, sockets.values())
+        self._fan_out(payload, self.admin_connections.values())
+
+    def _writer(self, websocket: WebSocket, user_id, is_admin: bool) -> SocketWriter:
+        def prune(writer: SocketWriter):
+            if self._remove(websocket, user_id, is_admin) is not None:
+                self.pruned_sockets += 1
+        return SocketWriter(websocket, max_queue=self.queue_size, send_timeout=self.send_timeout, on_close=prune)
+
+    def _remove(self, websocket: WebSocket, user_id, is_admin: bool):
+        if is_admin:
+            return self.admin_connections.pop(websocket, None)
+        sockets = self.active_connections.get(user_id)
+        if sockets is None:
+            return None
+        writer = sockets.pop(websocket, None)
+        if not sockets:
+            del self.active_connections[user_id]
+        return writer
+
+    def _fan_out(self, payload: str, writers: Iterable[SocketWriter]):
+        for writer in list(writers):
+            if writer.offer(payload):
+                self.delivered_messages += 1
+            else:
+                self.dropped_messages += 1
 
 manager = ConnectionManager()
@@ -0,0 +1,366 @@
+# ws/pubsub.py
+# Cross-worker transport for WebSocket fan-out (ConnectionManager, ChatRoom)
+import asyncio
+import fcntl
+import json
+import logging
+import os
+import sys
+import uuid
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy.engine import make_url
+
+from app.config import ASYNC_DATABASE_URL, PUBSUB_BACKEND, PUBSUB_SOCKET_PATH
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[dict], None]
+
+
+class PubSub:
+    """
+    Channel-based publish/subscribe between uvicorn workers.
+    publish() first delivers to this process's handlers, then hands the
+    message to the transport. The transport delivers it to every other
+    process, and each one routes it to whatever sockets it holds. A
+    process's own messages come back through the transport and are
+    skipped by origin, so local delivery never waits on a round trip.
+    Delivery is at-most-once: messages sent while a transport is down
+    are lost. This base class is the single-process transport.
+    """
+    def __init__(self):
+        self.origin = uuid.uuid4().hex
+        self.published = 0
+        self.received = 0
+        self.errors = 0
+        self._handlers: Dict[str, List[Handler]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def subscribe(self, channel: str, handler: Handler) -> None:
+        """Register a handler; call before start()."""
+        handlers = self._handlers.setdefault(channel, [])
+        if handler not in handlers:
+            handlers.append(handler)
+
+    async def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+
+    async def stop(self) -> None:
+        self._loop = None
+
+    async def publish(self, channel: str, message: dict) -> None:
+        self.published += 1
+        self._dispatch(channel, message)
+        try:
+            await self._send(channel, json.dumps({"origin": self.origin, "message": message}))
+        except Exception:
+            self.errors += 1
+            logger.exception("pubsub: could not publish to %s", channel)
+
+    def publish_nowait(self, channel: str, message: dict) -> None:
+        """
+        publish() for sync code, including routes running in the threadpool:
+        local handlers run right away and the transport send is scheduled on
+        the loop the bus was started on (skipped if it isn't running).
+        """
+        self.published += 1
+        self._dispatch(channel, message)
+        if self._loop is None:
+            return
+        data = json.dumps({"origin": self.origin, "message": message})
+        future = asyncio.run_coroutine_threadsafe(self._send(channel, data), self._loop)
+        future.add_done_callback(self._sent)
+
+    def _sent(self, future) -> None:
+        if not future.cancelled() and future.exception() is not None:
+            self.errors += 1
+            logger.error("pubsub: could not publish: %s", future.exception())
+
+    def stats(self) -> dict:
+        return {
+            "backend": type(self).__name__,
+            "published": self.published,
+            "received": self.received,
+            "errors": self.errors,
+        }
+
+    async def _send(self, channel: str, data: str) -> None:
+        pass
+
+    def _receive(self, channel: str, data: str) -> None:
+        """Called by the transport for every message on a subscribed channel."""
+        try:
+            envelope = json.loads(data)
+        except ValueError:
+            self.errors += 1
+            return
+        if envelope.get("origin") == self.origin:
+            return
+        self.received += 1
+        self._dispatch(channel, envelope.get("message"))
+
+    def _dispatch(self, channel: str, message: dict) -> None:
+        for handler in self._handlers.get(channel, ()):
+            try:
+                handler(message)
+            except Exception:
+                self.errors += 1
+                logger.exception("pubsub: handler for %s failed", channel)
+
+
+class LocalPubSub(PubSub):
+    """One worker only: messages never leave the process."""
+
+
+class PostgresPubSub(PubSub):
+    """
+    Postgres LISTEN/NOTIFY through asyncpg.
+    One dedicated connection LISTENs on every subscribed channel, and a
+    small pool sends pg_notify(). If the listening connection drops, it
+    reconnects with backoff. NOTIFY payloads are capped at 8000 bytes, so
+    larger messages only reach this worker's sockets.
+    """
+    NOTIFY_MAX_BYTES = 7999
+
+    def __init__(self, dsn: str, pool_size: int = 4):
+        super().__init__()
+        self.dsn = dsn
+        self.pool_size = pool_size
+        self._listener = None
+        self._pool = None
+        self._stopping = False
+        self._reconnect_task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        import asyncpg
+
+        await super().start()
+        self._stopping = False
+        self._pool = await asyncpg.create_pool(self.dsn, min_size=1, max_size=self.pool_size)
+        await self._listen()
+
+    async def stop(self) -> None:
+        await super().stop()
+        self._stopping = True
+        if self._reconnect_task is not None:
+            self._reconnect_task.cancel()
+        if self._listener is not None:
+            await self._listener.close()
+            self._listener = None
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+
+    async def _listen(self) -> None:
+        import asyncpg
+
+        connection = await asyncpg.connect(self.dsn)
+        for channel in self._handlers:
+            await connection.add_listener(channel, self._on_notify)
+        connection.add_termination_listener(self._on_terminate)
+        self._listener = connection
+
+    def _on_notify(self, connection, pid, channel, payload) -> None:
+        self._receive(channel, payload)
+
+    def _on_terminate(self, connection) -> None:
+        if not self._stopping:
+            logger.warning("pubsub: LISTEN connection lost, reconnecting")
+            self._reconnect_task = asyncio.create_task(self._reconnect())
+
+    async def _reconnect(self) -> None:
+        delay = 0.5
+        while not self._stopping:
+            try:
+                await self._listen()
+                return
+            except Exception:
+                self.errors += 1
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30.0)
+
+    async def _send(self, channel: str, data: str) -> None:
+        if len(data.encode()) > self.NOTIFY_MAX_BYTES:
+            raise ValueError(f"message on {channel} exceeds the NOTIFY payload limit")
+        await self._pool.execute("SELECT pg_notify($1, $2)", channel, data)
+
+
+def _lock_broker(path: str) -> Optional[int]:
+    """Take the broker lock for `path`; None if another process holds it."""
+    fd = os.open(path + ".lock", os.O_CREAT | os.O_RDWR, 0o600)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        os.close(fd)
+        return None
+    return fd
+
+
+class UnixSocketBroker:
+    """
+    Minimal fan-out broker on a Unix socket: every line a client writes is
+    relayed to all connected clients. Stand-in for Postgres in tests and
+    benchmarks; run standalone with `python -m app.ws.pubsub [path]`.
+    """
+    MAX_CLIENT_BUFFER = 4 * 1024 * 1024
+    MAX_LINE = 1024 * 1024
+
+    def __init__(self, path: str):
+        self.path = path
+        self._server = None
+        self._clients: Dict[asyncio.StreamWriter, asyncio.Task] = {}
+
+    async def start(self) -> None:
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self._server = await asyncio.start_unix_server(self._serve, path=self.path, limit=self.MAX_LINE)
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            handlers = list(self._clients.values())
+            for writer in list(self._clients):
+                writer.close()
+            # Closing each connection ends its handler; wait so none is left to be cancelled
+            await asyncio.gather(*handlers, return_exceptions=True)
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._clients[writer] = asyncio.current_task()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                for client in list(self._clients):
+                    if client.transport.get_write_buffer_size() > self.MAX_CLIENT_BUFFER:
+                        # Client stopped reading: cut it off rather than buffer without bound
+                        self._clients.pop(client, None)
+                        client.close()
+                    else:
+                        client.write(line)
+        except (ConnectionError, ValueError):
+            # Disconnected, or sent a line over MAX_LINE
+            pass
+        finally:
+            self._clients.pop(writer, None)
+            writer.close()
+
+
+class UnixSocketPubSub(PubSub):
+    """
+    Client of a UnixSocketBroker. The first worker to take the lock file
+    next to the socket runs the broker in-process, and the others connect
+    to it. If that worker exits, the rest reconnect and one of them takes
+    over.
+    """
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+        self._broker: Optional[UnixSocketBroker] = None
+        self._lock_fd: Optional[int] = None
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._reader_task: Optional[asyncio.Task] = None
+        self._drain_lock = asyncio.Lock()
+        self._stopping = False
+
+    async def start(self) -> None:
+        await super().start()
+        self._stopping = False
+        await self._connect()
+        self._reader_task = asyncio.create_task(self._read_loop())
+
+    async def stop(self) -> None:
+        await super().stop()
+        self._stopping = True
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if self._broker is not None:
+            await self._broker.stop()
+            self._broker = None
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+    async def _connect(self, timeout: float = 5.0) -> None:
+        deadline = asyncio.get_running_loop().time() + timeout
+        while True:
+            if self._broker is None:
+                self._lock_fd = _lock_broker(self.path)
+                if self._lock_fd is not None:
+                    self._broker = UnixSocketBroker(self.path)
+                    await self._broker.start()
+            try:
+                self._reader, self._writer = await asyncio.open_unix_connection(
+                    self.path, limit=UnixSocketBroker.MAX_LINE
+                )
+                return
+            except (FileNotFoundError, ConnectionRefusedError):
+                if asyncio.get_running_loop().time() > deadline:
+                    raise
+                await asyncio.sleep(0.05)
+
+    async def _read_loop(self) -> None:
+        while not self._stopping:
+            try:
+                line = await self._reader.readline()
+            except (ConnectionError, ValueError):
+                line = b""
+            if line:
+                channel, _, data = line.decode().rstrip("\n").partition(" ")
+                if channel in self._handlers:
+                    self._receive(channel, data)
+                continue
+            # Broker went away
+            self._writer = None
+            while not self._stopping:
+                try:
+                    await self._connect()
+                    break
+                except OSError:
+                    self.errors += 1
+                    await asyncio.sleep(0.5)
+
+    async def _send(self, channel: str, data: str) -> None:
+        if self._writer is None:
+            raise ConnectionError("not connected to the pubsub broker")
+        self._writer.write(f"{channel} {data}\n".encode())
+        async with self._drain_lock:
+            await self._writer.drain()
+
+
+def create_pubsub(backend: str = None) -> PubSub:
+    """Build the transport named by PUBSUB_BACKEND: postgres (default), unix or local."""
+    backend = (backend or PUBSUB_BACKEND).lower()
+    if backend == "postgres":
+        url = make_url(ASYNC_DATABASE_URL)
+        if url.get_backend_name() != "postgresql":
+            return LocalPubSub()
+        return PostgresPubSub(url.set(drivername="postgresql").render_as_string(hide_password=False))
+    if backend == "unix":
+        return UnixSocketPubSub(PUBSUB_SOCKET_PATH)
+    if backend == "local":
+        return LocalPubSub()
+    raise ValueError(f"Unknown PUBSUB_BACKEND: {backend!r}")
+
+
+bus = create_pubsub()
+
+
+async def _run_broker(path: str) -> None:
+    if _lock_broker(path) is None:
+        raise SystemExit(f"a pubsub broker is already running on {path}")
+    broker = UnixSocketBroker(path)
+    await broker.start()
+    print(f"pubsub broker listening on {path}")
+    await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    asyncio.run(_run_broker(sys.argv[1] if len(sys.argv) > 1 else PUBSUB_SOCKET_PATH))
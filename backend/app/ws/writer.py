@@ -0,0 +1,88 @@
+# ws/writer.py
+# One bounded outbound queue + writer task per WebSocket
+import asyncio
+from typing import Callable, Optional
+
+from fastapi import WebSocket
+
+
+class SocketWriter:
+    """
+    Owns the outbound side of one WebSocket.
+    Producers call offer(), which never awaits: the message goes into a
+    bounded queue and this writer's own task sends it. A slow client only
+    fills its own queue; offer() then returns False and the owner decides
+    whether to skip the message or drop the client. The task ends when a
+    send fails, times out, or close() is called; `on_close` runs either way.
+    Messages are pre-encoded JSON strings, so a broadcast serializes once,
+    not once per socket.
+    """
+    def __init__(
+        self,
+        websocket: WebSocket,
+        max_queue: int = 256,
+        send_timeout: float = 10.0,
+        on_close: Optional[Callable[["SocketWriter"], None]] = None,
+    ):
+        self.websocket = websocket
+        self.send_timeout = send_timeout
+        self.dropped = 0
+        self.closed = False
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self._on_close = on_close
+        self._task = asyncio.create_task(self._run())
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def offer(self, payload: str) -> bool:
+        """Queue an encoded message; False if the socket is closed or its queue is full."""
+        if self.closed:
+            return False
+        try:
+            self._queue.put_nowait(payload)
+            return True
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+
+    async def _run(self) -> None:
+        try:
+            while True:
+                payload = await self._queue.get()
+                await asyncio.wait_for(self.websocket.send_text(payload), timeout=self.send_timeout)
+        except asyncio.CancelledError:
+            pass
+        except Exception:
+            # Disconnected, errored or stalled past send_timeout: stop writing to it
+            pass
+        finally:
+            self.closed = True
+            if self._on_close is not None:
+                self._on_close(self)
+
+    def abort(self, code: int = 1013) -> None:
+        """
+        Stop writing and close the socket in the background (1013 = try again later).
+        Used to shed slow consumers without awaiting them.
+        """
+        self.closed = True
+        self._task.cancel()
+        asyncio.create_task(self._close_socket(code))
+
+    async def _close_socket(self, code: int) -> None:
+        try:
+            await asyncio.wait_for(self.websocket.close(code=code), timeout=self.send_timeout)
+        except Exception:
+            pass
+
+    async def close(self) -> None:
+        """Stop the writer task (pending messages are discarded)."""
+        self.closed = True
+        if not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
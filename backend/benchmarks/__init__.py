@@ -0,0 +1,2 @@
+# benchmarks/__init__.py
+# Performance benchmarks (run from the backend folder, e.g. python -m benchmarks.bench_user_search)
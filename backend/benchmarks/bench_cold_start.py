@@ -0,0 +1,62 @@
+# benchmarks/bench_cold_start.py
+# Cold start: time to `import app.main`, then to a ready database layer, each in a fresh interpreter
+# Run: python -m benchmarks.bench_cold_start --runs 20 --output cold.json
+# Each run is a new process, so nothing is warm but the OS page cache. "import" is `import app.main`
+# (what a worker, test collection or a script pays before doing anything); "init" is app.database.init_db()
+# (engines + schema check; skipped on commits that did all of it at import). To compare commits,
+# run it on both and diff the JSON files.
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks.stats import percentiles
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import json, time, warnings
+warnings.filterwarnings("ignore")
+started = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+import app.database
+init_db = getattr(app.database, "init_db", None)
+if init_db is not None:
+    init_db()
+ready = time.perf_counter()
+print(json.dumps({"import_ms": (imported - started) * 1000, "init_ms": (ready - imported) * 1000}))
+"""
+
+
+def run_once() -> dict:
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, "-c", PROBE], cwd=BACKEND_DIR, capture_output=True, text=True)
+    process_ms = (time.perf_counter() - started) * 1000
+    if result.returncode != 0:
+        raise SystemExit(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "probe failed")
+    sample = json.loads(result.stdout.strip().splitlines()[-1])
+    sample["process_ms"] = process_ms
+    return sample
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start time of the app in fresh interpreters")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--output", help="Write the JSON result here")
+    args = parser.parse_args()
+
+    run_once()  # fills the page cache and __pycache__, so run 1 isn't an outlier
+    samples = [run_once() for _ in range(args.runs)]
+    results = {key: percentiles([s[key] for s in samples]) for key in ("import_ms", "init_ms", "process_ms")}
+    for key, stats in results.items():
+        print(f"{key:<11} p50={stats['p50']:7.1f}  p95={stats['p95']:7.1f}  mean={stats['mean']:7.1f}")
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump({"runs": args.runs, **results}, fh, indent=2)
+
+if __name__ == "__main__":
+    main()
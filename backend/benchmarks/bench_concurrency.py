@@ -0,0 +1,131 @@
+# benchmarks/bench_concurrency.py
+# Throughput/latency of read endpoints under many concurrent clients (needs httpx)
+# Run against a fresh server started by the script:
+#   python -m benchmarks.bench_concurrency --clients 200 --duration 15 --output after.json
+# or against one you started yourself:
+#   python -m benchmarks.bench_concurrency --base-url http://127.0.0.1:8000
+# To compare before/after a change, run it on both commits and diff the JSON files.
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+import httpx
+
+from benchmarks.stats import percentiles
+
+DEFAULT_PATHS = ["/skills/", "/skills/categories", "/skills/trending", "/badges/"]
+# Cheap endpoint with no DB access: its latency shows how long the event loop is blocked
+PROBE_PATH = "/"
+
+
+def start_server(port: int, workers: int) -> subprocess.Popen:
+    cmd = [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port),
+           "--workers", str(workers), "--log-level", "warning"]
+    return subprocess.Popen(cmd, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+async def wait_ready(base_url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get(PROBE_PATH)).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"server at {base_url} did not come up")
+
+
+async def client_loop(client, paths, stop_at, latencies, errors, offset):
+    i = offset
+    while time.monotonic() < stop_at:
+        path = paths[i % len(paths)]
+        i += 1
+        started = time.perf_counter()
+        try:
+            response = await client.get(path)
+            if response.status_code >= 400:
+                errors[path] += 1
+        except httpx.HTTPError:
+            errors[path] += 1
+        latencies[path].append((time.perf_counter() - started) * 1000)
+
+
+async def probe_loop(client, stop_at, latencies):
+    while time.monotonic() < stop_at:
+        started = time.perf_counter()
+        try:
+            await client.get(PROBE_PATH)
+        except httpx.HTTPError:
+            pass
+        latencies.append((time.perf_counter() - started) * 1000)
+        await asyncio.sleep(0.05)
+
+
+async def run(base_url: str, clients: int, duration: float, paths):
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    probe = []
+    limits = httpx.Limits(max_connections=clients + 1, max_keepalive_connections=clients + 1)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        stop_at = time.monotonic() + duration
+        tasks = [client_loop(client, paths, stop_at, latencies, errors, n) for n in range(clients)]
+        tasks.append(probe_loop(client, stop_at, probe))
+        await asyncio.gather(*tasks)
+    total = sum(len(v) for v in latencies.values())
+    return {
+        "clients": clients,
+        "duration_s": duration,
+        "requests": total,
+        "throughput_rps": total / duration,
+        "errors": dict(errors),
+        "endpoints": {
+            path: {"requests": len(samples), **percentiles(samples)} for path, samples in latencies.items()
+        },
+        "event_loop_probe_ms": percentiles(probe),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent-client benchmark for read endpoints")
+    parser.add_argument("--base-url", help="Use an already running server instead of starting one")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=15.0)
+    parser.add_argument("--path", action="append", dest="paths", help="Endpoint to hit (repeatable)")
+    parser.add_argument("--output", help="Write the JSON result here")
+    args = parser.parse_args()
+
+    server = None
+    base_url = args.base_url
+    if not base_url:
+        server = start_server(args.port, args.workers)
+        base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        asyncio.run(wait_ready(base_url))
+        result = asyncio.run(run(base_url, args.clients, args.duration, args.paths or DEFAULT_PATHS))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    print(f"{result['requests']} requests in {args.duration:.0f}s with {args.clients} clients "
+          f"-> {result['throughput_rps']:.0f} req/s")
+    for path, stats in result["endpoints"].items():
+        print(f"  {path:<22} p50={stats['p50']:7.1f}ms  p95={stats['p95']:7.1f}ms  p99={stats['p99']:7.1f}ms")
+    loop = result["event_loop_probe_ms"]
+    print(f"  event-loop probe       p50={loop['p50']:7.1f}ms  p99={loop['p99']:7.1f}ms")
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump(result, fh, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+# benchmarks/bench_endpoints.py
+# Latency percentiles, throughput and SQL statements per request for the main endpoints (needs httpx, websockets)
+#   python -m benchmarks.bench_endpoints --load --users 100000 --concurrency 50 --duration 10 --output before.json
+#   python -m benchmarks.bench_endpoints --scenario users_public_skill --scenario ws_global_chat
+# Starts its own server (one uvicorn worker, in a child process) that counts the SQL statements of each
+# request and returns the count in an X-Bench-SQL header. --load first fills the database with
+# app/scripts/bulk_load.py (same --seed -> same data). Scenarios run one after another, each with
+# --concurrency clients for --duration seconds. Postgres only: the models use JSONB and ON CONFLICT.
+# To compare commits, run it on both and diff the JSON files.
+
+import argparse
+import asyncio
+import contextvars
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+import uuid
+
+import httpx
+from sqlalchemy import text
+
+from app.database import SessionLocal, init_db
+from app.seed_data import AVAILABILITY, CATEGORIES, LOCATIONS, NAMES, PASSWORD
+from benchmarks.bench_concurrency import wait_ready
+from benchmarks.stats import percentiles
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SQL_HEADER = "x-bench-sql"
+LOGIN_DOMAIN = "@load.example.com"  # accounts created by app/scripts/bulk_load.py
+
+# name -> (method, path, needs a token); {placeholders} are filled per request by fill()
+SCENARIOS = {
+    "users_public": ("GET", "/users/public", False),
+    "users_public_search": ("GET", "/users/public?search={search}", False),
+    "users_public_availability": ("GET", "/users/public?availability={availability}", False),
+    "users_public_location": ("GET", "/users/public?location={location}", False),
+    "users_public_skill": ("GET", "/users/public?skill={skill}", False),
+    "users_public_category": ("GET", "/users/public?category={category}", False),
+    "swaps_incoming": ("GET", "/swaps/incoming", True),
+    "swaps_outgoing": ("GET", "/swaps/outgoing", True),
+    "invites_incoming": ("GET", "/invites/incoming", True),
+    "invites_outgoing": ("GET", "/invites/outgoing", True),
+    "inbox": ("GET", "/inbox", True),
+    "auth_login": ("POST", "/auth/login", False),
+    "skills_trending": ("GET", "/skills/trending", False),
+    "ws_global_chat": ("WS", "/ws/global-chat", True),
+}
+
+
+# --- Server side (child process) ---
+def serve(port: int) -> None:
+    """Run app.main:app, counting SQL statements per HTTP request on both engines."""
+    import uvicorn
+    from sqlalchemy import event
+
+    from app import database
+    from app.main import app
+
+    database.init_db()
+
+    statements = contextvars.ContextVar("bench_sql", default=None)
+
+    def count(*_):
+        # Sync routes run in the threadpool with a copy of the request's context, so they see the same list
+        counter = statements.get()
+        if counter is not None:
+            counter[0] += 1
+
+    for target in (database.engine, database.async_engine.sync_engine):
+        event.listen(target, "before_cursor_execute", count)
+
+    async def counted(scope, receive, send):
+        if scope["type"] != "http":
+            return await app(scope, receive, send)
+        counter = [0]
+        statements.set(counter)
+
+        async def send_with_count(message):
+            if message["type"] == "http.response.start":
+                headers = [*message.get("headers", []), (SQL_HEADER.encode(), str(counter[0]).encode())]
+                message = {**message, "headers": headers}
+            await send(message)
+
+        await app(scope, receive, send_with_count)
+
+    uvicorn.run(counted, port=port, log_level="warning")
+
+
+def start_server(port: int) -> subprocess.Popen:
+    cmd = [sys.executable, "-m", "benchmarks.bench_endpoints", "--serve", str(port)]
+    return subprocess.Popen(cmd, cwd=BACKEND_DIR)
+
+
+# --- Fixtures ---
+def load_dataset(users: int, seed: int) -> None:
+    cmd = [sys.executable, "-m", "app.scripts.bulk_load", "--users", str(users), "--seed", str(seed), "--truncate"]
+    subprocess.run(cmd, cwd=BACKEND_DIR, check=True)
+
+
+def sample_values(rng: random.Random, auth_users: int) -> dict:
+    """Filter values and login accounts taken from the database, so every request has realistic input."""
+    init_db()
+    db = SessionLocal()
+    try:
+        # Popular skills, as real filter traffic would be
+        skills = db.execute(text("SELECT name FROM skills ORDER BY offer_count DESC LIMIT 50")).scalars().all()
+        emails = db.execute(
+            text("SELECT email FROM users WHERE email LIKE :domain ORDER BY id LIMIT 5000"),
+            {"domain": f"%{LOGIN_DOMAIN}"},
+        ).scalars().all()
+    finally:
+        db.close()
+    if not emails:
+        raise SystemExit("No bulk-loaded users found: run with --load (or app/scripts/bulk_load.py) first")
+    return {
+        "search": [name.lower()[:4] for name in NAMES],
+        "availability": AVAILABILITY,
+        "location": LOCATIONS,
+        "skill": skills,
+        "category": CATEGORIES,
+        "emails": emails,
+        "login_emails": rng.sample(emails, min(auth_users, len(emails))),
+    }
+
+
+async def login_all(client: httpx.AsyncClient, emails) -> list:
+    """One real /auth/login per account; the tokens drive the authenticated scenarios."""
+    tokens = []
+    for email in emails:
+        response = await client.post("/auth/login", json={"email": email, "password": PASSWORD})
+        response.raise_for_status()
+        tokens.append(response.json()["access_token"])
+    return tokens
+
+
+def fill(path: str, values: dict, rng: random.Random) -> str:
+    return path.format(**{key: rng.choice(values[key]) for key in ("search", "availability", "location", "skill", "category")})
+
+
+# --- Client side ---
+async def http_client(client, scenario, values, tokens, stop_at, samples, seed):
+    method, path, needs_token = SCENARIOS[scenario]
+    rng = random.Random(seed)
+    while time.monotonic() < stop_at:
+        headers = {"Authorization": f"Bearer {rng.choice(tokens)}"} if needs_token else {}
+        started = time.perf_counter()
+        try:
+            if method == "POST":
+                response = await client.post(path, json={"email": rng.choice(values["emails"]), "password": PASSWORD})
+            else:
+                response = await client.get(fill(path, values, rng), headers=headers)
+        except httpx.HTTPError:
+            samples["errors"] += 1
+            continue
+        samples["latency"].append((time.perf_counter() - started) * 1000)
+        if response.status_code >= 400:
+            samples["errors"] += 1
+        if SQL_HEADER in response.headers:
+            samples["sql"].append(int(response.headers[SQL_HEADER]))
+
+
+async def ws_client(ws_url, token, stop_at, samples):
+    """Send a chat message and time until our own broadcast comes back (everyone else's are read meanwhile)."""
+    from websockets.asyncio.client import connect
+
+    started = time.perf_counter()
+    async with connect(f"{ws_url}?token={token}", max_queue=None) as socket:
+        samples["connect"].append((time.perf_counter() - started) * 1000)
+        while time.monotonic() < stop_at:
+            nonce = uuid.uuid4().hex
+            started = time.perf_counter()
+            await socket.send(json.dumps({"message": nonce}))
+            try:
+                while json.loads(await asyncio.wait_for(socket.recv(), 10)).get("message") != nonce:
+                    pass
+            except asyncio.TimeoutError:
+                samples["errors"] += 1
+                continue
+            samples["latency"].append((time.perf_counter() - started) * 1000)
+
+
+async def run_scenario(base_url, scenario, values, tokens, concurrency, duration, seed):
+    samples = {"latency": [], "sql": [], "connect": [], "errors": 0}
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    stop_at = time.monotonic() + duration
+    started = time.perf_counter()
+    if SCENARIOS[scenario][0] == "WS":
+        ws_url = base_url.replace("http", "ws", 1) + SCENARIOS[scenario][1]
+        await asyncio.gather(*(ws_client(ws_url, tokens[n % len(tokens)], stop_at, samples) for n in range(concurrency)))
+    else:
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+            await asyncio.gather(*(
+                http_client(client, scenario, values, tokens, stop_at, samples, seed + n) for n in range(concurrency)
+            ))
+    elapsed = time.perf_counter() - started
+    result = {
+        "requests": len(samples["latency"]),
+        "errors": samples["errors"],
+        "throughput_rps": len(samples["latency"]) / elapsed,
+        "latency_ms": percentiles(samples["latency"]),
+    }
+    if samples["sql"]:
+        result["sql_per_request"] = {"mean": sum(samples["sql"]) / len(samples["sql"]), "max": max(samples["sql"])}
+    if samples["connect"]:
+        result["connect_ms"] = percentiles(samples["connect"])
+    return result
+
+
+async def run(base_url, scenarios, values, concurrency, duration, seed):
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+        tokens = await login_all(client, values["login_emails"])
+    results = {}
+    for scenario in scenarios:
+        results[scenario] = await run_scenario(base_url, scenario, values, tokens, concurrency, duration, seed)
+        stats = results[scenario]
+        sql = stats.get("sql_per_request", {}).get("mean")
+        print(f"  {scenario:<26} {stats['throughput_rps']:8.1f} req/s  p50={stats['latency_ms']['p50']:7.1f}ms  "
+              f"p95={stats['latency_ms']['p95']:7.1f}ms  p99={stats['latency_ms']['p99']:7.1f}ms  "
+              f"sql/req={'-' if sql is None else f'{sql:.1f}'}  errors={stats['errors']}", flush=True)
+    return results
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+                              capture_output=True, text=True).stdout.strip() or "unknown"
+    except OSError:
+        return "unknown"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Endpoint benchmark: latency percentiles, throughput, SQL per request")
+    parser.add_argument("--serve", type=int, metavar="PORT", help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--load", action="store_true", help="replace the database with a bulk_load dataset first")
+    parser.add_argument("--users", type=int, default=100_000, help="dataset size for --load")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--scenario", action="append", dest="scenarios", choices=list(SCENARIOS),
+                        help="scenario to run (repeatable; default: all)")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per scenario")
+    parser.add_argument("--auth-users", type=int, default=20, help="accounts logged in for authenticated scenarios")
+    parser.add_argument("--output", help="Write the JSON result here")
+    args = parser.parse_args()
+    if args.serve:
+        return serve(args.serve)
+
+    if args.load:
+        load_dataset(args.users, args.seed)
+    values = sample_values(random.Random(args.seed), args.auth_users)
+    scenarios = args.scenarios or list(SCENARIOS)
+    base_url = f"http://127.0.0.1:{args.port}"
+    server = start_server(args.port)
+    try:
+        asyncio.run(wait_ready(base_url))
+        print(f"{len(scenarios)} scenarios x {args.duration:.0f}s at concurrency {args.concurrency}")
+        results = asyncio.run(run(base_url, scenarios, values, args.concurrency, args.duration, args.seed))
+    finally:
+        server.terminate()
+        server.wait()
+
+    report = {
+        "commit": git_commit(),
+        "config": {key: getattr(args, key) for key in ("users", "seed", "concurrency", "duration", "auth_users")},
+        "scenarios": results,
+    }
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump(report, fh, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+# benchmarks/bench_match_precompute.py
+# Wall time and peak memory of the nightly match precompute (services/match_batch.py), no database
+#   python -m benchmarks.bench_match_precompute --users 1000000 --skills 10000 --workers 16
+#   python -m benchmarks.bench_match_precompute --users 3000 --verify   # compare against brute force
+# Skill popularity is Zipfian; about 30% of users have ratings and 10% are private.
+
+import argparse
+import json
+import resource
+import time
+
+import numpy as np
+
+from app.services.match_batch import compute_top_matches, rating_weights, skill_matrix
+
+
+def generate(users, skills, per_user, seed):
+    rng = np.random.default_rng(seed)
+    popularity = 1.0 / np.arange(1, skills + 1)
+    popularity /= popularity.sum()
+
+    def pairs():
+        counts = rng.integers(1, per_user + 1, size=users)
+        user_ids = np.repeat(np.arange(1, users + 1), counts)
+        return user_ids, rng.choice(skills, size=len(user_ids), p=popularity)
+
+    shape = (users + 1, skills)
+    offered = skill_matrix(*pairs(), shape)
+    wanted = skill_matrix(*pairs(), shape)
+    ids = np.arange(1, users + 1)
+    rated = rng.random(users) < 0.3
+    count = np.where(rated, rng.integers(1, 20, size=users), 0)
+    rating_sum = np.where(rated, count * rng.uniform(1, 5, size=users), 0).astype(np.int64)
+    weight = rating_weights(users + 1, ids, rng.random(users) > 0.1, rating_sum, count)
+    return offered, wanted, weight
+
+
+def brute_force(offered, wanted, weight, top_n):
+    """Dense reference: exact scores over all pairs (small inputs only)."""
+    o, w = offered.toarray(), wanted.toarray()
+    scores = (w @ o.T) * (o @ w.T) * weight[None, :]
+    np.fill_diagonal(scores, 0)
+    result = {}
+    for user in range(scores.shape[0]):
+        ranked = sorted(((-s, m) for m, s in enumerate(scores[user]) if s > 0))[:top_n]
+        if ranked:
+            result[user] = [m for _, m in ranked]
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--skills", type=int, default=10_000)
+    parser.add_argument("--per-user", type=int, default=5, help="max skills offered/wanted per user")
+    parser.add_argument("--top-n", type=int, default=20)
+    parser.add_argument("--candidates-per-skill", type=int, default=1000)
+    parser.add_argument("--chunk-users", type=int, default=256)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--verify", action="store_true", help="check against brute force (use a small --users)")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    offered, wanted, weight = generate(args.users, args.skills, args.per_user, args.seed)
+    generated = time.perf_counter() - started
+
+    started = time.perf_counter()
+    results, users_with_matches = {}, 0
+    total = 0
+    for users, matches, scores, ranks in compute_top_matches(
+        offered, wanted, weight, top_n=args.top_n, candidates_per_skill=args.candidates_per_skill,
+        chunk_users=args.chunk_users, workers=args.workers,
+    ):
+        total += len(users)
+        users_with_matches += int((ranks == 1).sum())
+        if args.verify:
+            for u, m, r in zip(users, matches, ranks):
+                results.setdefault(int(u), []).append((int(r), int(m)))
+    elapsed = time.perf_counter() - started
+
+    report = {
+        "users": args.users,
+        "skills": args.skills,
+        "workers": args.workers,
+        "generate_seconds": round(generated, 1),
+        "compute_seconds": round(elapsed, 1),
+        "users_per_second": round(args.users / elapsed),
+        "rows": total,
+        "users_with_matches": users_with_matches,
+        # ru_maxrss is KB on Linux; children = largest single worker
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "peak_worker_rss_mb": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1),
+    }
+    if args.verify:
+        expected = brute_force(offered, wanted, weight, args.top_n)
+        got = {u: [m for _, m in sorted(v)] for u, v in results.items()}
+        report["mismatched_users"] = sum(got.get(u) != m for u, m in expected.items()) + len(set(got) - set(expected))
+        # Share of the exact top-N that survived the candidate cap (1.0 = identical sets)
+        overlap = [len(set(got.get(u, [])) & set(m)) / len(m) for u, m in expected.items()]
+        report["recall_at_n"] = round(float(np.mean(overlap)), 4) if overlap else 1.0
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
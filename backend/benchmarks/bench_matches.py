@@ -0,0 +1,125 @@
+# benchmarks/bench_matches.py
+# Latency and memory of the reciprocal matcher (services/recommender.py), in process
+#   python -m benchmarks.bench_matches --users 1000000 --skills 10000 --queries 2000
+#   python -m benchmarks.bench_matches --users 20000 --verify   # compare against brute force
+# Skill popularity is Zipfian, so a few skills are dense bitmaps and the long tail stays sparse.
+
+import argparse
+import itertools
+import json
+import random
+import resource
+import time
+
+from app.services.recommender import Recommender, match_state
+from benchmarks.stats import percentiles
+
+LEVELS = ["beginner", "intermediate", "advanced"]
+
+
+class FakeUser:
+    def __init__(self, user_id, is_public, offered, wanted):
+        self.id, self.is_public, self.skills_offered, self.skills_wanted = user_id, is_public, offered, wanted
+
+
+def generate(users, skills, per_user, seed):
+    rng = random.Random(seed)
+    names = [f"skill-{i}" for i in range(skills)]
+    cum_weights = list(itertools.accumulate(1.0 / (rank + 1) for rank in range(skills)))
+    profiles, user_skills = [], []
+    for user_id in range(1, users + 1):
+        offered = list(set(rng.choices(names, cum_weights=cum_weights, k=rng.randint(1, per_user))))
+        wanted = list(set(rng.choices(names, cum_weights=cum_weights, k=rng.randint(1, per_user))))
+        profiles.append((user_id, rng.random() < 0.9, offered, wanted))
+        # A third of users also have UserSkill rows, which carry level/remote
+        if rng.random() < 0.33:
+            for name in offered:
+                user_skills.append((user_id, name, "offered", rng.choice(LEVELS), rng.random() < 0.5))
+    return profiles, user_skills
+
+
+def brute_force(profiles, user_skills, me, level, remote_only):
+    skill_rows = {}
+    for user_id, name, skill_type, lvl, remote in user_skills:
+        skill_rows.setdefault(user_id, []).append((name, skill_type, lvl, remote))
+    my = profiles[me - 1]
+    my_wanted, my_offered = set(my[3]), set(my[2])
+    result = []
+    for user_id, is_public, offered, wanted in profiles:
+        if user_id == me or not is_public or not (my_offered & set(wanted)):
+            continue
+        if level or remote_only:
+            ok = any(
+                name in my_wanted and (not level or lvl == level) and (not remote_only or remote)
+                for name, _, lvl, remote in skill_rows.get(user_id, [])
+            )
+        else:
+            ok = bool(my_wanted & set(offered))
+        if ok:
+            result.append(user_id)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--skills", type=int, default=10_000)
+    parser.add_argument("--per-user", type=int, default=5, help="max skills offered/wanted per user")
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--verify", action="store_true", help="check results against brute force (small --users)")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    profiles, user_skills = generate(args.users, args.skills, args.per_user, args.seed)
+    generated = time.perf_counter() - started
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    recommender = Recommender()
+    started = time.perf_counter()
+    recommender.load(profiles, user_skills)
+    built = time.perf_counter() - started
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    rows_by_user = {}
+    for user_id, name, skill_type, level, remote in user_skills:
+        rows_by_user.setdefault(user_id, []).append((name, skill_type, level, remote))
+
+    rng = random.Random(args.seed + 1)
+    latencies = {"all": [], "level": [], "remote": []}
+    mismatches = 0
+    for _ in range(args.queries):
+        me = rng.randint(1, args.users)
+        state = match_state(FakeUser(*profiles[me - 1]), rows_by_user.get(me, []))
+        kind = rng.choice(list(latencies))
+        level = rng.choice(LEVELS) if kind == "level" else None
+        remote_only = kind == "remote"
+        t0 = time.perf_counter()
+        ids, _ = recommender.matches(state, me, level=level, remote_only=remote_only, limit=args.page_size)
+        latencies[kind].append((time.perf_counter() - t0) * 1000)
+        if args.verify:
+            expected = brute_force(profiles, user_skills, me, level, remote_only)[:args.page_size]
+            mismatches += ids != expected
+
+    report = {
+        "users": args.users,
+        "skills": args.skills,
+        "generate_seconds": round(generated, 1),
+        "build_seconds": round(built, 1),
+        # ru_maxrss is KB on Linux; includes the generated input lists
+        "index_rss_mb_approx": round((rss_after - rss_before) / 1024, 1),
+        "index": recommender.stats(),
+        "latency_ms": {k: {p: round(v, 3) for p, v in percentiles(s).items()} for k, s in latencies.items()},
+    }
+    if args.verify:
+        report["mismatches"] = mismatches
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
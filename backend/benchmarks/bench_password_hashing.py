@@ -0,0 +1,59 @@
+# benchmarks/bench_password_hashing.py
+# Logins/sec (bcrypt verify) per core through the process-pool hashing service
+# Run: python -m benchmarks.bench_password_hashing --rounds 12 --workers 1 2 4 --logins 200
+
+import argparse
+import asyncio
+import json
+import os
+import time
+
+from app.utils.hashing import PasswordHasher, hash_password_sync
+
+PASSWORD = "test123"
+
+
+async def run_logins(hasher: PasswordHasher, hashed: str, logins: int) -> float:
+    # Warm up the pool so process start-up isn't counted
+    await asyncio.gather(*[hasher.verify(PASSWORD, hashed) for _ in range(hasher.workers)])
+    started = time.perf_counter()
+    results = await asyncio.gather(*[hasher.verify(PASSWORD, hashed) for _ in range(logins)])
+    elapsed = time.perf_counter() - started
+    assert all(results)
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="bcrypt verify throughput through PasswordHasher")
+    parser.add_argument("--rounds", type=int, nargs="+", default=[10, 12])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, os.cpu_count() or 1])
+    parser.add_argument("--logins", type=int, default=100)
+    parser.add_argument("--output", help="Write the JSON result here")
+    args = parser.parse_args()
+
+    results = []
+    for rounds in args.rounds:
+        hashed = hash_password_sync(PASSWORD, rounds)
+        for workers in args.workers:
+            hasher = PasswordHasher(rounds=rounds, workers=workers, max_pending=args.logins, queue_timeout=3600)
+            try:
+                elapsed = asyncio.run(run_logins(hasher, hashed, args.logins))
+            finally:
+                hasher.shutdown()
+            rate = args.logins / elapsed
+            results.append({
+                "rounds": rounds,
+                "workers": workers,
+                "logins": args.logins,
+                "logins_per_sec": round(rate, 1),
+                "logins_per_sec_per_core": round(rate / workers, 1),
+                "ms_per_login_per_core": round(1000 * workers / rate, 1),
+            })
+            print(f"rounds={rounds:<3} workers={workers:<3} {rate:8.1f} logins/s  "
+                  f"{rate / workers:7.1f} per core  ({1000 * workers / rate:.0f} ms/login/core)")
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump(results, fh, indent=2)
+
+if __name__ == "__main__":
+    main()
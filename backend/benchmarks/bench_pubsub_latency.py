@@ -0,0 +1,141 @@
+# benchmarks/bench_pubsub_latency.py
+# End-to-end latency of cross-worker WebSocket delivery (ws/pubsub.py)
+# Several processes each run a ConnectionManager that holds fake sockets for
+# its share of users. The main process publishes personal messages to random
+# users, and each one must reach the socket in whichever process holds it.
+#   python -m benchmarks.bench_pubsub_latency --backend unix --workers 4 --messages 5000
+#   python -m benchmarks.bench_pubsub_latency --backend postgres   # uses DATABASE_URL
+# Reports p50/p95/p99 publish->socket latency and any lost/misrouted messages.
+
+import argparse
+import asyncio
+import json
+import multiprocessing as mp
+import os
+import random
+import tempfile
+import time
+
+from benchmarks.stats import percentiles
+
+
+class FakeSocket:
+    """Stands in for a WebSocket: records delivery latency of each message."""
+    def __init__(self, user_id, latencies, misrouted):
+        self.user_id = user_id
+        self.latencies = latencies
+        self.misrouted = misrouted
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, payload):
+        message = json.loads(payload)
+        if message["user_id"] != self.user_id:
+            self.misrouted.append(message["seq"])
+        self.latencies.append((time.time() - message["sent_at"]) * 1000)
+
+    async def close(self, code=1000):
+        pass
+
+
+def make_bus(backend, socket_path):
+    from app.ws.pubsub import UnixSocketPubSub, create_pubsub
+
+    if backend == "unix":
+        return UnixSocketPubSub(socket_path)
+    return create_pubsub(backend)
+
+
+def worker(index, workers, users, backend, socket_path, ready, stop, results):
+    from app.ws.connection import ConnectionManager
+
+    async def run():
+        latencies, misrouted = [], []
+        manager = ConnectionManager(queue_size=10000)
+        bus = make_bus(backend, socket_path)
+        manager.bind(bus)
+        await bus.start()
+        for user_id in range(index, users, workers):
+            await manager.connect(FakeSocket(user_id, latencies, misrouted), user_id=user_id)
+        ready.put(index)
+        while not stop.is_set():
+            await asyncio.sleep(0.05)
+        await asyncio.sleep(0.5)  # let queued writes finish
+        await bus.stop()
+        results.put({"latencies": latencies, "misrouted": misrouted,
+                     "dropped": manager.dropped_messages})
+
+    asyncio.run(run())
+
+
+async def publish(backend, socket_path, users, messages, rate):
+    from app.ws.connection import ConnectionManager
+
+    manager = ConnectionManager()
+    bus = make_bus(backend, socket_path)
+    manager.bind(bus)
+    await bus.start()
+    interval = 1.0 / rate if rate else 0
+    started = time.perf_counter()
+    for seq in range(messages):
+        user_id = random.randrange(users)
+        await manager.send_personal_message(
+            {"seq": seq, "user_id": user_id, "sent_at": time.time()}, user_id
+        )
+        if interval:
+            await asyncio.sleep(interval)
+    elapsed = time.perf_counter() - started
+    await bus.stop()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--backend", choices=["unix", "postgres"], default="unix")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--messages", type=int, default=5000)
+    parser.add_argument("--rate", type=float, default=2000, help="messages/second (0 = as fast as possible)")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    socket_path = os.path.join(tempfile.mkdtemp(), "pubsub.sock")
+    ctx = mp.get_context("spawn")
+    ready, results, stop = ctx.Queue(), ctx.Queue(), ctx.Event()
+    procs = [
+        ctx.Process(target=worker, args=(i, args.workers, args.users, args.backend, socket_path, ready, stop, results))
+        for i in range(args.workers)
+    ]
+    for proc in procs:
+        proc.start()
+    for _ in procs:
+        ready.get(timeout=60)
+
+    elapsed = asyncio.run(publish(args.backend, socket_path, args.users, args.messages, args.rate))
+    time.sleep(1.0)
+    stop.set()
+    collected = [results.get(timeout=60) for _ in procs]
+    for proc in procs:
+        proc.join()
+
+    latencies = [ms for r in collected for ms in r["latencies"]]
+    report = {
+        "backend": args.backend,
+        "workers": args.workers,
+        "messages": args.messages,
+        "delivered": len(latencies),
+        "lost": args.messages - len(latencies),
+        "misrouted": sum(len(r["misrouted"]) for r in collected),
+        "dropped_by_queues": sum(r["dropped"] for r in collected),
+        "publish_rate": round(args.messages / elapsed, 1),
+        "latency_ms": {k: round(v, 3) for k, v in percentiles(latencies).items()},
+    }
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# benchmarks/bench_user_search.py
+# Benchmark user search: the in-process n-gram index and (optionally) pg_trgm vs ILIKE
+# Run: python -m benchmarks.bench_user_search --users 1000000
+#      python -m benchmarks.bench_user_search --database-url postgresql+psycopg2://... --load
+
+import argparse
+import random
+import resource
+import time
+
+from benchmarks.stats import percentiles
+
+FIRST_NAMES = [
+    "Alice", "Bob", "Charlie", "Diana", "Eve", "Frank", "Grace", "Heidi", "Ivan", "Judy",
+    "Karl", "Liam", "Mallory", "Niaj", "Olivia", "Peggy", "Quentin", "Rupert", "Sybil", "Trent",
+    "Uma", "Victor", "Wendy", "Xavier", "Yvonne", "Zara", "Jonathan", "Priya", "Mateo", "Aiko",
+]
+LAST_NAMES = [
+    "Smith", "Johnson", "Garcia", "Muller", "Rossi", "Tanaka", "Kumar", "Nguyen", "Silva", "Dubois",
+    "Kowalski", "Andersen", "Okafor", "Haddad", "Novak", "Fischer", "Moreau", "Ivanova", "Sato", "Lopez",
+]
+# Substrings, whole words and typos, roughly what the browse page search box sees
+SEARCH_TERMS = ["ali", "smith", "jonathan kumar", "jonathon", "kowalsky", "priya n", "example.com", "zz"]
+
+
+def synthetic_users(count: int, seed: int):
+    """Yield (id, name, email) tuples, reproducible for a given seed."""
+    rng = random.Random(seed)
+    for i in range(1, count + 1):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        yield i, f"{first} {last}", f"{first}.{last}{i}@example.com".lower()
+
+
+def report(label, samples_ms):
+    stats = percentiles(samples_ms)
+    print(f"  {label:<28} p50={stats['p50']:8.2f}ms  p95={stats['p95']:8.2f}ms  p99={stats['p99']:8.2f}ms")
+
+
+def bench_ngram_index(users: int, seed: int, repeat: int):
+    from app.services.search import NgramIndex
+
+    print(f"NgramIndex over {users:,} synthetic users")
+    index = NgramIndex()
+    started = time.perf_counter()
+    for user_id, name, email in synthetic_users(users, seed):
+        index.add(user_id, name, email)
+    build = time.perf_counter() - started
+    rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"  build: {build:.1f}s  max RSS: {rss_mb:.0f} MB")
+    for term in SEARCH_TERMS:
+        samples = []
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            hits = index.search(term, limit=50)
+            samples.append((time.perf_counter() - t0) * 1000)
+        report(f"{term!r} ({len(hits)} hits)", samples)
+
+
+def bench_postgres(database_url: str, users: int, seed: int, repeat: int, load: bool):
+    from sqlalchemy import create_engine, or_, text
+    from sqlalchemy.orm import Session
+
+    from app.models.user import User
+    from app.services.search import search_users
+
+    engine = create_engine(database_url)
+    if load:
+        print(f"Loading {users:,} synthetic users ...")
+        with engine.begin() as conn:
+            batch = []
+            for user_id, name, email in synthetic_users(users, seed):
+                batch.append({"name": name, "email": email, "password_hash": "x", "is_public": True})
+                if len(batch) == 10000:
+                    conn.execute(User.__table__.insert(), batch)
+                    batch = []
+            if batch:
+                conn.execute(User.__table__.insert(), batch)
+            conn.execute(text("ANALYZE users"))
+
+    print(f"PostgreSQL search ({database_url.split('@')[-1]})")
+    with Session(engine) as db:
+        for term in SEARCH_TERMS:
+            legacy = db.query(User.id).filter(
+                or_(User.name.ilike(f"%{term}%"), User.email.ilike(f"%{term}%"))
+            ).limit(10)
+            ranked = search_users(db, db.query(User.id), term).limit(10)
+            for label, query in (("ILIKE", legacy), ("search_users", ranked)):
+                samples = []
+                for _ in range(repeat):
+                    t0 = time.perf_counter()
+                    query.all()
+                    samples.append((time.perf_counter() - t0) * 1000)
+                report(f"{label} {term!r}", samples)
+    engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--database-url", help="Also time pg_trgm search against this database")
+    parser.add_argument("--load", action="store_true", help="Insert the synthetic users first")
+    parser.add_argument("--skip-index", action="store_true", help="Skip the in-process index run")
+    args = parser.parse_args()
+    if not args.skip_index:
+        bench_ngram_index(args.users, args.seed, args.repeat)
+    if args.database_url:
+        bench_postgres(args.database_url, args.users, args.seed, args.repeat, args.load)
+
+if __name__ == "__main__":
+    main()
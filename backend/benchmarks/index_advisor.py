@@ -0,0 +1,261 @@
+# benchmarks/index_advisor.py
+# EXPLAIN (ANALYZE, BUFFERS) of the SQL behind each GET endpoint, flagging full scans of big tables
+#   python -m benchmarks.index_advisor --load --users 100000 --output plans.json
+#   python -m benchmarks.index_advisor --endpoint swaps_incoming --min-rows 1000 --strict
+# Calls every endpoint once, in process, and records the SELECTs each request runs on either engine
+# (the response cache is cleared first, so nothing is served from memory). Each distinct statement is
+# then re-run under EXPLAIN (ANALYZE, BUFFERS) with the parameters it was called with. A Seq Scan of a
+# table with at least --min-rows rows (pg_class.reltuples) is flagged, and so is any scan that throws away
+# at least --min-rows rows by filter (an index walked in ORDER BY order while the WHERE is checked row by
+# row is a seq scan in disguise). --strict exits 1 if anything was flagged. Run it on a bulk_load dataset
+# (--load), after ANALYZE: plans on a near-empty table say nothing.
+
+import argparse
+import contextvars
+import json
+import re
+import sys
+import warnings
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from jose import jwt
+from sqlalchemy import event, text
+
+from app import database
+from app.config import SECRET_KEY
+from app.seed_data import AVAILABILITY, CATEGORIES, LOCATIONS, NAMES
+from app.utils.request_metrics import statement_shape
+from benchmarks.bench_endpoints import load_dataset
+
+# name -> path; {placeholders} come from pick_values(). All requests carry the picked user's token.
+ENDPOINTS = {
+    "users_public": "/users/public",
+    "users_public_location": "/users/public?location={location}",
+    "users_public_availability": "/users/public?availability={availability}",
+    "users_public_skill": "/users/public?skill={skill}",
+    "users_public_category": "/users/public?category={category}",
+    "users_public_search": "/users/public?search={search}",
+    "users_locations": "/users/locations",
+    "users_me": "/users/me",
+    "users_me_matches": "/users/me/matches",
+    "user_profile": "/users/{other_id}",
+    "swaps_incoming": "/swaps/incoming",
+    "swaps_incoming_pending": "/swaps/incoming?status=pending",
+    "swaps_outgoing": "/swaps/outgoing",
+    "invites_incoming": "/invites/incoming",
+    "invites_incoming_pending": "/invites/incoming?status=pending",
+    "invites_outgoing": "/invites/outgoing",
+    "inbox": "/inbox",
+    "inbox_pending": "/inbox?status=pending",
+    "inbox_swaps_incoming": "/inbox?kind=swap&direction=incoming",
+    "badges": "/badges/",
+    "badges_user": "/badges/user/{user_id}",
+    "skills": "/skills/",
+    "skills_categories": "/skills/categories",
+    "skills_trending": "/skills/trending",
+    "admin_users": "/admin/users",
+    "admin_swaps": "/admin/swaps",
+    "admin_swaps_pending": "/admin/swaps?status=pending",
+    "admin_skills_pending": "/admin/skills/pending",
+}
+
+SEQ_SCANS = ("Seq Scan", "Parallel Seq Scan")
+_READ = re.compile(r"^\s*(SELECT|WITH)\b", re.I)
+_ASYNCPG_PARAM = re.compile(r"\$(\d+)")
+
+_captured: contextvars.ContextVar = contextvars.ContextVar("advisor_statements", default=None)
+
+
+# --- Capture ---
+def _record(conn, cursor, statement, parameters, context, executemany):
+    captured = _captured.get()
+    if captured is not None and not executemany and _READ.match(statement):
+        captured.append((conn.dialect.driver, statement, parameters))
+
+
+def capturing(app, done: list):
+    """ASGI wrapper: each HTTP request records into its own list, appended to `done` when it finishes."""
+    async def wrapped(scope, receive, send):
+        if scope["type"] != "http":
+            return await app(scope, receive, send)
+        statements = []
+        _captured.set(statements)
+        try:
+            await app(scope, receive, send)
+        finally:
+            done.append(statements)
+    return wrapped
+
+
+def pick_values(db) -> dict:
+    """
+    A user with a median-sized inbox, plus filter values. Not the busiest
+    user: ORDER BY id finds a busy user's rows after a few index pages, which
+    hides a missing (user, id) index that everyone else pays for.
+    """
+    user_id = db.execute(text(
+        "SELECT receiver_id FROM (SELECT receiver_id, count(*) AS n FROM swaps GROUP BY receiver_id) t "
+        "ORDER BY n, receiver_id OFFSET (SELECT count(DISTINCT receiver_id) / 2 FROM swaps) LIMIT 1"
+    )).scalar()
+    if user_id is None:
+        raise SystemExit("No swaps found: run with --load (or app/scripts/bulk_load.py) first")
+    other_id = db.execute(text("SELECT max(id) FROM users WHERE is_public")).scalar()
+    skill = db.execute(text("SELECT name FROM skills ORDER BY offer_count DESC LIMIT 1")).scalar()
+    return {
+        "user_id": user_id, "other_id": other_id, "skill": skill,
+        "location": LOCATIONS[0], "availability": AVAILABILITY[0], "category": CATEGORIES[0],
+        "search": NAMES[0].lower()[:4],
+    }
+
+
+def capture(endpoints, values) -> dict:
+    """endpoint name -> (status code, [(driver, statement, parameters), ...])"""
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+    from app.utils.response_cache import response_cache
+
+    for target in (database.engine, database.async_engine.sync_engine):
+        event.listen(target, "before_cursor_execute", _record)
+    token = jwt.encode({"sub": str(values["user_id"]), "exp": datetime.utcnow() + timedelta(hours=1)},
+                       SECRET_KEY, algorithm="HS256")
+    done, statements = [], {}
+    with TestClient(capturing(app, done)) as client:
+        for name in endpoints:
+            response_cache.clear()
+            response = client.get(ENDPOINTS[name].format(**values), headers={"Authorization": f"Bearer {token}"})
+            statements[name] = (response.status_code, done.pop() if done else [])
+    return statements
+
+
+# --- EXPLAIN ---
+def _psycopg2_form(driver: str, statement: str, parameters):
+    """The statement and parameters as psycopg2 takes them (asyncpg's $n placeholders become %(pn)s)."""
+    if driver != "asyncpg":
+        return statement, parameters
+    sql = _ASYNCPG_PARAM.sub(lambda m: f"%(p{m.group(1)})s", statement.replace("%", "%%"))
+    return sql, {f"p{i}": value for i, value in enumerate(parameters or (), start=1)}
+
+
+def explain(raw, driver: str, statement: str, parameters) -> dict:
+    sql, params = _psycopg2_form(driver, statement, parameters)
+    cursor = raw.cursor()
+    try:
+        cursor.execute("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + sql, params)
+        return cursor.fetchone()[0][0]
+    finally:
+        cursor.close()
+        raw.rollback()
+
+
+def plan_nodes(node: dict):
+    yield node
+    for child in node.get("Plans", ()):
+        yield from plan_nodes(child)
+
+
+def table_rows(db) -> dict:
+    rows = db.execute(text(
+        "SELECT c.relname, c.reltuples::bigint FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace "
+        "WHERE c.relkind = 'r' AND n.nspname = current_schema()"
+    )).all()
+    return {name: max(int(count), 0) for name, count in rows}
+
+
+def analyse(captured: dict, min_rows: int) -> dict:
+    db = database.SessionLocal()
+    try:
+        sizes = table_rows(db)
+    finally:
+        db.close()
+    raw = database.engine.raw_connection()
+    report = {}
+    try:
+        for name, (status, statements) in captured.items():
+            by_shape = {}
+            counts = defaultdict(int)
+            for driver, statement, parameters in statements:
+                shape = statement_shape(statement)
+                counts[shape] += 1
+                by_shape.setdefault(shape, (driver, statement, parameters))
+            entry = {"status": status, "statements": len(statements), "distinct": len(by_shape),
+                     "execution_ms": 0.0, "shared_hit": 0, "shared_read": 0, "seq_scans": [], "errors": []}
+            for shape, (driver, statement, parameters) in by_shape.items():
+                try:
+                    plan = explain(raw, driver, statement, parameters)
+                except Exception as exc:
+                    entry["errors"].append({"statement": " ".join(statement.split())[:300], "error": str(exc).strip()[:300]})
+                    continue
+                root = plan["Plan"]
+                entry["execution_ms"] += plan.get("Execution Time", 0.0) * counts[shape]
+                entry["shared_hit"] += root.get("Shared Hit Blocks", 0) * counts[shape]
+                entry["shared_read"] += root.get("Shared Read Blocks", 0) * counts[shape]
+                for node in plan_nodes(root):
+                    relation = node.get("Relation Name")
+                    loops = node.get("Actual Loops", 1)
+                    removed = node.get("Rows Removed by Filter", 0) * loops
+                    if (node["Node Type"] in SEQ_SCANS and sizes.get(relation, 0) >= min_rows) or removed >= min_rows:
+                        entry["seq_scans"].append({
+                            "node": node["Node Type"],
+                            "index": node.get("Index Name"),
+                            "table": relation,
+                            "table_rows": sizes.get(relation),
+                            "filter": node.get("Filter"),
+                            "rows_returned": node.get("Actual Rows", 0) * loops,
+                            "rows_removed_by_filter": removed,
+                            "runs_per_request": counts[shape],
+                            "statement": " ".join(statement.split())[:300],
+                        })
+            entry["execution_ms"] = round(entry["execution_ms"], 3)
+            report[name] = entry
+    finally:
+        raw.close()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EXPLAIN (ANALYZE, BUFFERS) per endpoint; flags full scans of big tables")
+    parser.add_argument("--load", action="store_true", help="replace the database with a bulk_load dataset first")
+    parser.add_argument("--users", type=int, default=100_000, help="dataset size for --load")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--endpoint", action="append", dest="endpoints", choices=list(ENDPOINTS),
+                        help="endpoint to check (repeatable; default: all)")
+    parser.add_argument("--min-rows", type=int, default=10_000, help="flag seq scans of tables this big, and scans filtering out this many rows")
+    parser.add_argument("--strict", action="store_true", help="exit 1 if any scan was flagged")
+    parser.add_argument("--output", help="Write the JSON report here")
+    args = parser.parse_args()
+    warnings.filterwarnings("ignore")
+
+    if args.load:
+        load_dataset(args.users, args.seed)
+    database.init_db()
+    db = database.SessionLocal()
+    try:
+        values = pick_values(db)
+    finally:
+        db.close()
+
+    report = analyse(capture(args.endpoints or list(ENDPOINTS), values), args.min_rows)
+    flagged = 0
+    for name, entry in report.items():
+        flagged += len(entry["seq_scans"])
+        mark = "FULL SCAN" if entry["seq_scans"] else ("ERROR" if entry["errors"] else "ok")
+        print(f"  {name:<26} {entry['status']}  sql={entry['statements']:<3} exec={entry['execution_ms']:8.2f}ms  "
+              f"hit={entry['shared_hit']:<7} read={entry['shared_read']:<6} {mark}")
+        for scan in entry["seq_scans"]:
+            using = f" using {scan['index']}" if scan["index"] else ""
+            print(f"      {scan['node']}{using} on {scan['table']} ({scan['table_rows']} rows), "
+                  f"filter: {scan['filter']}, removed by filter: {scan['rows_removed_by_filter']}")
+            print(f"        {scan['statement'][:160]}")
+        for error in entry["errors"]:
+            print(f"      could not EXPLAIN: {error['error']}")
+    print(f"{flagged} scan(s) reading or filtering out >= {args.min_rows} rows")
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump({"min_rows": args.min_rows, "values": values, "endpoints": report}, fh, indent=2, default=str)
+    if args.strict and flagged:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
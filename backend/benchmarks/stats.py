@@ -0,0 +1,13 @@
+# benchmarks/stats.py
+# Small helpers shared by the benchmark scripts
+import statistics
+from typing import Dict, Sequence
+
+
+def percentiles(samples: Sequence[float]) -> Dict[str, float]:
+    """p50/p95/p99/mean of a list of samples (nearest-rank)."""
+    if not samples:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0, "mean": 0.0}
+    ordered = sorted(samples)
+    pick = lambda p: ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+    return {"p50": pick(0.50), "p95": pick(0.95), "p99": pick(0.99), "mean": statistics.mean(ordered)}
@@ -0,0 +1,27 @@
+# tests/conftest.py
+# Shared fixtures: tests run against the Postgres at DATABASE_URL (JSONB / ON CONFLICT rule out SQLite)
+# and are skipped when it can't be reached. Every test's rows are rolled back.
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from app import database
+
+
+@pytest.fixture(scope="session")
+def engine():
+    try:
+        database.init_db()
+    except OperationalError as exc:
+        pytest.skip(f"No database at DATABASE_URL ({exc.orig})")
+    return database.engine
+
+
+@pytest.fixture
+def connection(engine):
+    """A connection inside a transaction that is rolled back after the test."""
+    with engine.connect() as conn:
+        transaction = conn.begin()
+        try:
+            yield conn
+        finally:
+            transaction.rollback()
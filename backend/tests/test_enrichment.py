@@ -0,0 +1,79 @@
+# tests/test_enrichment.py
+# Swap and invite listings look names up in a fixed number of queries, whatever the list length
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.models.skill import Skill
+from app.models.user import User
+from app.services.enrichment import enrich_invites, enrich_swaps
+
+SIZES = (1, 3, 10)
+
+
+@pytest.fixture
+def ids(connection):
+    """20 users and 20 skills, as ([user ids], [skill ids])."""
+    tag = uuid.uuid4().hex[:8]
+    db = Session(bind=connection, join_transaction_mode="create_savepoint")
+    users = [User(name=f"Enrich{i}", email=f"enrich{i}-{tag}@test.example.com", password_hash="x") for i in range(20)]
+    skills = [Skill(name=f"EnrichSkill{i}-{tag}", category="Test") for i in range(20)]
+    db.add_all(users + skills)
+    db.commit()
+    result = [u.id for u in users], [s.id for s in skills]
+    db.close()
+    return result
+
+
+def swaps(n, user_ids, skill_ids):
+    return [
+        SimpleNamespace(
+            id=i, sender_id=user_ids[(2 * i) % 20], receiver_id=user_ids[(2 * i + 1) % 20],
+            skill_offered=skill_ids[(2 * i) % 20], skill_requested=skill_ids[(2 * i + 1) % 20],
+            skill_id=skill_ids[i % 20], status="pending", scheduled_time=None, created_at=None,
+            message=None, rating=None, feedback=None,
+        )
+        for i in range(n)
+    ]
+
+
+def selects(connection, enrich, rows) -> int:
+    """SELECTs `enrich` runs for `rows` on a fresh session (the name cache is per session)."""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append(statement)
+
+    db = Session(bind=connection, join_transaction_mode="create_savepoint")
+    event.listen(connection, "before_cursor_execute", record)
+    try:
+        enriched = enrich(rows, db)
+    finally:
+        event.remove(connection, "before_cursor_execute", record)
+        db.close()
+    assert len(enriched) == len(rows)
+    return len(statements)
+
+
+@pytest.mark.parametrize("enrich", [enrich_swaps, enrich_invites])
+def test_statement_count_does_not_grow_with_the_list(connection, ids, enrich):
+    counts = [selects(connection, enrich, swaps(n, *ids)) for n in SIZES]
+    # One IN (...) query for the users, one for the skills
+    assert counts == [2] * len(SIZES)
+
+
+def test_names_are_filled_in(connection, ids):
+    db = Session(bind=connection, join_transaction_mode="create_savepoint")
+    try:
+        [swap] = enrich_swaps(swaps(1, *ids), db)
+        [invite] = enrich_invites(swaps(1, *ids), db)
+    finally:
+        db.close()
+    assert swap["sender_name"] == "Enrich0" and swap["receiver_name"] == "Enrich1"
+    assert swap["skill_offered_name"].startswith("EnrichSkill0-")
+    assert swap["skill_requested_name"].startswith("EnrichSkill1-")
+    assert invite["skill_name"].startswith("EnrichSkill0-")
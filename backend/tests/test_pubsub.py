@@ -0,0 +1,99 @@
+# tests/test_pubsub.py
+# Cross-process WebSocket delivery through ws/pubsub.py: a personal message published in one
+# process must reach the socket another process holds, and quickly
+import asyncio
+import json
+import multiprocessing as mp
+import socket
+import statistics
+import time
+
+import pytest
+
+from app.ws.connection import ConnectionManager
+from app.ws.pubsub import UnixSocketPubSub
+
+USER_ID = 7
+MESSAGES = 50
+# Generous for a loaded CI box; a local broker round trip is well under a millisecond
+MEDIAN_LATENCY_MS = 50
+MAX_LATENCY_MS = 1000
+
+
+class RecordingSocket:
+    """Stands in for a WebSocket: reports what it was sent and how long it took to arrive."""
+    def __init__(self, received):
+        self.received = received
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, payload):
+        message = json.loads(payload)
+        self.received.put((message["seq"], (time.time() - message["sent_at"]) * 1000))
+
+    async def close(self, code=1000):
+        pass
+
+
+def hold_socket(path, ready, stop, received):
+    """The other worker: holds USER_ID's socket until told to stop."""
+    async def run():
+        manager = ConnectionManager()
+        bus = UnixSocketPubSub(path)
+        manager.bind(bus)
+        await bus.start()
+        await manager.connect(RecordingSocket(received), user_id=USER_ID)
+        ready.set()
+        while not stop.is_set():
+            await asyncio.sleep(0.02)
+        await asyncio.sleep(0.1)  # let queued writes finish
+        await bus.stop()
+
+    asyncio.run(run())
+
+
+@pytest.fixture
+def socket_path(tmp_path):
+    if not hasattr(socket, "AF_UNIX"):
+        pytest.skip("Unix sockets are not available on this platform")
+    return str(tmp_path / "pubsub.sock")
+
+
+def test_personal_message_reaches_socket_in_other_process(socket_path):
+    ctx = mp.get_context("spawn")
+    ready, stop, received = ctx.Event(), ctx.Event(), ctx.Queue()
+    worker = ctx.Process(target=hold_socket, args=(socket_path, ready, stop, received), daemon=True)
+    worker.start()
+    try:
+        assert ready.wait(timeout=30), "the other worker did not start"
+
+        async def publish():
+            manager = ConnectionManager()
+            bus = UnixSocketPubSub(socket_path)
+            manager.bind(bus)
+            await bus.start()
+            try:
+                for seq in range(MESSAGES):
+                    await manager.send_personal_message({"seq": seq, "sent_at": time.time()}, USER_ID)
+                    await asyncio.sleep(0.005)
+                # Nobody holds this user's socket: it must not show up at USER_ID's
+                await manager.send_personal_message({"seq": -1, "sent_at": time.time()}, USER_ID + 1)
+                # This process holds no sockets, so nothing was delivered locally
+                assert manager.delivered_messages == 0
+            finally:
+                await bus.stop()
+
+        asyncio.run(publish())
+        results = [received.get(timeout=10) for _ in range(MESSAGES)]
+    finally:
+        stop.set()
+        worker.join(timeout=10)
+        if worker.is_alive():
+            worker.kill()
+
+    assert [seq for seq, _ in results] == list(range(MESSAGES))
+    assert received.empty()
+    latencies = [ms for _, ms in results]
+    assert statistics.median(latencies) < MEDIAN_LATENCY_MS
+    assert max(latencies) < MAX_LATENCY_MS
@@ -1,5 +1,6 @@
 import React, { useEffect, useState } from "react";
 import axios from "axios";
+import getAllPages from "../shared/getAllPages";
 
 /**
  * AdminPanel.jsx
@@ -19,11 +20,11 @@ export default function AdminPanel() {
   useEffect(() => {
     setLoading(true);
     Promise.all([
-      axios.get("/admin/users"),
+      getAllPages("/admin/users"),
       axios.get("/admin/skills/pending"),
     ])
       .then(([usersRes, skillsRes]) => {
-        setUsers(usersRes.data);
+        setUsers(usersRes);
         setPendingSkills(skillsRes.data);
         setLoading(false);
       })
@@ -1,41 +1,23 @@
-import React, { useEffect, useState, useContext } from "react";
+import React, { useContext } from "react";
 import { AuthContext } from "../../context/AuthContext";
 import axios from "axios";
 import InviteCard from "./InviteCard";
+import useInbox from "../shared/useInbox";
 
-const PAGE_SIZE = 5;
+const PAGE_SIZE = 10;
 
 /**
  * InviteList.jsx
- * Shows a list of invites for the logged-in user.
+ * Shows a list of invites for the logged-in user, from the unified inbox.
  * Usage: <InviteList />
  */
 export default function InviteList() {
   const { user } = useContext(AuthContext);
-  const [incoming, setIncoming] = useState([]);
-  const [outgoing, setOutgoing] = useState([]);
-  const [loading, setLoading] = useState(true);
-  const [error, setError] = useState("");
-  const [page, setPage] = useState(1);
-
-  const fetchInvites = () => {
-    setLoading(true);
-    Promise.all([
-      axios.get(`/invites/incoming?page=${page}&page_size=${PAGE_SIZE}`),
-      axios.get(`/invites/outgoing?page=${page}&page_size=${PAGE_SIZE}`)
-    ])
-      .then(([inRes, outRes]) => {
-        setIncoming(inRes.data);
-        setOutgoing(outRes.data);
-        setError("");
-      })
-      .catch(() => setError("Failed to load invites"))
-      .finally(() => setLoading(false));
-  };
-
-  useEffect(() => {
-    fetchInvites();
-  }, [page]);
+  // Incoming and outgoing come from one read, split by direction
+  const inbox = useInbox("invite", PAGE_SIZE);
+  const fetchInvites = inbox.reload;
+  const loading = inbox.loading && inbox.entries.length === 0;
+  const error = inbox.error ? "Failed to load invites" : "";
 
   const handleAccept = (id) => {
     axios.put(`/invites/${id}`, { status: "accepted" })
@@ -60,11 +42,11 @@ export default function InviteList() {
       ) : (
         <>
           <h3 className="text-lg font-semibold mt-4 mb-2">Incoming Invites</h3>
-          {incoming.length === 0 ? (
+          {inbox.incoming.length === 0 ? (
             <div className="alert alert-info mb-4">No incoming invites.</div>
           ) : (
             <div className="flex flex-col gap-4 mb-6">
-              {incoming.map(invite => (
+              {inbox.incoming.map(invite => (
                 <InviteCard
                   key={invite.id}
                   invite={invite}
@@ -78,11 +60,11 @@ export default function InviteList() {
             </div>
           )}
           <h3 className="text-lg font-semibold mt-4 mb-2">Outgoing Invites</h3>
-          {outgoing.length === 0 ? (
+          {inbox.outgoing.length === 0 ? (
             <div className="alert alert-info">No outgoing invites.</div>
           ) : (
             <div className="flex flex-col gap-4">
-              {outgoing.map(invite => (
+              {inbox.outgoing.map(invite => (
                 <InviteCard
                   key={invite.id}
                   invite={invite}
@@ -95,11 +77,11 @@ export default function InviteList() {
               ))}
             </div>
           )}
-          <div className="flex justify-center mt-4 gap-2">
-            {[1,2,3,4,5].map(p => (
-              <button key={p} className={`btn btn-sm ${p===page ? "btn-primary" : "btn-outline"}`} onClick={() => setPage(p)}>{p}</button>
-            ))}
-          </div>
+          {inbox.hasMore && (
+            <div className="flex justify-center mt-4">
+              <button className="btn btn-sm btn-outline" disabled={inbox.loading} onClick={inbox.loadMore}>Load more</button>
+            </div>
+          )}
         </>
       )}
     </div>
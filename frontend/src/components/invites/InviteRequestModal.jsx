@@ -1,5 +1,6 @@
 import React, { useState, useEffect } from "react";
 import axios from "axios";
+import getAllPages from "../shared/getAllPages";
 
 /**
  * InviteRequestModal.jsx
@@ -15,7 +16,7 @@ export default function InviteRequestModal({ open, onClose, receiver, onSuccess
 
   useEffect(() => {
     if (open) {
-      axios.get("/skills/").then(res => setSkills(res.data));
+      getAllPages("/skills/").then(setSkills);
     }
   }, [open]);
 
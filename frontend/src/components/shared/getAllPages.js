@@ -0,0 +1,19 @@
+import axios from "axios";
+
+/**
+ * getAllPages.js
+ * GET every page of a cursor-paginated list (e.g. /skills/, /admin/users): follows the
+ * X-Next-Cursor header until the backend stops sending one and returns all rows as one array.
+ * Usage: getAllPages("/skills/").then(setSkills);
+ */
+export default async function getAllPages(url) {
+  const rows = [];
+  let cursor = null;
+  do {
+    const separator = url.includes("?") ? "&" : "?";
+    const res = await axios.get(cursor ? `${url}${separator}cursor=${encodeURIComponent(cursor)}` : url);
+    rows.push(...res.data);
+    cursor = res.headers["x-next-cursor"];
+  } while (cursor);
+  return rows;
+}
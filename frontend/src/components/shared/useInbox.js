@@ -0,0 +1,45 @@
+import { useCallback, useEffect, useState } from "react";
+import axios from "axios";
+
+/**
+ * useInbox.js
+ * The unified inbox (GET /inbox, optionally one kind), a page at a time: one read covers both
+ * directions, which `incoming`/`outgoing` split out. Loads the first page, loadMore() follows the
+ * X-Next-Cursor header, reload() starts over.
+ * Usage: const swaps = useInbox("swap", 10);
+ */
+export default function useInbox(kind, pageSize) {
+  const [entries, setEntries] = useState([]);
+  const [cursor, setCursor] = useState(null);
+  const [loading, setLoading] = useState(true);
+  const [error, setError] = useState("");
+
+  const fetchPage = useCallback((after) => {
+    setLoading(true);
+    const params = { kind, page_size: pageSize };
+    if (after) params.cursor = after;
+    return axios.get("/inbox", { params })
+      .then(res => {
+        setEntries(prev => (after ? [...prev, ...res.data] : res.data));
+        setCursor(res.headers["x-next-cursor"] || null);
+        setError("");
+      })
+      .catch(() => setError("Failed to load"))
+      .finally(() => setLoading(false));
+  }, [kind, pageSize]);
+
+  useEffect(() => {
+    fetchPage(null);
+  }, [fetchPage]);
+
+  return {
+    entries,
+    incoming: entries.filter(entry => entry.direction === "incoming"),
+    outgoing: entries.filter(entry => entry.direction === "outgoing"),
+    loading,
+    error,
+    hasMore: cursor !== null,
+    loadMore: () => fetchPage(cursor),
+    reload: () => fetchPage(null),
+  };
+}